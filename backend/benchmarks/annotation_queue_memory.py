@@ -0,0 +1,82 @@
+"""
+Benchmarks the memory of queueing an analysis' annotation units with the seed annotation configuration.
+
+Queues an annotation unit for each of the seed configuration's datasets for each gene and HGVS variant within the
+analysis, and reports the peak memory allocated while queueing, the memory and the number of memory blocks retained
+by the queued annotation units, and the elapsed time.
+
+From the ./backend/ directory:
+
+    ROSALUTION_KEY="fake-rosalution-key" python -m benchmarks.annotation_queue_memory --genes 50 --variants 50
+"""
+import argparse
+import json
+import os
+import queue
+import time
+import tracemalloc
+
+from src.core.annotation import AnnotationService
+from src.core.annotation_config_registry import AnnotationConfigRegistry
+from src.enums import GenomicUnitType
+
+SEED_ANNOTATION_CONFIGURATION = os.path.join(
+    os.path.dirname(__file__), "..", "..", "etc", "fixtures", "initial-seed", "annotations-config.json"
+)
+
+
+class InMemoryAnnotationConfigCollection:  # pylint: disable=too-few-public-methods
+    """Stands in for the AnnotationConfigCollection with the seed annotation configuration"""
+
+    def __init__(self, datasets: list):
+        self.registry = AnnotationConfigRegistry(datasets)
+
+    def datasets_to_annotate_for_units(self, genomic_units_to_annotate):
+        """Returns the seed configuration's datasets for each type of the genomic units"""
+        return {
+            genomic_unit["type"]: list(self.registry.datasets_for_type(genomic_unit["type"]))
+            for genomic_unit in genomic_units_to_annotate
+        }
+
+
+def benchmark_units_to_annotate(gene_count: int, variant_count: int):
+    """Creates the genomic units of an analysis in the form 'Analysis.units_to_annotate' returns them"""
+    genes = [{"unit": f"GENE{gene_index}", "type": GenomicUnitType.GENE} for gene_index in range(gene_count)]
+    variants = [{
+        "unit": f"NM_{variant_index:06d}.1:c.{variant_index}G>T", "type": GenomicUnitType.HGVS_VARIANT,
+        "genomic_build": "hg19", "transcript": f"NM_{variant_index:06d}", "protein": "p.Gly55Val"
+    } for variant_index in range(variant_count)]
+
+    return [*genes, *variants]
+
+
+def main():
+    """Parses the benchmark arguments and reports the memory of queueing the analysis' annotation units"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--genes", type=int, default=50, help="genes within the analysis")
+    parser.add_argument("--variants", type=int, default=50, help="HGVS variants within the analysis")
+    arguments = parser.parse_args()
+
+    with open(SEED_ANNOTATION_CONFIGURATION, "r", encoding="utf-8") as configuration_file:
+        annotation_service = AnnotationService(InMemoryAnnotationConfigCollection(json.load(configuration_file)))
+
+    units_to_annotate = benchmark_units_to_annotate(arguments.genes, arguments.variants)
+    annotation_queue = queue.Queue()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    annotation_service.queue_annotation_units("BENCHMARK", units_to_annotate, annotation_queue)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    retained_blocks = sum(statistic.count for statistic in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    print(f"{'annotation units'.ljust(25)}{annotation_queue.qsize()}")
+    print(f"{'peak memory'.ljust(25)}{peak / 1024:.1f} KiB")
+    print(f"{'retained memory'.ljust(25)}{retained / 1024:.1f} KiB")
+    print(f"{'retained blocks'.ljust(25)}{retained_blocks}")
+    print(f"{'elapsed'.ljust(25)}{elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmarks the throughput of processing the annotation queue against a local stub HTTP server.
+
+Reports the throughput of 'AnnotationService.process_tasks' for both the 'threaded' and 'async' engines. Providing a
+baseline git revision also runs that revision's 'AnnotationService.process_tasks', exported with 'git archive' and run
+within its own process, and reports each engine's speedup over it.
+
+From the ./backend/ directory:
+
+    ROSALUTION_KEY="fake-rosalution-key" python -m benchmarks.annotation_scheduler --units 3 --datasets 100 \
+        --baseline-revision <git revision>
+"""
+import argparse
+# The annotation module of earlier revisions uses 'concurrent.futures' without importing the submodule itself
+import concurrent.futures  # pylint: disable=unused-import
+import functools
+import io
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.annotation import AnnotationService
+from src.core.annotation_unit import AnnotationUnit
+from src.enums import GenomicUnitType
+
+
+class StubAnnotationHandler(BaseHTTPRequestHandler):
+    """Responds to every GET with a small JSON payload after a fixed latency to emulate an annotation source."""
+
+    latency_seconds = 0.02
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Sleeps for the configured latency and returns the requested path as the annotation value"""
+        time.sleep(self.latency_seconds)
+        body = json.dumps({"value": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silences the request logging of the stub server"""
+
+
+class InMemoryGenomicUnitCollection:
+    """
+    Stands in for the GenomicUnitCollection so the benchmark only measures scheduling, HTTP, and the write latency
+    emulating each round trip to MongoDB
+    """
+
+    write_latency_seconds = 0.0
+
+    def __init__(self):
+        self.annotations = []
+
+    def annotation_exist(self, _annotation_unit):
+        """No annotations exist before the benchmark runs"""
+        return False
+
+    def find_genomic_unit_annotation_value(self, _annotation_unit):
+        """No dependencies are configured for the benchmark's datasets"""
+        return None
+
+    def bulk_annotate_genomic_unit(self, genomic_unit, genomic_annotations):
+        """Keeps the saved annotations in memory after one write's latency"""
+        time.sleep(self.write_latency_seconds)
+        for genomic_annotation in genomic_annotations:
+            self.annotations.append((genomic_unit['unit'], genomic_annotation['data_set']))
+
+    def annotate_genomic_unit(self, genomic_unit, genomic_annotation):
+        """Keeps a saved annotation in memory after one write's latency, as a baseline revision saves one at a time"""
+        time.sleep(self.write_latency_seconds)
+        self.annotations.append((genomic_unit['unit'], genomic_annotation['data_set']))
+
+    def refresh_analysis_annotations(self, _genomic_unit, _analysis_names):
+        """The analyses' views are not materialized by the benchmark"""
+
+
+class InMemoryAnalysisCollection:
+    """Stands in for the AnalysisCollection with an empty manifest"""
+
+    def get_dataset_manifest(self, _analysis_name):
+        """The benchmark analysis has no existing manifest entries"""
+        return []
+
+    def add_datasets_to_manifest(self, _analysis_name, _unit_datasets):
+        """Manifest entries are not tracked by the benchmark"""
+
+    def add_dataset_to_manifest(self, _analysis_name, _annotation_unit):
+        """Manifest entries are not tracked by the benchmark, as a baseline revision adds them one at a time"""
+
+    def get_manifest_dataset_config(self, _analysis_name, _unit, _dataset_name):
+        """The benchmark analysis has no existing manifest entries, as a baseline revision queries them"""
+        return None
+
+
+def queue_benchmark_annotation_units(base_url: str, unit_count: int, dataset_count: int):
+    """Creates a queue of annotation units for 'unit_count' genes with 'dataset_count' HTTP datasets each"""
+    annotation_queue = queue.Queue()
+    for unit_index in range(unit_count):
+        genomic_unit = {'unit': f"GENE{unit_index}", 'type': GenomicUnitType.GENE}
+        for dataset_index in range(dataset_count):
+            dataset = {
+                "data_set": f"dataset_{dataset_index}",
+                "data_source": "Benchmark",
+                "genomic_unit_type": "gene",
+                "annotation_source_type": "http",
+                "url": f"{base_url}/{{gene}}/dataset_{dataset_index}",
+                "attribute": "{ \"value\": .value }",
+                "versioning_type": "rosalution",
+            }
+            annotation_queue.put(AnnotationUnit(genomic_unit, dataset, analysis_name="BENCHMARK"))
+
+    return annotation_queue
+
+
+def run_benchmark(scheduler, base_url: str, unit_count: int, dataset_count: int):
+    """Runs a scheduler over a freshly queued benchmark analysis and returns the elapsed seconds and saved count"""
+    annotation_queue = queue_benchmark_annotation_units(base_url, unit_count, dataset_count)
+    genomic_unit_collection = InMemoryGenomicUnitCollection()
+
+    start = time.perf_counter()
+    scheduler(annotation_queue, genomic_unit_collection, InMemoryAnalysisCollection())
+    elapsed = time.perf_counter() - start
+
+    return elapsed, len(genomic_unit_collection.annotations)
+
+
+def run_baseline_benchmark(baseline_revision: str, base_url: str, arguments: argparse.Namespace):
+    """
+    Exports the baseline revision's 'src' package with 'git archive' alongside these benchmarks, then runs the
+    baseline's 'AnnotationService.process_tasks' within its own process and returns its elapsed seconds and saved count
+    """
+    backend_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    archive = subprocess.run(["git", "archive", baseline_revision, "src"],
+                             cwd=backend_directory,
+                             capture_output=True,
+                             check=True).stdout
+
+    with tempfile.TemporaryDirectory() as baseline_directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as baseline_archive:
+            baseline_archive.extractall(baseline_directory, filter="data")
+        shutil.copytree(os.path.dirname(os.path.abspath(__file__)), os.path.join(baseline_directory, "benchmarks"))
+
+        baseline_run = subprocess.run([
+            sys.executable, "-m", "benchmarks.annotation_scheduler", "--units",
+            str(arguments.units), "--datasets",
+            str(arguments.datasets), "--write-latency",
+            str(arguments.write_latency), "--base-url", base_url
+        ],
+                                      cwd=baseline_directory,
+                                      stdout=subprocess.PIPE,
+                                      check=True,
+                                      text=True)
+
+    result = json.loads(baseline_run.stdout.splitlines()[-1])
+    return result['elapsed'], result['saved']
+
+
+def main():
+    """Parses the benchmark arguments, starts the stub server, and reports the throughput of each engine"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=3, help="genomic units within the analysis")
+    parser.add_argument("--datasets", type=int, default=100, help="HTTP datasets configured per genomic unit")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub server response latency in seconds")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="emulated MongoDB write latency in seconds")
+    parser.add_argument("--baseline-revision", help="git revision whose 'process_tasks' the engines are compared to")
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    InMemoryGenomicUnitCollection.write_latency_seconds = arguments.write_latency
+
+    if arguments.base_url is not None:
+        # Runs only 'process_tasks' of the 'src' package importable by this process, which is the baseline revision
+        elapsed, saved = run_benchmark(
+            AnnotationService.process_tasks, arguments.base_url, arguments.units, arguments.datasets
+        )
+        print(json.dumps({"elapsed": elapsed, "saved": saved}))
+        return
+
+    StubAnnotationHandler.latency_seconds = arguments.latency
+    stub_server = ThreadingHTTPServer(("127.0.0.1", 0), StubAnnotationHandler)
+    threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{stub_server.server_address[1]}"
+
+    schedulers = [
+        ("threaded", AnnotationService.process_tasks),
+        ("async", functools.partial(AnnotationService.process_tasks, engine="async")),
+    ]
+    results = {}
+    if arguments.baseline_revision is not None:
+        results['baseline'] = run_baseline_benchmark(arguments.baseline_revision, base_url, arguments)
+
+    for name, scheduler in schedulers:
+        results[name] = run_benchmark(scheduler, base_url, arguments.units, arguments.datasets)
+
+    for name, (elapsed, saved) in results.items():
+        print(f"{name.ljust(15)}{saved} annotations in {elapsed:.2f}s ({saved / elapsed:.1f} annotations/s)")
+
+    if 'baseline' in results:
+        for name, _scheduler in schedulers:
+            print(f"{f'{name} speedup'.ljust(25)}{results['baseline'][0] / results[name][0]:.2f}x")
+
+    stub_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Module to respond to conditional GET requests of endpoints whose data is identified by revisions. The revisions are
+hashed into a response's ETag so that a request with a matching 'If-None-Match' header is answered with
+'304 Not Modified', and the serialized response of each endpoint's latest ETag is kept in a least recently used cache
+so that the data is not queried and serialized again until its revision changes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+class RevisionResponseCache:
+    """
+    A thread-safe least recently used cache of serialized responses. Only the response of the latest ETag is kept
+    for each key, since a response with an earlier ETag is not requested once its revision has changed.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        """Initializes an empty cache"""
+        self.max_entries = max_entries
+        self.responses = OrderedDict()
+        self.lock = threading.Lock()
+
+    def configure(self, max_entries: int):
+        """Sets the maximum number of responses to keep, evicting the least recently used responses beyond it"""
+        with self.lock:
+            self.max_entries = max_entries
+            self.evict()
+
+    def get(self, key: tuple, etag: str):
+        """Returns the serialized response cached for the key with the ETag, otherwise returns None"""
+        with self.lock:
+            cached = self.responses.get(key)
+            if cached is None or cached[0] != etag:
+                return None
+
+            self.responses.move_to_end(key)
+            return cached[1]
+
+    def set(self, key: tuple, etag: str, content: bytes):
+        """Caches the serialized response for the key with the ETag, replacing the key's response for another ETag"""
+        with self.lock:
+            self.responses[key] = (etag, content)
+            self.responses.move_to_end(key)
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used responses beyond the maximum number of responses"""
+        while len(self.responses) > self.max_entries:
+            self.responses.popitem(last=False)
+
+    def clear(self):
+        """Removes every cached response"""
+        with self.lock:
+            self.responses.clear()
+
+
+def entity_tag(*revisions) -> str:
+    """Returns the strong ETag that identifies a response by the revisions of the data it is built from"""
+    digest = hashlib.sha1(":".join(str(revision) for revision in revisions).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Returns True when the request's 'If-None-Match' header matches the ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    request_etags = {request_etag.strip().removeprefix("W/") for request_etag in if_none_match.split(",")}
+    return "*" in request_etags or etag in request_etags
+
+
+def conditional_json_response(request: Request, key: tuple, etag: str, build_content: Callable) -> Response:
+    """
+    Responds with '304 Not Modified' when the request matches the ETag, otherwise with the cached serialized response
+    for the key and ETag. The content is only built, and then cached, when neither applies.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    content = revision_response_cache.get(key, etag)
+    if content is None:
+        content = JSONResponse(jsonable_encoder(build_content())).body
+        revision_response_cache.set(key, etag, content)
+
+    return Response(content, media_type="application/json", headers=headers)
+
+
+revision_response_cache = RevisionResponseCache()
@@ -5,6 +5,7 @@ Specifically the SECRET_KEY parameter can be generated and changed with each run
 """
 # pylint: disable=too-few-public-methods
 from functools import lru_cache
+from typing import Literal
 from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
@@ -19,6 +20,8 @@ class Settings(BaseSettings):
     origin_domain_url: str = "http://dev.cgds.uab.edu"
     mongodb_host: str = "rosalution-db"
     mongodb_db: str = "rosalution_db"
+    mongodb_ensure_indexes: bool = True
+    revision_response_cache_max_entries: int = 1000
     rosalution_key: str
     auth_web_failure_redirect_route: str = "/login"
     oauth2_access_token_expire_minutes: int = 60 * 24 * 8  # 60 minutes * 24 hours * 8 days = 8 days
@@ -29,6 +32,20 @@ class Settings(BaseSettings):
     cas_login_enable: bool = False
     profiler_enabled: bool = False
     profiler_renderer: str = "html"
+    annotation_engine: Literal["threaded", "async"] = "threaded"
+    annotation_max_workers: int = 5
+    annotation_rate_limits: dict[str, float] = {"rest.ensembl.org": 15, "grch37.rest.ensembl.org": 15}
+    annotation_http_max_retries: int = 4
+    annotation_http_backoff_base_seconds: float = 0.5
+    annotation_http_backoff_max_seconds: float = 30
+    annotation_response_cache_ttl_seconds: int = 60 * 60 * 24 * 30  # 60 seconds * 60 minutes * 24 hours * 30 days
+    annotation_response_cache_max_entries: int = 50000
+    annotation_version_cache_ttl_seconds: int = 60 * 60 * 24  # 60 seconds * 60 minutes * 24 hours = 1 day
+    annotation_version_cache_persist: bool = True
+    annotation_config_refresh_seconds: int = 60
+    annotation_log_format: Literal["text", "json"] = "text"
+    annotation_log_saving_sample_rate: float = 1.0
+    metrics_scrape_token: str = ""
 
     @model_validator(mode="before")
     @classmethod
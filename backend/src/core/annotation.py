@@ -1,17 +1,31 @@
 """Supports the queueing and processing of genomic unit annotation"""
+import asyncio
 import concurrent
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import json
 import logging
-import time
 import queue
-from requests.exceptions import JSONDecodeError, HTTPError
+import httpx
+from requests.exceptions import JSONDecodeError, HTTPError, RequestException
 
 from ..repository.analysis_collection import AnalysisCollection
+from ..repository.annotation_response_cache_collection import AnnotationResponseCacheCollection
+from ..repository.annotation_run_collection import AnnotationRunCollection
 from ..repository.genomic_unit_collection import GenomicUnitCollection
 
-from .annotation_task import AnnotationTaskFactory, VersionAnnotationTask
+from .annotation_dependency_graph import AnnotationDependencyGraph, GenomicUnitAnnotationGraph
+from .annotation_http import AnnotationHttpClientPool
+from .annotation_index import AnnotationIndex
+from .annotation_logging import AnnotationEventLogger
+from .annotation_metrics import annotation_metrics
+from .annotation_version_cache import VERSION_NOT_CACHED, AnnotationVersionCache
+from .annotation_manifest import AnalysisManifestSnapshot
+from .annotation_writer import BufferedAnnotationWriter
+from .annotation_task import AnnotationTaskFactory, ForgeAnnotationGroupTask, VersionAnnotationTask
 from ..models.analysis import Analysis
 from ..repository.annotation_config_collection import AnnotationConfigCollection
-from ..core.annotation_unit import AnnotationUnit
+from ..core.annotation_unit import AnnotationUnit, genomic_unit_record
 
 # create logger
 logger = logging.getLogger(__name__)
@@ -59,6 +73,9 @@ def format_annotation_logging(annotation_unit: AnnotationUnit, note=""):
     return f"{annotation_log_label()}{annotation_unit_log_string}"
 
 
+annotation_event_logger = AnnotationEventLogger(logger, format_annotation_logging)
+
+
 class AnnotationQueue:
     """Wrapper for the queue to processes annotation tasks"""
 
@@ -82,6 +99,10 @@ class AnnotationQueue:
         """Verifies if the thread safe queue is empty"""
         return self.annotation_queue.empty()
 
+    def qsize(self):
+        """Returns the approximate number of items within the thread safe queue"""
+        return self.annotation_queue.qsize()
+
 
 class AnnotationService:
     """
@@ -97,14 +118,7 @@ class AnnotationService:
         Uses the list of genomic units and the list of types to queue annotation operations.
         """
         units_to_annotate = analysis.get_all_units_to_annotate()
-
-        annotation_configuration = self.annotation_config_collection.datasets_to_annotate_for_units(units_to_annotate)
-
-        for genomic_unit in units_to_annotate:
-            genomic_unit_type = genomic_unit["type"].value
-            for dataset in annotation_configuration[genomic_unit_type]:
-                annotation_unit_queued = AnnotationUnit(genomic_unit, dataset, analysis_name=analysis.name)
-                annotation_task_queue.put(annotation_unit_queued)
+        self.queue_annotation_units(analysis.name, units_to_annotate, annotation_task_queue)
 
     def queue_annotation_tasks_by_unit(
         self, analysis: Analysis, units_to_annotate: list, annotation_task_queue: AnnotationQueue
@@ -112,62 +126,202 @@ class AnnotationService:
         """
         Uses the list of genomic units and the list of types to queue annotation operations.
         """
+        self.queue_annotation_units(analysis.name, units_to_annotate, annotation_task_queue)
 
+    def queue_annotation_units(
+        self, analysis_name: str, units_to_annotate: list, annotation_task_queue: AnnotationQueue
+    ):
+        """
+        Queues an annotation unit for each dataset configured to annotate each genomic unit. The datasets for each
+        genomic unit type are compiled into a dependency graph so that an annotation unit runs once the datasets it
+        depends on finish. Datasets that can never be annotated for a genomic unit are reported up front and are not
+        queued. The annotation units share an index of the genomic units' existing annotations, which is loaded once
+        when the first of them is processed, and each genomic unit's annotation units share one record of it.
+        """
         annotation_configuration = self.annotation_config_collection.datasets_to_annotate_for_units(units_to_annotate)
+        dependency_graphs = {
+            genomic_unit_type: AnnotationDependencyGraph(genomic_unit_type, datasets)
+            for genomic_unit_type, datasets in annotation_configuration.items()
+        }
+        annotation_index = AnnotationIndex(units_to_annotate)
 
         for genomic_unit in units_to_annotate:
             genomic_unit_type = genomic_unit["type"].value
+            dependency_graph = dependency_graphs[genomic_unit_type]
+            unschedulable_datasets = dependency_graph.unschedulable_datasets(genomic_unit)
+
+            annotation_units = []
+            unit_record = genomic_unit_record(genomic_unit)
             for dataset in annotation_configuration[genomic_unit_type]:
-                annotation_unit_queued = AnnotationUnit(genomic_unit, dataset, analysis_name=analysis.name)
-                annotation_task_queue.put(annotation_unit_queued)
+                annotation_unit = AnnotationUnit(unit_record, dataset, analysis_name=analysis_name)
+                annotation_unit.annotation_index = annotation_index
+                if dataset['data_set'] in unschedulable_datasets:
+                    annotation_event_logger.info(
+                        annotation_unit, 'Canceling Annotation, %s...', unschedulable_datasets[dataset['data_set']]
+                    )
+                    annotation_metrics.increment("rosalution_annotation_units_total", outcome="cancelled")
+                    continue
+
+                annotation_units.append(annotation_unit)
+
+            GenomicUnitAnnotationGraph(dependency_graph, annotation_units)
+            for annotation_unit in annotation_units:
+                annotation_task_queue.put(annotation_unit)
 
     @staticmethod
-    def process_tasks(
-        annotation_queue: AnnotationQueue, genomic_unit_collection: GenomicUnitCollection,
-        analysis_collection: AnalysisCollection
+    def process_tasks(  # pylint: disable=too-many-arguments
+        annotation_queue: AnnotationQueue,
+        genomic_unit_collection: GenomicUnitCollection,
+        analysis_collection: AnalysisCollection,
+        engine: str = "threaded",
+        response_cache: AnnotationResponseCacheCollection = None,
+        version_cache: AnnotationVersionCache = None,
+        task_executor: concurrent.futures.Executor = None,
+        run_collection: AnnotationRunCollection = None
     ):
-        """Processes items that have been added to the queue"""
+        """
+        Processes items that have been added to the queue. The 'threaded' engine runs annotation tasks within a
+        thread pool, while the 'async' engine runs them as coroutines on one event loop with a pooled HTTP client.
+        Providing a shared version cache lets concurrent and later annotation runs reuse the calculated versions.
+        The 'threaded' engine uses the provided task executor when given, otherwise it creates its own thread pool.
+        The run's summary of its metrics is logged, and saved to the run collection when one is provided.
+        """
+        if engine == "async":
+            asyncio.run(
+                AnnotationService.process_tasks_async(
+                    annotation_queue,
+                    genomic_unit_collection,
+                    analysis_collection,
+                    response_cache=response_cache,
+                    version_cache=version_cache,
+                    run_collection=run_collection
+                )
+            )
+            return
+
         logger.info("%s Processing annotation tasks queue...", annotation_log_label())
 
-        processor = AnnotationProcess(annotation_queue, genomic_unit_collection, analysis_collection)
+        processor = AnnotationProcess(
+            annotation_queue, genomic_unit_collection, analysis_collection, response_cache, version_cache
+        )
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as task_executor:
-            processor.set_tasks_executor(task_executor)
+        executor_context = (
+            nullcontext(task_executor)
+            if task_executor is not None else concurrent.futures.ThreadPoolExecutor(max_workers=5)
+        )
+        with executor_context as executor:
+            processor.set_tasks_executor(executor)
+
+            while processor.has_pending_work():
+                if not processor.annotation_unit_queue_empty():
+                    processor.process_annotation_unit(processor.queue.get())
+                elif processor.has_forge_annotation_groups():
+                    processor.queue_forge_annotation_groups()
+                elif processor.are_tasks_processing():
+                    processor.wait_for_completed_task()
+                else:
+                    processor.release_deferred_annotation_units()
+
+                processor.process_completed_tasks()
+                processor.flush_annotations_if_due()
+                processor.record_progress()
+
+            processor.flush_annotations()
+            logger.info("%s Processing annotation tasks queue complete", annotation_log_label())
 
-            while not processor.annotation_unit_queue_empty() or processor.are_tasks_processing():
-                annotation_unit = processor.queue.get()
+        processor.log_dataset_failures()
+        processor.finish_run("threaded", run_collection)
+        logger.info("%s Annotation BackgroundTask thread ending", annotation_log_label())
+
+    @staticmethod
+    async def process_tasks_async(  # pylint: disable=too-many-arguments
+        annotation_queue: AnnotationQueue,
+        genomic_unit_collection: GenomicUnitCollection,
+        analysis_collection: AnalysisCollection,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        response_cache: AnnotationResponseCacheCollection = None,
+        version_cache: AnnotationVersionCache = None,
+        run_collection: AnnotationRunCollection = None
+    ):
+        """
+        Processes items that have been added to the queue as coroutines on the running event loop. Processing the
+        annotation units, handling the completed tasks, and writing the annotations query MongoDB, so they run within
+        a worker thread to not block the annotation tasks' requests on the event loop.
+        """
+        logger.info("%s Processing annotation tasks queue on event loop...", annotation_log_label())
 
-                processor.process_annotation_unit(annotation_unit)
-                for task_future in concurrent.futures.as_completed(processor.annotation_task_futures):
-                    processor.on_task_complete(task_future)
+        http_client_pool = AnnotationHttpClientPool(max_connections, max_connections_per_host)
+        processor = AsyncAnnotationProcess(
+            annotation_queue, genomic_unit_collection, analysis_collection, http_client_pool, response_cache,
+            version_cache
+        )
 
+        try:
+            while processor.has_pending_work():
+                if not processor.annotation_unit_queue_empty():
+                    await asyncio.to_thread(processor.process_annotation_unit, processor.queue.get())
+                elif processor.has_forge_annotation_groups():
+                    processor.queue_forge_annotation_groups()
+                elif processor.are_tasks_processing():
+                    await processor.await_completed_task()
+                else:
+                    processor.release_deferred_annotation_units()
+
+                await processor.process_completed_tasks_async()
+                await processor.flush_annotations_if_due_async()
+                processor.record_progress()
+
+            await asyncio.to_thread(processor.flush_annotations)
             logger.info("%s Processing annotation tasks queue complete", annotation_log_label())
+        finally:
+            await http_client_pool.aclose()
 
         processor.log_dataset_failures()
-        logger.info("%s Annotation BackgroundTask thread ending", annotation_log_label())
+        await asyncio.to_thread(processor.finish_run, "async", run_collection)
+        logger.info("%s Annotation event loop ending", annotation_log_label())
 
 
-class AnnotationProcess():
+class AnnotationProcess():  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """Processes the annotation queue for annotations"""
 
     def __init__(
-        self, annotation_queue: AnnotationQueue, genomic_unit_collection: GenomicUnitCollection,
-        analysis_collection: AnalysisCollection
+        self,
+        annotation_queue: AnnotationQueue,
+        genomic_unit_collection: GenomicUnitCollection,
+        analysis_collection: AnalysisCollection,
+        response_cache: AnnotationResponseCacheCollection = None,
+        version_cache: AnnotationVersionCache = None
     ):
         """
         Initializes the annotation process to take a queue of AnnotationUnits and run the tasks to annotate them.
+        Annotation tasks use the optional response cache to reuse responses from previous annotation runs, and the
+        optional version cache shares calculated versions with other annotation runs.
         """
         self.queue = annotation_queue
         self.genomic_unit_collection = genomic_unit_collection
         self.analysis_collection = analysis_collection
+        self.response_cache = response_cache
 
         self.annotation_task_futures = {}
-        self.version_cache = {}
+        self.completed_task_futures = queue.Queue()
+        self.deferred_annotation_units = {}
+        self.forge_annotation_groups = {}
+        self.annotation_writer = BufferedAnnotationWriter(genomic_unit_collection, analysis_collection)
+        self.manifest_snapshots = {}
+        self.version_cache = version_cache if version_cache is not None else AnnotationVersionCache()
+        self.calculating_versions = set()
+        self.failed_versions = set()
 
         self.task_executor = None
 
         self.dataset_annotation_failures = {}
 
+        self.run_started_at = datetime.now(timezone.utc)
+        self.run_metrics_before = annotation_metrics.snapshot()
+        self.peak_queue_depth = 0
+        self.peak_tasks_in_flight = 0
+
     def set_tasks_executor(self, task_executor):
         """Sets the task executor for handling the annotate tasks."""
         self.task_executor = task_executor
@@ -180,16 +334,130 @@ class AnnotationProcess():
         """"Returns True if there are annotation tasks processing, otherwise returns False."""
         return len(self.annotation_task_futures) > 0
 
+    def flush_annotations_if_due(self):
+        """Writes the buffered annotations when they are due to be written."""
+        self.annotation_writer.flush_if_due()
+
+    def flush_annotations(self):
+        """Writes every buffered annotation."""
+        self.annotation_writer.flush()
+
+    def record_progress(self):
+        """Sets the queue depth and in-flight tasks gauges, tracking their peaks during the annotation run."""
+        queue_depth = self.queue.qsize()
+        tasks_in_flight = len(self.annotation_task_futures)
+        annotation_metrics.set_gauge("rosalution_annotation_queue_depth", queue_depth)
+        annotation_metrics.set_gauge("rosalution_annotation_tasks_in_flight", tasks_in_flight)
+
+        self.peak_queue_depth = max(self.peak_queue_depth, queue_depth)
+        self.peak_tasks_in_flight = max(self.peak_tasks_in_flight, tasks_in_flight)
+
+    def run_summary(self, engine: str) -> dict:
+        """Returns the summary of the annotation run's metrics since the annotation process started."""
+        finished_at = datetime.now(timezone.utc)
+        return {
+            "engine": engine,
+            "started_at": self.run_started_at,
+            "finished_at": finished_at,
+            "duration_seconds": (finished_at - self.run_started_at).total_seconds(),
+            "peak_queue_depth": self.peak_queue_depth,
+            "peak_tasks_in_flight": self.peak_tasks_in_flight,
+            **annotation_metrics.run_summary(self.run_metrics_before),
+        }
+
+    def finish_run(self, engine: str, run_collection: AnnotationRunCollection = None):
+        """Logs the annotation run's summary and saves it to the run collection when one is provided."""
+        self.record_progress()
+        summary = self.run_summary(engine)
+        logger.info("%s Annotation Run Summary %s", annotation_log_label(), json.dumps(summary, default=str))
+
+        if run_collection is not None:
+            run_collection.save_run(summary)
+
+    def has_forge_annotation_groups(self) -> bool:
+        """Returns True if there are annotation units waiting to be forged together from their cached dataset."""
+        return len(self.forge_annotation_groups) > 0
+
+    def has_pending_work(self) -> bool:
+        """
+        Returns True while annotation units are queued, deferred, or waiting to be forged together, or annotation
+        tasks are still processing.
+        """
+        return not self.annotation_unit_queue_empty() or self.are_tasks_processing() or len(
+            self.deferred_annotation_units
+        ) > 0 or self.has_forge_annotation_groups()
+
     def queue_task_in_tasks_worker(self, task):
-        """Submits an Annotation task to run within the task executor pool."""
-        self.annotation_task_futures[self.task_executor.submit(task.annotate)] = task
+        """
+        Submits an Annotation task to run within the task executor pool. The future reports its own completion
+        to the completed tasks queue so that the process does not wait on every other in-flight task.
+        """
+        task_future = self.task_executor.submit(task.annotate)
+        self.annotation_task_futures[task_future] = task
+        task_future.add_done_callback(self.completed_task_futures.put)
+
+    def wait_for_completed_task(self):
+        """
+        Blocks until an annotation task completes, then handles the completed task. Stops waiting once the buffered
+        annotations are due to be written so that they are not held while the in-flight tasks are processing.
+        """
+        try:
+            task_future = self.completed_task_futures.get(timeout=self.annotation_writer.seconds_until_flush())
+        except queue.Empty:
+            return
+
+        self.on_task_complete(task_future)
+
+    def process_completed_tasks(self):
+        """Handles every annotation task that has completed without blocking on the tasks still processing."""
+        while True:
+            try:
+                task_future = self.completed_task_futures.get_nowait()
+            except queue.Empty:
+                return
+
+            self.on_task_complete(task_future)
+
+    def defer_annotation_unit(self, annotation_unit: AnnotationUnit, version_cache_id: str):
+        """
+        Holds an annotation unit that is waiting on its version to be calculated until the version task with the
+        version cache id completes, rather than spinning it through the queue while that task is processing.
+        """
+        self.deferred_annotation_units.setdefault(version_cache_id, []).append(annotation_unit)
+
+    def release_deferred_annotation_units(self, version_cache_id: str = None):
+        """
+        Puts the annotation units deferred on the version cache id's version task back onto the queue to be processed
+        again. Every deferred annotation unit is released when no version cache id is provided.
+        """
+        if version_cache_id is None:
+            deferred_annotation_units = [
+                annotation_unit for annotation_units in self.deferred_annotation_units.values()
+                for annotation_unit in annotation_units
+            ]
+            self.deferred_annotation_units = {}
+        else:
+            deferred_annotation_units = self.deferred_annotation_units.pop(version_cache_id, [])
+
+        for annotation_unit in deferred_annotation_units:
+            annotation_metrics.increment("rosalution_annotation_requeued_total", reason="deferred")
+            self.queue.put(annotation_unit)
 
     def process_annotation_unit(self, annotation_unit: AnnotationUnit):
         """
         Processes an individual annotation unit by handling versions and its dependencies needed before an
         annotation task can be created. If the annotation unit is ready to annotate, it will be submitted to run
-        on the task execeutor thread pool.
+        on the task execeutor thread pool. An annotation unit whose dependencies have not finished waits within its
+        genomic unit's annotation graph until they do.
         """
+        annotation_graph = annotation_unit.annotation_graph
+        if annotation_graph is not None:
+            if annotation_graph.is_cancelled(annotation_unit):
+                return
+
+            if not annotation_graph.is_runnable(annotation_unit):
+                annotation_graph.wait_for_parents(annotation_unit)
+                return
 
         possible_manifest_entry = self.retrieve_manifest_entry_if_exist(annotation_unit)
         if possible_manifest_entry is not None and not annotation_unit.version_calculated():
@@ -197,45 +465,95 @@ class AnnotationProcess():
                 annotation_unit.genomic_unit, possible_manifest_entry, annotation_unit.analysis_name,
                 annotation_unit.is_transcript_dataset()
             )
-            if not self.genomic_unit_collection.annotation_exist(manifest_annotation_unit):
-                logger.error(
-                    '%s Manifest Annotation Does Not Exist...', format_annotation_logging(manifest_annotation_unit)
-                )
-                logger.error(
-                    '%s Remove Manifest Entry Manually...', format_annotation_logging(manifest_annotation_unit)
-                )
+            if not self.annotation_exist(manifest_annotation_unit, annotation_unit.annotation_index):
+                annotation_event_logger.error(manifest_annotation_unit, 'Manifest Annotation Does Not Exist...')
+                annotation_event_logger.error(manifest_annotation_unit, 'Remove Manifest Entry Manually...')
             else:
-                logger.info('%s Manifest Annotation Exists...', format_annotation_logging(manifest_annotation_unit))
+                annotation_event_logger.info(manifest_annotation_unit, 'Manifest Annotation Exists...')
+                annotation_metrics.increment("rosalution_annotation_units_total", outcome="exists")
+                self.finish_existing_annotation_unit(annotation_unit, manifest_annotation_unit)
                 return
 
         if not annotation_unit.version_calculated():
             self.handle_annotation_unit_version_calcuation(annotation_unit)
             return
 
-        if self.genomic_unit_collection.annotation_exist(annotation_unit):
-            logger.info('%s Annotation Exists...', format_annotation_logging(annotation_unit))
-            self.analysis_collection.add_dataset_to_manifest(annotation_unit.analysis_name, annotation_unit)
+        if self.annotation_exist(annotation_unit, annotation_unit.annotation_index):
+            annotation_event_logger.info(annotation_unit, 'Annotation Exists...')
+            annotation_metrics.increment("rosalution_annotation_units_total", outcome="exists")
+            self.add_to_manifest(annotation_unit)
+            self.finish_existing_annotation_unit(annotation_unit, annotation_unit)
             return
 
-        if annotation_unit.has_dependencies():
+        if annotation_graph is None and annotation_unit.has_dependencies():
             self.handle_annotation_unit_dependencies(annotation_unit)
 
         if not annotation_unit.conditions_met_to_gather_annotation():
-            if annotation_unit.should_continue_annotation():
-                self.queue.put(annotation_unit)
-                time.sleep(0)
-            else:
-                logger.info(
-                    '%s Canceling Annotation, Missing %s Dependencies...', format_annotation_logging(annotation_unit),
-                    annotation_unit.get_missing_conditions()
-                )
+            annotation_event_logger.info(
+                annotation_unit, 'Canceling Annotation, Missing %s Dependencies...',
+                annotation_unit.get_missing_conditions()
+            )
+            annotation_metrics.increment("rosalution_annotation_units_total", outcome="cancelled")
+            self.cancel_annotation_unit(annotation_unit)
+            return
+
+        self.queue_annotation_task(annotation_unit)
+
+    def annotation_exist(self, annotation_unit: AnnotationUnit, annotation_index: AnnotationIndex = None) -> bool:
+        """
+        Returns True if the annotation unit's annotation exists. The annotation index of the genomic units queued
+        with the annotation unit is used when it has one, loading the index the first time it is used, otherwise the
+        annotation is queried for.
+        """
+        if annotation_index is None:
+            return self.genomic_unit_collection.annotation_exist(annotation_unit)
+
+        if not annotation_index.is_loaded():
+            logger.info(
+                '%s Loading Existing Annotations For %s Genomic Units...', annotation_log_label(),
+                len(annotation_index.genomic_units)
+            )
+            annotation_index.load(self.genomic_unit_collection)
+
+        return annotation_index.annotation_exist(annotation_unit)
+
+    def queue_annotation_task(self, annotation_unit: AnnotationUnit):
+        """
+        Submits the annotation task for an annotation unit that is ready to annotate. An annotation unit forged from
+        a cached dataset is grouped with the others forged from the same cached dataset to be annotated together.
+        """
+        if annotation_unit.get_cached_dependency() is not None:
+            self.group_forge_annotation_unit(annotation_unit)
             return
 
         annotation_task = AnnotationTaskFactory.create_annotation_task(annotation_unit)
-        logger.info('%s Creating Task To Annotate...', format_annotation_logging(annotation_unit))
+        annotation_task.set_response_cache(self.response_cache)
+        annotation_event_logger.info(annotation_unit, 'Creating Task To Annotate...')
 
         self.queue_task_in_tasks_worker(annotation_task)
 
+    def group_forge_annotation_unit(self, annotation_unit: AnnotationUnit):
+        """
+        Holds an annotation unit forged from a cached dataset with the other annotation units of its genomic unit
+        forged from the same cached dataset, so that they are extracted together in one annotation task.
+        """
+        group_key = (
+            annotation_unit.analysis_name, annotation_unit.get_genomic_unit_type(), annotation_unit.get_genomic_unit(),
+            annotation_unit.get_cached_dependency()
+        )
+        self.forge_annotation_groups.setdefault(group_key, []).append(annotation_unit)
+
+    def queue_forge_annotation_groups(self):
+        """Submits an annotation task for each group of annotation units forged from the same cached dataset."""
+        forge_annotation_groups = self.forge_annotation_groups
+        self.forge_annotation_groups = {}
+        for annotation_units in forge_annotation_groups.values():
+            annotation_event_logger.info(
+                annotation_units[0], 'Creating Task To Annotate %s Datasets From %s...', len(annotation_units),
+                annotation_units[0].get_cached_dependency()
+            )
+            self.queue_task_in_tasks_worker(ForgeAnnotationGroupTask(annotation_units))
+
     def on_task_complete(self, future):
         """
         Runs on a completed future that contains the annotation unit that was executed. Will extract the
@@ -243,43 +561,148 @@ class AnnotationProcess():
         """
         task = self.annotation_task_futures[future]
         annotation_unit = task.annotation_unit
-        logger.info('%s Task Executed...', format_annotation_logging(annotation_unit))
+        annotation_event_logger.info(annotation_unit, 'Task Executed...')
 
         try:
             task_process_result = future.result()
 
             if isinstance(task, VersionAnnotationTask):
                 version_cache_id = task.get_version_cache_id()
-                version = task.extract_version(task_process_result)
+                with self.extraction_timer(annotation_unit):
+                    version = task.extract_version(task_process_result)
 
                 self.set_version_in_cache(version_cache_id, version)
                 annotation_unit.set_latest_version(version)
 
-                logger.info('%s Version Calculated %s...', format_annotation_logging(annotation_unit), version)
+                annotation_event_logger.info(annotation_unit, 'Version Calculated %s...', version)
+                annotation_metrics.increment("rosalution_annotation_requeued_total", reason="version_calculated")
                 self.queue.put(annotation_unit)
+            elif isinstance(task, ForgeAnnotationGroupTask):
+                with self.extraction_timer(annotation_unit):
+                    extracted_group = task.extract_group(task_process_result)
+
+                for grouped_annotation_unit, annotations in extracted_group:
+                    if isinstance(annotations, RuntimeError):
+                        annotation_event_logger.error(
+                            grouped_annotation_unit, 'Exception [%s] with [%s]', annotations, task
+                        )
+                        self.fail_annotation_unit(grouped_annotation_unit, annotations)
+                        continue
+
+                    self.save_annotations(grouped_annotation_unit, annotations)
             else:
-                for annotation in task.extract(task_process_result):
-                    logger.info('%s Saving %s...', format_annotation_logging(annotation_unit), annotation['value'])
+                with self.extraction_timer(annotation_unit):
+                    annotations = task.extract(task_process_result)
 
-                    self.genomic_unit_collection.annotate_genomic_unit(annotation_unit.genomic_unit, annotation)
-                    self.analysis_collection.add_dataset_to_manifest(annotation_unit.analysis_name, annotation_unit)
-                logger.info('%s Complete...', format_annotation_logging(annotation_unit))
+                self.save_annotations(annotation_unit, annotations)
 
         except FileNotFoundError as error:
-            logger.error('%s Exception [%s] Not Found [%s]', format_annotation_logging(annotation_unit), error, task)
+            annotation_event_logger.error(annotation_unit, 'Exception [%s] Not Found [%s]', error, task)
             logger.exception(error)
-            self.track_dataset_exception(annotation_unit, error)
-        except (JSONDecodeError, TypeError, ValueError, HTTPError) as exception_error:
-            logger.error('%s Exception [%s]', format_annotation_logging(annotation_unit), exception_error)
+            self.fail_task(task, error)
+        except (
+            JSONDecodeError, TypeError, ValueError, HTTPError, RequestException, httpx.HTTPError
+        ) as exception_error:
+            annotation_event_logger.error(annotation_unit, 'Exception [%s]', exception_error)
             logger.exception(exception_error)
-            self.track_dataset_exception(annotation_unit, exception_error)
+            self.fail_task(task, exception_error)
         except RuntimeError as runtime_error:
-            logger.error('%s Exception [%s] with [%s]', format_annotation_logging(annotation_unit), runtime_error, task)
+            annotation_event_logger.error(annotation_unit, 'Exception [%s] with [%s]', runtime_error, task)
             logger.exception(runtime_error)
-            self.track_dataset_exception(annotation_unit, runtime_error)
+            self.fail_task(task, runtime_error)
 
         del self.annotation_task_futures[future]
 
+        if isinstance(task, VersionAnnotationTask):
+            self.calculating_versions.discard(task.get_version_cache_id())
+            self.release_deferred_annotation_units(task.get_version_cache_id())
+
+    @staticmethod
+    def extraction_timer(annotation_unit: AnnotationUnit):
+        """Returns the context that times extracting the annotation unit's task result by its data source."""
+        return annotation_metrics.timer(
+            "rosalution_annotation_extraction_seconds", data_source=annotation_unit.get_dataset_source()
+        )
+
+    def save_annotations(self, annotation_unit: AnnotationUnit, annotations: list):
+        """Buffers the annotations extracted for the annotation unit to be written and finishes the annotation unit."""
+        for annotation in annotations:
+            annotation_event_logger.saving(annotation_unit, annotation['value'])
+
+        self.annotation_writer.write(annotation_unit, annotations)
+        if len(annotations) > 0:
+            self.get_manifest_snapshot(annotation_unit.analysis_name).add(annotation_unit)
+        annotation_event_logger.info(annotation_unit, 'Complete...')
+        annotation_metrics.increment(
+            "rosalution_annotation_units_total", outcome="annotated" if len(annotations) > 0 else "no_annotation"
+        )
+        self.finish_annotation_unit(annotation_unit, annotations)
+
+    def fail_task(self, task, exception: Exception):
+        """
+        Fails every annotation unit annotated by the annotation task that raised the exception. A failed version task's
+        version is not calculated again during the annotation run.
+        """
+        if isinstance(task, VersionAnnotationTask):
+            self.failed_versions.add(task.get_version_cache_id())
+
+        for annotation_unit in task.get_annotation_units():
+            self.fail_annotation_unit(annotation_unit, exception)
+
+    def fail_annotation_unit(self, annotation_unit: AnnotationUnit, exception: Exception):
+        """Tracks the exception that failed the annotation unit and cancels the annotation units depending on it."""
+        self.track_dataset_exception(annotation_unit, exception)
+        annotation_metrics.increment("rosalution_annotation_units_total", outcome="failed")
+        self.cancel_annotation_unit(annotation_unit)
+
+    def finish_annotation_unit(self, annotation_unit: AnnotationUnit, annotations: list):
+        """
+        Finishes an annotated annotation unit within its genomic unit's annotation graph, providing its annotation
+        value to the annotation units that depend on it and queueing the ones that are now runnable.
+        """
+        if annotation_unit.annotation_graph is None:
+            return
+
+        value = annotations[0]['value'] if len(annotations) > 0 else None
+        self.queue_released_annotation_units(
+            annotation_unit.annotation_graph.complete(annotation_unit, value, annotated=len(annotations) > 0)
+        )
+
+    def finish_existing_annotation_unit(
+        self, annotation_unit: AnnotationUnit, existing_annotation_unit: AnnotationUnit
+    ):
+        """
+        Finishes an annotation unit whose annotation already exists within its genomic unit's annotation graph. The
+        existing annotation's value is only queried when an annotation unit depending on it uses the value.
+        """
+        annotation_graph = annotation_unit.annotation_graph
+        if annotation_graph is None:
+            return
+
+        value = None
+        if annotation_graph.needs_value(annotation_unit):
+            value = self.genomic_unit_collection.find_genomic_unit_annotation_value(existing_annotation_unit)
+
+        self.queue_released_annotation_units(annotation_graph.complete(annotation_unit, value))
+
+    def cancel_annotation_unit(self, annotation_unit: AnnotationUnit):
+        """Cancels the annotation units that depend on an annotation unit that could not be annotated"""
+        if annotation_unit.annotation_graph is None:
+            return
+
+        for cancelled_annotation_unit in annotation_unit.annotation_graph.fail(annotation_unit):
+            annotation_event_logger.info(
+                cancelled_annotation_unit, 'Canceling Annotation, Dependency %s Not Annotated...',
+                annotation_unit.get_dataset_name()
+            )
+            annotation_metrics.increment("rosalution_annotation_units_total", outcome="cancelled")
+
+    def queue_released_annotation_units(self, released_annotation_units: list):
+        """Queues the annotation units whose dependencies have all finished"""
+        for released_annotation_unit in released_annotation_units:
+            annotation_metrics.increment("rosalution_annotation_requeued_total", reason="dependencies_finished")
+            self.queue.put(released_annotation_unit)
+
     def track_dataset_exception(self, annotation_unit: AnnotationUnit, exception: Exception):
         """
         Helper method that consolidates the caught exceptions for each AnnotationUnit being annotated.
@@ -288,6 +711,11 @@ class AnnotationProcess():
             self.dataset_annotation_failures[annotation_unit] = []
 
         self.dataset_annotation_failures[annotation_unit].append(exception)
+        annotation_metrics.increment(
+            "rosalution_annotation_failures_total",
+            type=type(exception).__name__,
+            data_source=annotation_unit.get_dataset_source()
+        )
 
     def log_dataset_failures(self):
         """
@@ -297,56 +725,96 @@ class AnnotationProcess():
             logger.error("%s Failed %s annotations", annotation_log_label(), len(self.dataset_annotation_failures))
 
         for (annotation_unit, exception) in self.dataset_annotation_failures.items():
-            logger.error('%sException [%s]', format_annotation_logging(annotation_unit), exception)
+            annotation_event_logger.error(annotation_unit, 'Exception [%s]', exception)
 
     def is_version_cache_setup(self, version_cache_id: str) -> bool:
-        """Returns True if the Version with its version_cache_id is setup within the cache"""
-        return version_cache_id in self.version_cache
+        """Returns True if the Version with its version_cache_id is being calculated by this annotation process"""
+        return version_cache_id in self.calculating_versions
 
     def setup_version_cache(self, version_cache_id: str):
-        """Setups up the version cache for the version cache id. """
-        self.version_cache[version_cache_id] = ""
+        """Marks the version cache id as being calculated by this annotation process"""
+        self.calculating_versions.add(version_cache_id)
 
-    def is_version_cached(self, version_cache_id: str) -> bool:
-        """ Returns True if the version cache id has a version cached, otherwise returns False."""
-        return self.version_cache[version_cache_id] != ""
+    def get_cached_version(self, version_cache_id: str):
+        """
+        Returns the version cached for the version cache id, otherwise returns VERSION_NOT_CACHED. A version attribute
+        that extracts nothing caches a None version, which is reused like any other version.
+        """
+        return self.version_cache.get_version(version_cache_id, VERSION_NOT_CACHED)
 
     def set_version_in_cache(self, version_cache_id: str, version):
         """Sets the version to be cached in the version cache"""
-        self.version_cache[version_cache_id] = version
+        self.version_cache.set_version(version_cache_id, version)
+
+    def get_manifest_snapshot(self, analysis_name: str) -> AnalysisManifestSnapshot:
+        """Returns the analysis' manifest snapshot, loading the analysis' manifest the first time it is used"""
+        if analysis_name not in self.manifest_snapshots:
+            self.manifest_snapshots[analysis_name] = AnalysisManifestSnapshot(
+                self.analysis_collection.get_dataset_manifest(analysis_name)
+            )
+
+        return self.manifest_snapshots[analysis_name]
+
+    def get_manifest_dataset_config(self, analysis_name: str, unit: str, dataset_name: str):
+        """Returns the genomic unit's dataset entry from the analysis' manifest snapshot, otherwise returns None"""
+        return self.get_manifest_snapshot(analysis_name).get_dataset_config(unit, dataset_name)
+
+    def add_to_manifest(self, annotation_unit: AnnotationUnit):
+        """Adds the annotation unit whose annotation already exists to its analysis' manifest and snapshot"""
+        self.get_manifest_snapshot(annotation_unit.analysis_name).add(annotation_unit)
+        self.annotation_writer.add_to_manifest(annotation_unit)
 
     def retrieve_manifest_entry_if_exist(self, annotation_unit: AnnotationUnit):
-        """Queries the collection for an annotation unit's manifest entry. If none exists None is returned."""
-        return self.analysis_collection.get_manifest_dataset_config(
+        """Returns the annotation unit's manifest entry from the manifest snapshot. If none exists None is returned."""
+        return self.get_manifest_dataset_config(
             annotation_unit.analysis_name, annotation_unit.get_genomic_unit(), annotation_unit.get_dataset_name()
         )
 
     def handle_annotation_unit_version_calcuation(self, annotation_unit):
         """
         Processes the annotation unit to derive the annotation unit's calculated version according to the configuration.
-        If the version of that annotation source exists in the version cache.  
+        If the version of that annotation source exists in the version cache, the cached version is used instead. The
+        annotation unit is cancelled when calculating its version already failed during the annotation run.
         """
         version_task = AnnotationTaskFactory.create_version_task(annotation_unit)
         version_cache_id = version_task.get_version_cache_id()
 
+        cached_version = self.get_cached_version(version_cache_id)
+        if cached_version is not VERSION_NOT_CACHED:
+            annotation_unit.set_latest_version(cached_version)
+            annotation_event_logger.info(annotation_unit, 'Version From Cache %s...', cached_version)
+            annotation_metrics.increment("rosalution_annotation_cache_requests_total", cache="version", result="hit")
+            annotation_metrics.increment("rosalution_annotation_requeued_total", reason="version_cached")
+            self.queue.put(annotation_unit)
+            return
+
+        if version_cache_id in self.failed_versions:
+            annotation_event_logger.error(annotation_unit, 'Canceling Annotation, Version Failed To Calculate...')
+            annotation_metrics.increment("rosalution_annotation_units_total", outcome="cancelled")
+            self.cancel_annotation_unit(annotation_unit)
+            return
+
         if not self.is_version_cache_setup(version_cache_id):
-            logger.info('%s Creating Calculate Version Task...', format_annotation_logging(annotation_unit))
+            annotation_event_logger.info(annotation_unit, 'Creating Calculate Version Task...')
+            annotation_metrics.increment("rosalution_annotation_cache_requests_total", cache="version", result="miss")
             self.setup_version_cache(version_cache_id)
             self.queue_task_in_tasks_worker(version_task)
             return
 
-        if self.is_version_cached(version_cache_id):
-            cached_version = self.version_cache[version_cache_id]
-            annotation_unit.set_latest_version(cached_version)
-            logger.info('%s Version From Cache %s...', format_annotation_logging(annotation_unit), cached_version)
-        self.queue.put(annotation_unit)
+        if not self.are_tasks_processing():
+            annotation_event_logger.error(annotation_unit, 'Canceling Annotation, Version Not Calculated...')
+            annotation_metrics.increment("rosalution_annotation_units_total", outcome="cancelled")
+            self.cancel_annotation_unit(annotation_unit)
+            return
+
+        self.defer_annotation_unit(annotation_unit, version_cache_id)
 
     def handle_annotation_unit_dependencies(self, annotation_unit: AnnotationUnit):
         """Retrieves the an annotation unit's dependencies if they exist."""
 
         missing_dependencies = annotation_unit.get_missing_dependencies()
         for missing_dataset_name in missing_dependencies:
-            analysis_manifest_dataset = self.analysis_collection.get_manifest_dataset_config(
+            analysis_manifest_dataset = self.get_manifest_dataset_config(
                 annotation_unit.analysis_name, annotation_unit.get_genomic_unit(), missing_dataset_name
             )
 
@@ -365,7 +833,7 @@ class AnnotationProcess():
                 annotation_unit.set_annotation_for_dependency(missing_dataset_name, annotation_value)
 
         if annotation_unit.if_transcript_needs_provisioning():
-            transcript_id_manifest_dataset = self.analysis_collection.get_manifest_dataset_config(
+            transcript_id_manifest_dataset = self.get_manifest_dataset_config(
                 annotation_unit.analysis_name, annotation_unit.get_genomic_unit(), "transcript_id"
             )
 
@@ -393,3 +861,66 @@ class AnnotationProcess():
             temporary.dataset['transcript'] = True
 
         return temporary
+
+
+class AsyncAnnotationProcess(AnnotationProcess):
+    """
+    Processes the annotation queue for annotations by running the annotation tasks as coroutines on an event loop
+    that share a pooled keep-alive HTTP client. The annotation units are processed and the completed tasks handled
+    within worker threads, one at a time, so their MongoDB queries do not block the event loop.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        annotation_queue: AnnotationQueue,
+        genomic_unit_collection: GenomicUnitCollection,
+        analysis_collection: AnalysisCollection,
+        http_client_pool: AnnotationHttpClientPool,
+        response_cache: AnnotationResponseCacheCollection = None,
+        version_cache: AnnotationVersionCache = None
+    ):
+        """Initializes the annotation process within the running event loop with the shared HTTP client pool."""
+        super().__init__(annotation_queue, genomic_unit_collection, analysis_collection, response_cache, version_cache)
+        self.http_client_pool = http_client_pool
+        self.event_loop = asyncio.get_running_loop()
+        self.completed_task_futures = asyncio.Queue()
+
+    def queue_task_in_tasks_worker(self, task):
+        """
+        Schedules an Annotation task as a coroutine on the event loop. Tasks are queued from the worker thread
+        processing the annotation units, so the task is scheduled, and reports its completion, thread-safely.
+        """
+        task_future = asyncio.run_coroutine_threadsafe(task.annotate_async(self.http_client_pool), self.event_loop)
+        self.annotation_task_futures[task_future] = task
+        task_future.add_done_callback(
+            lambda completed: self.event_loop.call_soon_threadsafe(self.completed_task_futures.put_nowait, completed)
+        )
+
+    async def await_completed_task(self):
+        """
+        Waits until an annotation task completes, then handles the completed task. Stops waiting once the buffered
+        annotations are due to be written so that they are not held while the in-flight tasks are processing.
+        """
+        try:
+            task_future = await asyncio.wait_for(
+                self.completed_task_futures.get(), timeout=self.annotation_writer.seconds_until_flush()
+            )
+        except asyncio.TimeoutError:
+            return
+
+        await asyncio.to_thread(self.on_task_complete, task_future)
+
+    async def process_completed_tasks_async(self):
+        """Handles every annotation task that has completed without waiting on the tasks still processing."""
+        while True:
+            try:
+                task_future = self.completed_task_futures.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            await asyncio.to_thread(self.on_task_complete, task_future)
+
+    async def flush_annotations_if_due_async(self):
+        """Writes the buffered annotations within a worker thread when they are due to be written."""
+        if self.annotation_writer.is_flush_due():
+            await asyncio.to_thread(self.flush_annotations)
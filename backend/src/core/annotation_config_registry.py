@@ -0,0 +1,76 @@
+"""Indexes the annotation configuration loaded from the 'annotations_config' collection for annotation queueing"""
+import logging
+
+from ..enums import GenomicUnitType
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("data_set", "data_source", "genomic_unit_type", "annotation_source_type", "versioning_type")
+
+SOURCE_TYPE_REQUIRED_FIELDS = {
+    "http": ("url", "attribute"),
+    "csv": ("attribute",),
+    "none": (),
+    "forge": ("base_string", "attribute"),
+    "subprocess": ("subprocess", "delimiter", "fieldnames", "attribute"),
+}
+
+VERSIONING_TYPE_REQUIRED_FIELDS = {
+    "rest": ("version_url", "version_attribute"),
+    "rosalution": (),
+    "date": (),
+}
+
+
+def dataset_schema_errors(dataset: dict) -> list:
+    """
+    Returns the reasons a dataset's configuration cannot be annotated, such as a missing field its annotation source
+    type or versioning type requires. A dataset with a valid configuration returns an empty list.
+    """
+    errors = [f"missing '{field}'" for field in REQUIRED_FIELDS if field not in dataset]
+    if errors:
+        return errors
+
+    if dataset['genomic_unit_type'] not in {genomic_unit_type.value for genomic_unit_type in GenomicUnitType}:
+        errors.append(f"unknown genomic unit type '{dataset['genomic_unit_type']}'")
+
+    for field_name, required_fields in [("annotation_source_type", SOURCE_TYPE_REQUIRED_FIELDS),
+                                        ("versioning_type", VERSIONING_TYPE_REQUIRED_FIELDS)]:
+        if dataset[field_name] not in required_fields:
+            errors.append(f"unknown {field_name.replace('_', ' ')} '{dataset[field_name]}'")
+            continue
+
+        errors.extend(f"missing '{field}'" for field in required_fields[dataset[field_name]] if field not in dataset)
+
+    if not isinstance(dataset.get('dependencies', []), list):
+        errors.append("'dependencies' is not a list")
+
+    return errors
+
+
+class AnnotationConfigRegistry:  # pylint: disable=too-few-public-methods
+    """
+    The annotation configuration at one version stamp of the collection, validated once and indexed by genomic unit
+    type. Datasets with an invalid configuration are logged and left out, so the datasets depending on them are
+    reported as unschedulable when queueing rather than failing while annotating.
+    """
+
+    def __init__(self, datasets: list, version_stamp=None):
+        """Validates and indexes the datasets' configurations"""
+        self.version_stamp = version_stamp
+        self.datasets_by_type = {}
+        self.invalid_datasets = {}
+
+        for dataset in datasets:
+            errors = dataset_schema_errors(dataset)
+            if errors:
+                dataset_name = dataset.get('data_set', '<unnamed>')
+                self.invalid_datasets[dataset_name] = errors
+                logger.error("Invalid annotation configuration for '%s': %s", dataset_name, ", ".join(errors))
+                continue
+
+            self.datasets_by_type.setdefault(dataset['genomic_unit_type'], []).append(dataset)
+
+    def datasets_for_type(self, genomic_unit_type) -> list:
+        """Returns the configurations of the datasets that annotate the genomic unit type"""
+        return self.datasets_by_type.get(genomic_unit_type, [])
@@ -0,0 +1,187 @@
+"""
+Schedules annotation units according to the dependencies between the datasets configured to annotate a genomic unit
+"""
+from collections import deque
+import logging
+
+from .annotation_unit import AnnotationUnit
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_ID_DATASET = "transcript_id"
+
+
+class AnnotationDependencyGraph:
+    """
+    The directed acyclic graph of the datasets configured to annotate a genomic unit type. A dataset's parents are
+    the datasets named within its 'dependencies', and transcript datasets have the 'transcript_id' dataset as an
+    implicit parent. A dependency that is not a dataset is an attribute of the genomic unit itself, such as
+    'transcript' or 'protein' for an HGVS variant.
+    """
+
+    def __init__(self, genomic_unit_type: str, datasets: list):
+        """Compiles the graph of the datasets and reports any dependency cycles"""
+        self.genomic_unit_type = genomic_unit_type
+        self.datasets = {dataset['data_set']: dataset for dataset in datasets}
+
+        self.parents = {name: self.find_parents(dataset) for name, dataset in self.datasets.items()}
+        self.children = {name: [] for name in self.datasets}
+        for name, parents in self.parents.items():
+            for parent in parents:
+                self.children[parent].append(name)
+
+        self.cyclic_datasets = self.find_cyclic_datasets()
+        if self.cyclic_datasets:
+            logger.error(
+                "Dataset dependency cycle for '%s' genomic units, unable to annotate %s", genomic_unit_type,
+                sorted(self.cyclic_datasets)
+            )
+
+    def find_parents(self, dataset) -> list:
+        """Returns the names of the datasets the dataset depends on"""
+        parents = [dependency for dependency in dataset.get('dependencies', []) if dependency in self.datasets]
+
+        is_transcript_dataset = 'transcript' in dataset and dataset['data_set'] != TRANSCRIPT_ID_DATASET
+        if is_transcript_dataset and TRANSCRIPT_ID_DATASET in self.datasets and TRANSCRIPT_ID_DATASET not in parents:
+            parents.append(TRANSCRIPT_ID_DATASET)
+
+        return parents
+
+    def attribute_dependencies(self, dataset_name: str) -> list:
+        """Returns the dependencies of the dataset that are attributes of the genomic unit rather than datasets"""
+        dependencies = self.datasets[dataset_name].get('dependencies', [])
+        return [dependency for dependency in dependencies if dependency not in self.datasets]
+
+    def find_cyclic_datasets(self) -> set:
+        """
+        Returns the datasets that are within a dependency cycle, or depend on one, by topologically sorting the graph
+        and returning the datasets that could not be sorted.
+        """
+        unfinished_parent_counts = {name: len(parents) for name, parents in self.parents.items()}
+        ready = deque(name for name, count in unfinished_parent_counts.items() if count == 0)
+
+        sorted_datasets = set()
+        while ready:
+            name = ready.popleft()
+            sorted_datasets.add(name)
+            for child in self.children[name]:
+                unfinished_parent_counts[child] -= 1
+                if unfinished_parent_counts[child] == 0:
+                    ready.append(child)
+
+        return set(self.datasets) - sorted_datasets
+
+    def descendants(self, dataset_names) -> set:
+        """Returns every dataset that directly or transitively depends on any of the datasets"""
+        found = set()
+        to_visit = deque(dataset_names)
+        while to_visit:
+            for child in self.children[to_visit.popleft()]:
+                if child not in found:
+                    found.add(child)
+                    to_visit.append(child)
+
+        return found
+
+    def unschedulable_datasets(self, genomic_unit) -> dict:
+        """
+        Returns the datasets that cannot be annotated for the genomic unit, with the reason why, because they are
+        within a dependency cycle, the genomic unit is missing an attribute they depend on, or they depend on a
+        dataset that cannot be annotated.
+        """
+        unschedulable = {name: "dependency cycle" for name in self.cyclic_datasets}
+
+        for name in self.datasets:
+            missing_attributes = [
+                attribute for attribute in self.attribute_dependencies(name) if attribute not in genomic_unit
+            ]
+            if missing_attributes and name not in unschedulable:
+                unschedulable[name] = f"missing {missing_attributes}"
+
+        for name in self.descendants(list(unschedulable)):
+            unschedulable.setdefault(name, "depends on a dataset that cannot be annotated")
+
+        return unschedulable
+
+
+class GenomicUnitAnnotationGraph:
+    """
+    Tracks the annotation units of a genomic unit within an analysis through its dataset dependency graph while
+    they are annotated. An annotation unit is runnable once every one of its parents has finished, and the annotation
+    units waiting on their parents are released as soon as their last parent finishes.
+    """
+
+    def __init__(self, dependency_graph: AnnotationDependencyGraph, annotation_units: list):
+        """Initializes every annotation unit of the genomic unit as not yet finished"""
+        self.dependency_graph = dependency_graph
+        self.annotation_units = {
+            annotation_unit.get_dataset_name(): annotation_unit for annotation_unit in annotation_units
+        }
+        self.unfinished_parents = {
+            name: set(dependency_graph.parents[name]) & set(self.annotation_units) for name in self.annotation_units
+        }
+        self.waiting = {}
+        self.cancelled = set()
+
+        for annotation_unit in annotation_units:
+            annotation_unit.annotation_graph = self
+
+    def is_runnable(self, annotation_unit: AnnotationUnit) -> bool:
+        """Returns True when every parent of the annotation unit has finished"""
+        return len(self.unfinished_parents[annotation_unit.get_dataset_name()]) == 0
+
+    def is_cancelled(self, annotation_unit: AnnotationUnit) -> bool:
+        """Returns True when the annotation unit was cancelled because one of its ancestors failed"""
+        return annotation_unit.get_dataset_name() in self.cancelled
+
+    def wait_for_parents(self, annotation_unit: AnnotationUnit):
+        """Holds the annotation unit until its last parent finishes"""
+        self.waiting[annotation_unit.get_dataset_name()] = annotation_unit
+
+    def needs_value(self, annotation_unit: AnnotationUnit) -> bool:
+        """Returns True when a dataset depending on the annotation unit's dataset uses its annotation value"""
+        dataset_name = annotation_unit.get_dataset_name()
+        return any(
+            dataset_name in self.dependency_graph.datasets[child].get('dependencies', [])
+            for child in self.dependency_graph.children[dataset_name]
+            if child in self.annotation_units
+        )
+
+    def complete(self, annotation_unit: AnnotationUnit, value=None, annotated: bool = True) -> list:
+        """
+        Finishes the annotation unit by providing its annotation value to the datasets that depend on it. Returns the
+        annotation units that were waiting and are now runnable.
+        """
+        dataset_name = annotation_unit.get_dataset_name()
+
+        released = []
+        for child in self.dependency_graph.children[dataset_name]:
+            if child not in self.annotation_units:
+                continue
+
+            child_annotation_unit = self.annotation_units[child]
+            if value is not None and dataset_name in child_annotation_unit.get_dependencies():
+                child_annotation_unit.set_annotation_for_dependency(dataset_name, value)
+            if dataset_name == TRANSCRIPT_ID_DATASET and annotated:
+                child_annotation_unit.set_transcript_provisioned(True)
+
+            self.unfinished_parents[child].discard(dataset_name)
+            if not self.unfinished_parents[child] and child in self.waiting:
+                released.append(self.waiting.pop(child))
+
+        return released
+
+    def fail(self, annotation_unit: AnnotationUnit) -> list:
+        """Cancels every annotation unit that depends on the failed annotation unit and returns them"""
+        descendants = self.dependency_graph.descendants([annotation_unit.get_dataset_name()])
+
+        cancelled = []
+        for name in sorted(descendants & set(self.annotation_units)):
+            if name in self.cancelled:
+                continue
+
+            self.cancelled.add(name)
+            self.waiting.pop(name, None)
+            cancelled.append(self.annotation_units[name])
+
+        return cancelled
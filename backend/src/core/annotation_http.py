@@ -0,0 +1,188 @@
+"""Shared HTTP clients used by annotation tasks to request annotations and versions from annotation sources"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+
+import httpx
+import requests
+
+from .annotation_metrics import annotation_metrics
+from .annotation_rate_limiter import AnnotationRateLimiter, annotation_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def rate_limited_get(url: str, data_source: str | None = None, rate_limiter: AnnotationRateLimiter = None):
+    """
+    Requests the url once the annotation source's rate limit allows it. Throttled or transiently failing responses
+    are retried after the source's 'Retry-After' or a jittered exponential backoff, as are requests that fail to
+    connect or time out. The last response is returned once it succeeds or the retries are exhausted, and the last
+    connection error or timeout is raised. The latency of each attempt is recorded by its data source.
+    """
+    rate_limiter = rate_limiter if rate_limiter is not None else annotation_rate_limiter
+
+    attempt = 0
+    while True:
+        wait_seconds = rate_limiter.wait_seconds(url, data_source)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+        try:
+            with annotation_metrics.timer(
+                "rosalution_annotation_http_request_seconds", data_source=data_source or "unknown"
+            ):
+                response = requests.get(url, verify=False, headers={"Accept": "application/json"}, timeout=30)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if not rate_limiter.should_retry_error(attempt):
+                raise
+
+            retry_delay = rate_limiter.retry_delay(url, data_source, attempt)
+            logger.warning("Retrying '%s' in %.2fs after [%s]", url, retry_delay, error)
+            time.sleep(retry_delay)
+            attempt += 1
+            continue
+
+        if not rate_limiter.should_retry(response.status_code, attempt):
+            return response
+
+        retry_delay = rate_limiter.retry_delay(url, data_source, attempt, response.headers.get("Retry-After"))
+        logger.warning("Retrying '%s' in %.2fs after status %s", url, retry_delay, response.status_code)
+        time.sleep(retry_delay)
+        attempt += 1
+
+
+class SingleFlight:  # pylint: disable=too-few-public-methods
+    """
+    Coalesces concurrent calls for the same key into a single call. The first caller for a key makes the call while
+    every other caller for that key waits on it and receives the same result, or the same raised exception.
+    """
+
+    def __init__(self):
+        """Initializes without any calls in-flight"""
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, function):
+        """Returns the result of calling 'function', or of the in-flight call for the same key"""
+        with self.lock:
+            flight = self.flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = concurrent.futures.Future()
+                self.flights[key] = flight
+
+        if not is_leader:
+            return flight.result()
+
+        try:
+            result = function()
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+        flight.set_result(result)
+        return result
+
+
+annotation_request_flights = SingleFlight()
+
+
+def coalesced_get(url: str, data_source: str | None = None):
+    """
+    Requests the url with 'rate_limited_get', unless a request for the same url is already in-flight, in which case
+    the in-flight request's response is returned once it completes.
+    """
+    return annotation_request_flights.do(url, lambda: rate_limited_get(url, data_source))
+
+
+class AnnotationHttpClientPool:
+    """
+    A pooled keep-alive asynchronous HTTP client shared by every annotation task running on an event loop. The
+    number of concurrent requests to a single host is limited so that increasing the overall concurrency does not
+    overwhelm an individual annotation source.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        timeout: float = 30,
+        rate_limiter: AnnotationRateLimiter = None
+    ):
+        """Initializes the pooled client, must be created within the event loop that will use it"""
+        self.max_connections_per_host = max_connections_per_host
+        self.host_limits = {}
+        self.flights = {}
+        self.rate_limiter = rate_limiter if rate_limiter is not None else annotation_rate_limiter
+        self.client = httpx.AsyncClient(
+            verify=False,
+            timeout=timeout,
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def host_limit(self, url: str) -> asyncio.Semaphore:
+        """Returns the semaphore limiting the concurrent requests to the url's host"""
+        host = httpx.URL(url).host
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        return self.host_limits[host]
+
+    async def get(self, url: str, data_source: str | None = None) -> httpx.Response:
+        """
+        Requests the url once a connection is available for its host and the annotation source's rate limit allows
+        it. Concurrent requests for the same url are coalesced so that every caller awaits the one in-flight request.
+        """
+        flight = self.flights.get(url)
+        if flight is None:
+            flight = asyncio.ensure_future(self.request(url, data_source))
+            self.flights[url] = flight
+            flight.add_done_callback(lambda _completed: self.flights.pop(url, None))
+
+        return await asyncio.shield(flight)
+
+    async def request(self, url: str, data_source: str | None = None) -> httpx.Response:
+        """
+        Requests the url within the host's concurrency limit and the annotation source's rate limit. Throttled or
+        transiently failing responses, and requests failing to connect or timing out, are retried the same as
+        'rate_limited_get'.
+        """
+        attempt = 0
+        while True:
+            wait_seconds = self.rate_limiter.wait_seconds(url, data_source)
+            if wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+
+            try:
+                async with self.host_limit(url):
+                    with annotation_metrics.timer(
+                        "rosalution_annotation_http_request_seconds", data_source=data_source or "unknown"
+                    ):
+                        response = await self.client.get(url)
+            except httpx.TransportError as error:
+                if not self.rate_limiter.should_retry_error(attempt):
+                    raise
+
+                retry_delay = self.rate_limiter.retry_delay(url, data_source, attempt)
+                logger.warning("Retrying '%s' in %.2fs after [%s]", url, retry_delay, error)
+                await asyncio.sleep(retry_delay)
+                attempt += 1
+                continue
+
+            if not self.rate_limiter.should_retry(response.status_code, attempt):
+                return response
+
+            retry_delay = self.rate_limiter.retry_delay(url, data_source, attempt, response.headers.get("Retry-After"))
+            logger.warning("Retrying '%s' in %.2fs after status %s", url, retry_delay, response.status_code)
+            await asyncio.sleep(retry_delay)
+            attempt += 1
+
+    async def aclose(self):
+        """Closes the pooled connections"""
+        await self.client.aclose()
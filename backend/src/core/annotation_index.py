@@ -0,0 +1,66 @@
+"""Indexes the annotations that already exist for the genomic units queued together to annotate"""
+from ..enums import GenomicUnitType
+
+
+class AnnotationIndex:
+    """
+    The datasets, data sources, and versions already annotated for the genomic units queued together for an analysis.
+    The index is loaded with one aggregation before the first of their annotation units is processed, so that an
+    annotation unit whose annotation exists is skipped without querying for it.
+    """
+
+    def __init__(self, genomic_units: list):
+        """Initializes the index for the genomic units without loading it"""
+        self.genomic_units = genomic_units
+        self.loaded = False
+
+        self.annotated = set()
+        self.transcript_annotations = {}
+
+    def is_loaded(self) -> bool:
+        """Returns True once the index has been loaded"""
+        return self.loaded
+
+    def load(self, genomic_unit_collection):
+        """Loads the annotated datasets of every genomic unit and their transcripts with one aggregation"""
+        for document in genomic_unit_collection.find_annotated_datasets(self.genomic_units):
+            genomic_unit_key = next(((genomic_unit_type, document[genomic_unit_type])
+                                     for genomic_unit_type in GenomicUnitType.string_types()
+                                     if genomic_unit_type in document), None)
+            if genomic_unit_key is None:
+                continue
+
+            self.annotated.update(
+                (*genomic_unit_key, *annotation) for annotation in self.flatten(document.get('annotations', []))
+            )
+            self.transcript_annotations[genomic_unit_key] = {
+                transcript['transcript_id']: set(self.flatten(transcript.get('annotations', [])))
+                for transcript in document.get('transcripts', [])
+            }
+
+        self.loaded = True
+
+    @staticmethod
+    def flatten(annotated_datasets: list):
+        """Yields the dataset, data source, and version of each annotation within the annotated datasets"""
+        for datasets in annotated_datasets:
+            for dataset in datasets:
+                for annotation in dataset['annotations']:
+                    yield (dataset['data_set'], annotation.get('data_source'), annotation.get('version'))
+
+    def annotation_exist(self, annotation_unit) -> bool:
+        """
+        Returns True if the genomic unit is annotated by the annotation unit's dataset, data source, and calculated
+        version. A transcript dataset only exists once every one of the genomic unit's transcripts is annotated.
+        """
+        genomic_unit_key = (annotation_unit.get_genomic_unit_type_string(), annotation_unit.get_genomic_unit())
+        annotation = (annotation_unit.get_dataset_name(), annotation_unit.get_dataset_source(), annotation_unit.version)
+
+        if not annotation_unit.is_transcript_dataset():
+            return (*genomic_unit_key, *annotation) in self.annotated
+
+        transcripts = self.transcript_annotations.get(genomic_unit_key, {})
+        if len(transcripts) == 0:
+            return False
+
+        return all(annotation in transcript_annotations for transcript_annotations in transcripts.values())
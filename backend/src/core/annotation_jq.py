@@ -0,0 +1,119 @@
+"""Compiles and caches the jq programs that extract annotations and versions from annotation source responses"""
+import functools
+import json
+
+import jq
+
+JQ_PROGRAM_CACHE_SIZE = 512
+
+
+@functools.lru_cache(maxsize=JQ_PROGRAM_CACHE_SIZE)
+def compile_jq(jq_query: str):
+    """Returns the compiled jq program, only compiling the least recently used programs again once evicted"""
+    return jq.compile(jq_query)
+
+
+def parameterize_jq(jq_query: str, placeholders) -> str | None:
+    """
+    Rewrites each '{placeholder}' within the jq query's string literals as an interpolation of the '$vars' object so
+    that one compiled program can be used for every genomic unit. For example
+
+        select( .transcript_id | contains("{transcript}") )
+
+    becomes
+
+        select( .transcript_id | contains("\\($vars["transcript"])") )
+
+    None is returned when a placeholder is not within a string literal, since it can only be substituted as text.
+    """
+    tokens = {f"{{{placeholder}}}": placeholder for placeholder in placeholders}
+
+    parameterized = []
+    in_string = False
+    interpolation_depths = []
+    index = 0
+    while index < len(jq_query):
+        character = jq_query[index]
+
+        token = next((token for token in tokens if jq_query.startswith(token, index)), None)
+        if token is not None:
+            if not in_string:
+                return None
+
+            parameterized.append(f"\\($vars[{json.dumps(tokens[token])}])")
+            index += len(token)
+            continue
+
+        if in_string and character == "\\":
+            if jq_query.startswith("\\(", index):
+                in_string = False
+                interpolation_depths.append(0)
+            parameterized.append(jq_query[index:index + 2])
+            index += 2
+            continue
+
+        if character == '"':
+            in_string = not in_string
+        elif not in_string and interpolation_depths:
+            if character == "(":
+                interpolation_depths[-1] += 1
+            elif character == ")" and interpolation_depths[-1] == 0:
+                interpolation_depths.pop()
+                in_string = True
+            elif character == ")":
+                interpolation_depths[-1] -= 1
+
+        parameterized.append(character)
+        index += 1
+
+    return "".join(parameterized)
+
+
+def substitute_placeholders(jq_query: str, placeholders: dict) -> str:
+    """Returns the jq query with each '{placeholder}' replaced by its value"""
+    substituted_query = jq_query
+    for placeholder, value in placeholders.items():
+        substituted_query = substituted_query.replace(f"{{{placeholder}}}", value)
+    return substituted_query
+
+
+def extract_with_placeholders(jq_query: str, placeholders: dict, json_to_parse):
+    """
+    Returns an iterator of the results of running the jq query on the JSON. The query's placeholders are provided
+    to the compiled program as '$vars' when they are all within string literals, otherwise they are substituted
+    into the query's text before it is compiled.
+    """
+    used_placeholders = {
+        placeholder: value for placeholder, value in placeholders.items() if f"{{{placeholder}}}" in jq_query
+    }
+    if not used_placeholders:
+        return iter(compile_jq(jq_query).input(json_to_parse).all())
+
+    parameterized_query = parameterize_jq(jq_query, used_placeholders)
+    if parameterized_query is None:
+        return iter(compile_jq(substitute_placeholders(jq_query, used_placeholders)).input(json_to_parse).all())
+
+    program = compile_jq(f".vars as $vars | .input | ({parameterized_query}\n)")
+    return iter(program.input({"vars": used_placeholders, "input": json_to_parse}).all())
+
+
+def extract_group_with_placeholders(jq_queries: list, placeholders: dict, json_to_parse) -> list:
+    """
+    Returns a list of the results of each jq query run on the same JSON. The queries are compiled together as one
+    program so that the JSON is only provided to jq once, regardless of how many queries are extracted from it.
+    """
+    used_placeholders = {
+        placeholder: value
+        for placeholder, value in placeholders.items()
+        if any(f"{{{placeholder}}}" in jq_query for jq_query in jq_queries)
+    }
+
+    grouped_queries = []
+    for jq_query in jq_queries:
+        parameterized_query = parameterize_jq(jq_query, used_placeholders)
+        if parameterized_query is None:
+            parameterized_query = substitute_placeholders(jq_query, used_placeholders)
+        grouped_queries.append(f"[ $input | ({parameterized_query}\n) ]")
+
+    program = compile_jq(f".vars as $vars | .input as $input | [ {', '.join(grouped_queries)} ]")
+    return program.input({"vars": used_placeholders, "input": json_to_parse}).first()
@@ -0,0 +1,92 @@
+"""
+Logs the events of annotation units as they are processed. An event's message, and the annotation unit's padded
+label, are only formatted when the event's level is enabled. Events are logged as padded text or, for searching large
+annotation runs, as compact JSON lines.
+
+{"analysis":"CPAM0002","unit":"VMA21","dataset":"Entrez Gene Id","data_source":"Rosalution","version":"...",
+"message":"Saving 203547..."}
+"""
+import itertools
+import json
+import logging
+
+SAVED_VALUE_MAX_LENGTH = 200
+
+
+def truncated_value(value, max_length: int = SAVED_VALUE_MAX_LENGTH) -> str:
+    """Returns the value as a string shortened to the maximum length, so that large annotation values are not logged"""
+    value_string = str(value)
+    if len(value_string) <= max_length:
+        return value_string
+
+    return f"{value_string[:max_length]}...[{len(value_string) - max_length} more characters]"
+
+
+def annotation_event_json(annotation_unit, message: str) -> str:
+    """Returns the compact JSON line of an annotation unit's event"""
+    event = {
+        "analysis": annotation_unit.analysis_name,
+        "unit": annotation_unit.get_genomic_unit(),
+        "dataset": annotation_unit.get_dataset_name(),
+    }
+    if annotation_unit.version_calculated():
+        event["data_source"] = annotation_unit.get_dataset_source()
+        event["version"] = annotation_unit.version
+    event["message"] = message
+
+    return json.dumps(event, separators=(",", ":"), default=str)
+
+
+class AnnotationEventLogger:
+    """
+    Logs annotation units' events to a logger in the 'text' or 'json' format. The 'Saving' events of each annotated
+    value are sampled by the sample rate, where 1 logs every saved value and 0.01 logs one in a hundred.
+    """
+
+    def __init__(self, logger: logging.Logger, text_label, log_format: str = "text", saving_sample_rate: float = 1.0):
+        """
+        Initializes with the logger and the function that formats an annotation unit's padded label for the 'text'
+        format
+        """
+        self.logger = logger
+        self.text_label = text_label
+        self.log_format = log_format
+        self.saving_sample_rate = saving_sample_rate
+        self.saving_count = itertools.count()
+
+    def configure(self, log_format: str, saving_sample_rate: float):
+        """Sets the format of the logged events and the sample rate of the 'Saving' events"""
+        self.log_format = log_format
+        self.saving_sample_rate = saving_sample_rate
+        self.saving_count = itertools.count()
+
+    def log(self, level: int, annotation_unit, message: str, *args):
+        """Logs the annotation unit's event when the level is enabled, formatting the message with the arguments"""
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if self.log_format == "json":
+            self.logger.log(level, "%s", annotation_event_json(annotation_unit, message % args if args else message))
+            return
+
+        self.logger.log(level, f"%s {message}", self.text_label(annotation_unit), *args)
+
+    def info(self, annotation_unit, message: str, *args):
+        """Logs the annotation unit's event at the 'INFO' level"""
+        self.log(logging.INFO, annotation_unit, message, *args)
+
+    def error(self, annotation_unit, message: str, *args):
+        """Logs the annotation unit's event at the 'ERROR' level"""
+        self.log(logging.ERROR, annotation_unit, message, *args)
+
+    def saving(self, annotation_unit, value):
+        """Logs a sample of the annotation values being saved, truncating large values"""
+        if not self.logger.isEnabledFor(logging.INFO) or not self.is_saving_sampled():
+            return
+
+        self.log(logging.INFO, annotation_unit, "Saving %s...", truncated_value(value))
+
+    def is_saving_sampled(self) -> bool:
+        """Returns True for the 'Saving' events spread evenly by the sample rate"""
+        saving_index = next(self.saving_count)
+        return int((saving_index + 1) * self.saving_sample_rate) > int(saving_index * self.saving_sample_rate)
@@ -0,0 +1,87 @@
+"""Accumulates the datasets annotated during an annotation run to add them to the analyses' manifests in bulk"""
+from .annotation_metrics import annotation_metrics
+
+
+class AnnotationManifestAccumulator:
+    """
+    Collects the dataset, data source, and version annotated for each genomic unit of each analysis during an
+    annotation run. Each analysis' entries are added to its manifest with one bulk write when flushed, and an entry
+    that is collected more than once is only written once.
+    """
+
+    def __init__(self, analysis_collection):
+        """Initializes the accumulator without any manifest entries"""
+        self.analysis_collection = analysis_collection
+        self.manifest_entries = {}
+
+    def __len__(self):
+        """Returns the number of manifest entries that have not been written"""
+        return sum(
+            len(unit_entries)
+            for analysis_entries in self.manifest_entries.values()
+            for unit_entries in analysis_entries.values()
+        )
+
+    def add(self, annotation_unit):
+        """Collects the annotation unit's dataset, data source, and version for its analysis' manifest"""
+        unit_entries = self.manifest_entries.setdefault(annotation_unit.analysis_name,
+                                                        {}).setdefault(annotation_unit.get_genomic_unit(), {})
+        entry = (annotation_unit.get_dataset_name(), annotation_unit.get_dataset_source(), annotation_unit.version)
+        unit_entries[entry] = None
+
+    def flush(self):
+        """Adds the collected entries to each analysis' manifest"""
+        manifest_entries = self.manifest_entries
+        self.manifest_entries = {}
+
+        for analysis_name, analysis_entries in manifest_entries.items():
+            unit_datasets = {
+                unit: [{dataset_name: {'data_source': data_source, 'version': version}}
+                       for dataset_name, data_source, version in unit_entries
+                      ] for unit, unit_entries in analysis_entries.items()
+            }
+            with annotation_metrics.timer("rosalution_annotation_write_seconds", operation="manifest"):
+                self.analysis_collection.add_datasets_to_manifest(analysis_name, unit_datasets)
+
+
+class AnalysisManifestSnapshot:
+    """
+    The dataset manifest of an analysis, loaded once for an annotation run and indexed by the genomic unit and
+    dataset name so that each manifest entry is found without querying the analysis. The snapshot is kept up to date
+    with the annotation units that are added to the analysis' manifest during the annotation run.
+    """
+
+    def __init__(self, analysis_manifest: list):
+        """Indexes each entry of the analysis' manifest, the first entry of a unit's dataset is used like the query"""
+        self.manifest_entries = {}
+        for unit_manifest in analysis_manifest or []:
+            if 'unit' not in unit_manifest:
+                continue
+
+            for dataset in unit_manifest.get('manifest', []):
+                for dataset_name, dataset_config in dataset.items():
+                    self.manifest_entries.setdefault((unit_manifest['unit'], dataset_name), {
+                        "data_set": dataset_name,
+                        "data_source": dataset_config['data_source'],
+                        "version": dataset_config['version'],
+                    })
+
+    def __len__(self):
+        """Returns the number of genomic unit datasets in the manifest"""
+        return len(self.manifest_entries)
+
+    def get_dataset_config(self, unit: str, dataset_name: str):
+        """Returns a copy of the genomic unit's dataset manifest entry, otherwise returns None"""
+        manifest_entry = self.manifest_entries.get((unit, dataset_name))
+        if manifest_entry is None:
+            return None
+
+        return dict(manifest_entry)
+
+    def add(self, annotation_unit):
+        """Adds the annotation unit's dataset, data source, and version unless the manifest already has the dataset"""
+        self.manifest_entries.setdefault((annotation_unit.get_genomic_unit(), annotation_unit.get_dataset_name()), {
+            "data_set": annotation_unit.get_dataset_name(),
+            "data_source": annotation_unit.get_dataset_source(),
+            "version": annotation_unit.version,
+        })
@@ -0,0 +1,196 @@
+"""
+Records the metrics of annotation runs within the application process. The metrics are exposed in the Prometheus text
+format and each annotation run's changes to them are summarized into a document for that run.
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRICS = {
+    "rosalution_annotation_queue_depth": ("gauge", "Annotation units waiting within the annotation queue"),
+    "rosalution_annotation_tasks_in_flight": ("gauge", "Annotation tasks that are running"),
+    "rosalution_annotation_task_workers": ("gauge", "Annotation task workers available to run annotation tasks"),
+    "rosalution_annotation_units_total": ("counter", "Annotation units processed by outcome"),
+    "rosalution_annotation_requeued_total":
+        ("counter", "Annotation units put back onto the annotation queue by reason"),
+    "rosalution_annotation_http_request_seconds":
+        ("histogram", "Latency of the HTTP requests to annotation sources by data source"),
+    "rosalution_annotation_extraction_seconds":
+        ("histogram", "Time extracting annotations from annotation tasks' results by data source"),
+    "rosalution_annotation_write_seconds":
+        ("histogram", "Latency of writing annotation results to MongoDB by operation"),
+    "rosalution_annotation_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "rosalution_annotation_failures_total": ("counter", "Annotation failures by exception type and data source"),
+}
+
+RUN_SUMMARY_SECTIONS = {
+    "units": "rosalution_annotation_units_total",
+    "requeued": "rosalution_annotation_requeued_total",
+    "http_requests": "rosalution_annotation_http_request_seconds",
+    "extraction": "rosalution_annotation_extraction_seconds",
+    "writes": "rosalution_annotation_write_seconds",
+    "failures": "rosalution_annotation_failures_total",
+}
+
+
+def label_key(labels: dict) -> tuple:
+    """Returns the labels of a metric's sample as a sorted tuple of name and value pairs"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def escape_label_value(value: str) -> str:
+    """Escapes the backslashes, double quotes, and line feeds within a label's value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: tuple) -> str:
+    """Returns the labels of a sample in the Prometheus text format"""
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+class AnnotationMetrics:
+    """
+    A thread-safe registry of the counters, gauges, and histograms declared within 'METRICS', labelled by the
+    keyword arguments they are recorded with
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, clock=time.perf_counter):
+        """Initializes without any recorded samples"""
+        self.buckets = buckets
+        self.clock = clock
+        self.values = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """Increments the counter's sample for the labels"""
+        key = (name, label_key(labels))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Sets the gauge's sample for the labels"""
+        with self.lock:
+            self.values[(name, label_key(labels))] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Records the seconds within the histogram's sample for the labels"""
+        key = (name, label_key(labels))
+        with self.lock:
+            bucket_counts, total, count = self.histograms.get(key, ([0] * len(self.buckets), 0.0, 0))
+            bucket_counts = [
+                bucket_count + 1 if seconds <= bucket else bucket_count
+                for bucket_count, bucket in zip(bucket_counts, self.buckets)
+            ]
+            self.histograms[key] = (bucket_counts, total + seconds, count + 1)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Records the seconds the context takes within the histogram, including when the context raises"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(name, self.clock() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Returns a copy of the recorded samples"""
+        with self.lock:
+            return {"values": dict(self.values), "histograms": dict(self.histograms)}
+
+    def clear(self):
+        """Removes every recorded sample"""
+        with self.lock:
+            self.values = {}
+            self.histograms = {}
+
+    def exposition(self) -> str:
+        """Returns the recorded samples in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, (metric_type, description) in METRICS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            if metric_type != "histogram":
+                samples = sorted((labels, value)
+                                 for (sample_name, labels), value in snapshot['values'].items()
+                                 if sample_name == name)
+                lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+                continue
+
+            samples = sorted((labels, histogram)
+                             for (sample_name, labels), histogram in snapshot['histograms'].items()
+                             if sample_name == name)
+            for labels, (bucket_counts, total, count) in samples:
+                for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{name}_bucket{format_labels((*labels, ('le', str(bucket))))} {bucket_count}")
+                lines.append(f"{name}_bucket{format_labels((*labels, ('le', '+Inf')))} {count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def run_summary(self, before: dict) -> dict:
+        """
+        Summarizes the counters and histograms recorded since the snapshot taken before an annotation run. Each
+        section lists the run's samples with their labels, and the cache section includes each cache's hit rate.
+
+        {'units': [{'outcome': 'annotated', 'count': 12}], 'cache': [{'cache': 'version', 'hit': 3, 'miss': 1,
+        'hit_rate': 0.75}], 'http_requests': [{'data_source': 'Ensembl', 'count': 4, 'seconds': 1.2, ...}]}
+        """
+        after = self.snapshot()
+        summary = {}
+        for section, name in RUN_SUMMARY_SECTIONS.items():
+            if METRICS[name][0] == "histogram":
+                summary[section] = self.histogram_deltas(name, before['histograms'], after['histograms'])
+            else:
+                summary[section] = self.counter_deltas(name, before['values'], after['values'])
+
+        caches = {}
+        for cache_sample in self.counter_deltas(
+            "rosalution_annotation_cache_requests_total", before['values'], after['values']
+        ):
+            cache = caches.setdefault(cache_sample['cache'], {"cache": cache_sample['cache'], "hit": 0, "miss": 0})
+            cache[cache_sample['result']] += cache_sample['count']
+        for cache in caches.values():
+            cache['hit_rate'] = cache['hit'] / (cache['hit'] + cache['miss'])
+        summary['cache'] = list(caches.values())
+
+        return summary
+
+    @staticmethod
+    def counter_deltas(name: str, before: dict, after: dict) -> list:
+        """Returns the counter's samples that increased between the snapshots' values"""
+        deltas = []
+        for (sample_name, labels), value in sorted(after.items()):
+            delta = value - before.get((sample_name, labels), 0)
+            if sample_name == name and delta > 0:
+                deltas.append({**dict(labels), "count": delta})
+
+        return deltas
+
+    @staticmethod
+    def histogram_deltas(name: str, before: dict, after: dict) -> list:
+        """Returns the histogram's samples recorded between the snapshots' histograms"""
+        deltas = []
+        for (sample_name, labels), (_, total, count) in sorted(after.items()):
+            _, total_before, count_before = before.get((sample_name, labels), (None, 0.0, 0))
+            if sample_name != name or count == count_before:
+                continue
+
+            seconds = total - total_before
+            deltas.append({
+                **dict(labels), "count": count - count_before, "seconds": seconds,
+                "mean_seconds": seconds / (count - count_before)
+            })
+
+        return deltas
+
+
+annotation_metrics = AnnotationMetrics()
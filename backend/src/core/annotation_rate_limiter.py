@@ -0,0 +1,152 @@
+"""Limits the rate of HTTP requests made to annotation sources and calculates delays for retrying throttled requests"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def parse_retry_after(retry_after) -> float | None:
+    """
+    Returns the seconds to wait from a 'Retry-After' header, which is either a number of seconds or an HTTP date.
+    None is returned when the header is missing or cannot be parsed.
+    """
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that refills at 'rate' tokens per second up to 'capacity' tokens. Requesters reserve
+    a token and wait the returned number of seconds, so the bucket never blocks while holding its lock.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock=time.monotonic):
+        """Initializes a full bucket"""
+        self.rate = rate
+        self.capacity = max(1.0, rate) if capacity is None else capacity
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Adds the tokens accumulated since the last update, must be called while holding the lock"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Reserves a token and returns the seconds to wait until the reserved token is available"""
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Empties the bucket so that no tokens are available for at least 'seconds', such as for a 'Retry-After'"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class AnnotationRateLimiter:
+    """
+    Rate limits HTTP requests to annotation sources with a token bucket for each configured annotation source. A limit
+    is configured by a dataset's 'data_source' or by the host of the request's url, with 'data_source' taking
+    precedence. Requests to sources without a configured limit are not rate limited but are still retried.
+    """
+
+    retry_status_codes = {429, 502, 503, 504}
+
+    def __init__(
+        self,
+        limits: dict | None = None,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 30.0
+    ):
+        """Initializes the rate limiter with the requests per second for each data source or host in 'limits'"""
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self.configure(limits or {})
+
+    def configure(
+        self,
+        limits: dict,
+        max_retries: int | None = None,
+        backoff_base_seconds: float | None = None,
+        backoff_max_seconds: float | None = None
+    ):
+        """Replaces the configured limits, and optionally the retry and backoff settings"""
+        with self.lock:
+            self.buckets = {source: TokenBucket(rate) for source, rate in limits.items()}
+
+        if max_retries is not None:
+            self.max_retries = max_retries
+        if backoff_base_seconds is not None:
+            self.backoff_base_seconds = backoff_base_seconds
+        if backoff_max_seconds is not None:
+            self.backoff_max_seconds = backoff_max_seconds
+
+    def bucket_for(self, url: str, data_source: str | None = None) -> TokenBucket | None:
+        """Returns the token bucket configured for the data source or the url's host, otherwise returns None"""
+        if data_source is not None and data_source in self.buckets:
+            return self.buckets[data_source]
+
+        return self.buckets.get(urlsplit(url).hostname)
+
+    def wait_seconds(self, url: str, data_source: str | None = None) -> float:
+        """Reserves a request to the annotation source and returns the seconds to wait before sending it"""
+        bucket = self.bucket_for(url, data_source)
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def should_retry(self, status_code: int, attempt: int) -> bool:
+        """Returns True when a response's status indicates throttling or a transient failure worth retrying"""
+        return status_code in self.retry_status_codes and self.should_retry_error(attempt)
+
+    def should_retry_error(self, attempt: int) -> bool:
+        """Returns True when a request that failed to connect or timed out has retries remaining"""
+        return attempt < self.max_retries
+
+    def retry_delay(self, url: str, data_source: str | None, attempt: int, retry_after=None) -> float:
+        """
+        Returns the seconds to wait before retrying. A 'Retry-After' from the annotation source is honored, up to the
+        maximum backoff, and pauses every request to that source, otherwise the delay is a jittered exponential
+        backoff of the attempt.
+        """
+        retry_after_seconds = parse_retry_after(retry_after)
+        if retry_after_seconds is not None:
+            retry_after_seconds = min(retry_after_seconds, self.backoff_max_seconds)
+            bucket = self.bucket_for(url, data_source)
+            if bucket is not None:
+                bucket.pause(retry_after_seconds)
+            return retry_after_seconds
+
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * (2**attempt)))
+
+
+annotation_rate_limiter = AnnotationRateLimiter()
@@ -1,5 +1,6 @@
 """Tasks for annotating a genomic unit with datasets"""
 from abc import abstractmethod
+import asyncio
 from datetime import date
 import csv
 import json
@@ -8,10 +9,13 @@ import time
 
 import logging
 import subprocess
-import jq
+import httpx
 import requests
 
 from ..core.annotation_unit import AnnotationUnit
+from .annotation_jq import compile_jq, extract_group_with_placeholders, extract_with_placeholders
+from .annotation_http import AnnotationHttpClientPool, coalesced_get, rate_limited_get
+from .annotation_metrics import annotation_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,15 @@ class AnnotationTaskInterface:
 
     def __init__(self, annotation_unit: AnnotationUnit):
         self.annotation_unit = annotation_unit
+        self.response_cache = None
+
+    def set_response_cache(self, response_cache):
+        """Sets the cache of annotation source responses shared across annotation runs"""
+        self.response_cache = response_cache
+
+    def get_annotation_units(self) -> list:
+        """Returns the annotation units annotated by the task"""
+        return [self.annotation_unit]
 
     def aggregate_raw_cache_replacement(self, base: str) -> dict:
         """Returns the cached dataset dependency if it is a cached dataset call"""
@@ -41,6 +54,23 @@ class AnnotationTaskInterface:
 
         return {}
 
+    def placeholder_values(self, template: str) -> dict:
+        """
+        Returns the values of the placeholders used within the template from a dataset's configuration, which are
+        the genomic unit's type, such as {gene}, and the dataset's dependencies, such as {Entrez Gene Id}.
+        """
+        placeholders = {}
+
+        genomic_unit_type = self.annotation_unit.get_genomic_unit_type()
+        if f"{{{genomic_unit_type}}}" in template:
+            placeholders[genomic_unit_type] = self.annotation_unit.get_genomic_unit()
+
+        for dependency in self.annotation_unit.get_dependencies():
+            if f"{{{dependency}}}" in template:
+                placeholders[dependency] = str(self.annotation_unit.genomic_unit[dependency])
+
+        return placeholders
+
     def aggregate_string_replacements(self, base_string) -> str:
         """
         Replaces the content 'base_string' where strings within the pattern
@@ -83,57 +113,69 @@ class AnnotationTaskInterface:
     def annotate(self):
         """Interface for implementation of of retrieving the annotation for a genomic unit and its set of datasets"""
 
+    async def annotate_async(self, http_client_pool: AnnotationHttpClientPool):  # pylint: disable=unused-argument
+        """
+        Coroutine interface for retrieving the annotation on an event loop. Annotation tasks that do not request
+        from an annotation source over HTTP run their blocking 'annotate' in a worker thread.
+        """
+        return await asyncio.to_thread(self.annotate)
+
     def __json_extract__(self, jq_query, json_to_parse):
         """Private ethod to execute jq to extract JSON"""
-        jq_results = iter(jq.compile(jq_query).input(json_to_parse).all())
+        jq_results = iter(compile_jq(jq_query).input(json_to_parse).all())
         return jq_results
 
     def extract(self, incomming_json):
         """ Interface extraction method for annotation tasks """
         annotations = []
 
-        # The following if statement has grown too large, however it would needs
-        # to be refactored at a later time
-        if 'attribute' in self.annotation_unit.dataset:  # pylint: disable=too-many-nested-blocks
-            annotation_unit_json = {
-                "data_set": self.annotation_unit.dataset['data_set'],
-                "data_source": self.annotation_unit.dataset['data_source'], "value": "",
-                "version": self.annotation_unit.version
-            }
-
+        if 'attribute' in self.annotation_unit.dataset:
             jq_results = empty_gen()
             try:
-                replaced_attributes = self.aggregate_string_replacements(self.annotation_unit.dataset['attribute'])
-                jq_results = self.__json_extract__(replaced_attributes, incomming_json)
+                attribute = self.annotation_unit.dataset['attribute']
+                jq_results = extract_with_placeholders(attribute, self.placeholder_values(attribute), incomming_json)
             except (ValueError, json.JSONDecodeError) as value_error:
-                value_error.add_note(replaced_attributes)
+                value_error.add_note(self.aggregate_string_replacements(self.annotation_unit.dataset['attribute']))
                 value_error.add_note(json.dumps(incomming_json))
-                failure_message = f"Failed to annotate '{annotation_unit_json['data_set']}' from \
-                    '{annotation_unit_json['data_source']}' extracting from '{json.dumps(incomming_json)}' with error: \
-                    '{value_error}'"
+                failure_message = f"Failed to annotate '{self.annotation_unit.dataset['data_set']}' from \
+                    '{self.annotation_unit.dataset['data_source']}' extracting from '{json.dumps(incomming_json)}' \
+                    with error: '{value_error}'"
 
                 raise RuntimeError(failure_message) from value_error
 
+            annotations = self.annotations_from_jq_results(jq_results)
+
+        return annotations
+
+    def annotations_from_jq_results(self, jq_results) -> list:
+        """Creates the annotations for the annotation unit's dataset from the results of its jq query"""
+        annotations = []
+        annotation_unit_json = {
+            "data_set": self.annotation_unit.dataset['data_set'],
+            "data_source": self.annotation_unit.dataset['data_source'], "value": "",
+            "version": self.annotation_unit.version
+        }
+
+        jq_result = next(jq_results, None)
+        while jq_result is not None:
+            result_keys = list(jq_result.keys())
+
+            if 'transcript' in self.annotation_unit.dataset:
+                transcript_annotation_unit = annotation_unit_json.copy()
+                for key in result_keys:
+                    if key == 'transcript_id':
+                        transcript_identifier = jq_result['transcript_id']
+                        transcript_annotation_unit['transcript_id'] = transcript_identifier
+                        if transcript_annotation_unit['value'] == '':
+                            transcript_annotation_unit['value'] = transcript_identifier
+                    else:
+                        transcript_annotation_unit['value'] = jq_result[key]
+                annotations.append(transcript_annotation_unit)
+            else:
+                annotation_unit_json['value'] = jq_result[result_keys[0]]
+                annotations.append(annotation_unit_json)
+
             jq_result = next(jq_results, None)
-            while jq_result is not None:
-                result_keys = list(jq_result.keys())
-
-                if 'transcript' in self.annotation_unit.dataset:
-                    transcript_annotation_unit = annotation_unit_json.copy()
-                    for key in result_keys:
-                        if key == 'transcript_id':
-                            transcript_identifier = jq_result['transcript_id']
-                            transcript_annotation_unit['transcript_id'] = transcript_identifier
-                            if transcript_annotation_unit['value'] == '':
-                                transcript_annotation_unit['value'] = transcript_identifier
-                        else:
-                            transcript_annotation_unit['value'] = jq_result[key]
-                    annotations.append(transcript_annotation_unit)
-                else:
-                    annotation_unit_json['value'] = jq_result[result_keys[0]]
-                    annotations.append(annotation_unit_json)
-
-                jq_result = next(jq_results, None)
 
         return annotations
 
@@ -187,6 +229,59 @@ class ForgeAnnotationTask(AnnotationTaskInterface):
         return {self.annotation_unit.dataset['data_set']: value}
 
 
+class ForgeAnnotationGroupTask(AnnotationTaskInterface):
+    """
+    An annotation task that forges every dataset of a genomic unit that is extracted from the same cached dataset
+    dependency, such as 'ENSEMBL_VARIANT_HGVS_VARIANT_CALL_CACHE'. Each dataset's jq query is run over the cached
+    dataset within one pass rather than as a separate forge annotation task per dataset.
+    """
+
+    def __init__(self, annotation_units: list):
+        """Instantiates the forge annotation task for each of the annotation units forged from the cached dataset"""
+        AnnotationTaskInterface.__init__(self, annotation_units[0])
+        self.forge_tasks = [ForgeAnnotationTask(annotation_unit) for annotation_unit in annotation_units]
+
+    def get_annotation_units(self) -> list:
+        """Returns the annotation units annotated by the task"""
+        return [forge_task.annotation_unit for forge_task in self.forge_tasks]
+
+    def annotate(self):
+        """Returns the cached dataset that each of the datasets are extracted from"""
+        return self.aggregate_raw_cache_replacement(self.annotation_unit.dataset['base_string'])
+
+    def extract_group(self, cached_dataset) -> list:
+        """
+        Extracts the annotations for every dataset from the cached dataset. Returns a list with each annotation unit
+        and either its annotations or the exception raised while extracting them. When the datasets cannot be
+        extracted together, each one is extracted separately so that a failure is only reported for its dataset.
+        """
+        jq_queries = []
+        placeholders = {}
+        for forge_task in self.forge_tasks:
+            dataset = forge_task.annotation_unit.dataset
+            jq_queries.append(f"{{{json.dumps(dataset['data_set'])}: .}} | ({dataset['attribute']}\n)")
+            placeholders.update(forge_task.placeholder_values(dataset['attribute']))
+
+        try:
+            grouped_jq_results = extract_group_with_placeholders(jq_queries, placeholders, cached_dataset)
+        except ValueError:
+            return [self.extract_separately(forge_task, cached_dataset) for forge_task in self.forge_tasks]
+
+        return [(forge_task.annotation_unit, forge_task.annotations_from_jq_results(iter(jq_results)))
+                for forge_task, jq_results in zip(self.forge_tasks, grouped_jq_results)]
+
+    @staticmethod
+    def extract_separately(forge_task, cached_dataset):
+        """Returns the annotation unit with either its extracted annotations or the exception raised extracting them"""
+        try:
+            return (
+                forge_task.annotation_unit,
+                forge_task.extract({forge_task.annotation_unit.dataset['data_set']: cached_dataset})
+            )
+        except RuntimeError as runtime_error:
+            return (forge_task.annotation_unit, runtime_error)
+
+
 class NoneAnnotationTask(AnnotationTaskInterface):
     """An empty annotation task to be a place holder for datasets that do not have an annotation type yet"""
 
@@ -225,12 +320,19 @@ class HttpAnnotationTask(AnnotationTaskInterface):
         AnnotationTaskInterface.__init__(self, annotation_unit)
 
     def annotate(self):
-        """builds the complete url and fetches the annotation with an http request"""
+        """
+        builds the complete url and fetches the annotation with an http request, unless the response for the url
+        and the dataset's version is already cached. Identical urls requested concurrently share one request.
+        """
         url_to_query = self.build_url()
 
+        cached_response = self.find_cached_response(url_to_query)
+        if cached_response is not None:
+            return cached_response
+
         json_result = {}
         try:
-            result = requests.get(url_to_query, verify=False, headers={"Accept": "application/json"}, timeout=30)
+            result = coalesced_get(url_to_query, self.annotation_unit.get_dataset_source())
             result.raise_for_status()
             json_result = result.json()
         except (requests.exceptions.JSONDecodeError, TypeError, requests.HTTPError) as error:
@@ -241,8 +343,56 @@ class HttpAnnotationTask(AnnotationTaskInterface):
             )
             raise error
 
+        self.cache_response(url_to_query, json_result)
+        return json_result
+
+    async def annotate_async(self, http_client_pool: AnnotationHttpClientPool):
+        """builds the complete url and fetches the annotation with the shared pooled http client"""
+        url_to_query = self.build_url()
+
+        cached_response = await asyncio.to_thread(self.find_cached_response, url_to_query)
+        if cached_response is not None:
+            return cached_response
+
+        result = await http_client_pool.get(url_to_query, self.annotation_unit.get_dataset_source())
+        try:
+            result.raise_for_status()
+            json_result = result.json()
+        except (json.JSONDecodeError, httpx.HTTPStatusError) as error:
+            error.add_note(
+                f"Failed to annotate \"{self.annotation_unit.get_dataset_name()}\" from \
+                    \"{self.annotation_unit.get_dataset_source()}\" at \"{url_to_query}\" \
+                    on \"{result.text}\" within annotate: \"{error}\""
+            )
+            raise error
+
+        await asyncio.to_thread(self.cache_response, url_to_query, json_result)
         return json_result
 
+    def find_cached_response(self, url: str):
+        """Returns the cached response for the url from the dataset's source and version, otherwise returns None"""
+        if self.response_cache is None:
+            return None
+
+        cached_response = self.response_cache.find_response(
+            url, self.annotation_unit.get_dataset_source(), self.annotation_unit.version
+        )
+        annotation_metrics.increment(
+            "rosalution_annotation_cache_requests_total",
+            cache="response",
+            result="miss" if cached_response is None else "hit"
+        )
+        return cached_response
+
+    def cache_response(self, url: str, response):
+        """Caches the response for the url from the dataset's source and version"""
+        if self.response_cache is None:
+            return
+
+        self.response_cache.save_response(
+            url, self.annotation_unit.get_dataset_source(), self.annotation_unit.version, response
+        )
+
     def build_url(self):
         """
         Builds the URL from the base_url and then appends the list of query parameters for the list of datasets.
@@ -282,7 +432,7 @@ class VersionAnnotationTask(AnnotationTaskInterface):
 
         url_to_query = self.annotation_unit.dataset['version_url']
         try:
-            result = requests.get(url_to_query, verify=False, headers={"Accept": "application/json"}, timeout=30)
+            result = rate_limited_get(url_to_query, self.annotation_unit.get_dataset_source())
             version = result.json()
         except (requests.exceptions.JSONDecodeError, TypeError) as error:
             error.add_note(
@@ -294,6 +444,25 @@ class VersionAnnotationTask(AnnotationTaskInterface):
 
         return version
 
+    async def annotate_async(self, http_client_pool: AnnotationHttpClientPool):
+        """Gets the version with the shared pooled http client when the versioning type requests a REST endpoint"""
+        if self.annotation_unit.dataset['versioning_type'] != "rest":
+            return await asyncio.to_thread(self.annotate)
+
+        url_to_query = self.annotation_unit.dataset['version_url']
+        result = await http_client_pool.get(url_to_query, self.annotation_unit.get_dataset_source())
+        try:
+            version = result.json()
+        except json.JSONDecodeError as error:
+            error.add_note(
+                f"Failed to annotate \"{self.annotation_unit.get_dataset_name()}\" from \
+                    \"{self.annotation_unit.get_dataset_source()}\" at \"{url_to_query}\"\
+                    on \"{result.text}\" within annotate: \"{error}\""
+            )
+            raise error
+
+        return version
+
     def get_annotation_version_from_rosalution(self):
         """Gets version for rosalution type and returns the version data"""
 
@@ -307,11 +476,17 @@ class VersionAnnotationTask(AnnotationTaskInterface):
         return version
 
     def get_version_cache_id(self):
-        """Generates the Version's Cache ID used to cache the datasource's version that is calculated for tasks."""
+        """
+        Generates the Version's Cache ID used to cache the datasource's version that is calculated for tasks. The
+        'date' version's cache id includes today's date so that a cached date version does not outlive its day.
+        """
         version_type = self.annotation_unit.dataset['versioning_type']
         if 'rest' == version_type:
             return self.annotation_unit.dataset['version_url']
 
+        if 'date' == version_type:
+            return f"date-{date.today()}"
+
         return self.annotation_unit.dataset['versioning_type']
 
 
@@ -1,18 +1,50 @@
 """ Class to instantiate Annotation Units and support its functions"""
 
-import copy
+from collections import ChainMap
+from types import MappingProxyType
 
 
-class AnnotationUnit:
-    """ Annotation Unit Class that houses the Genomic Unit and its corresponding dataset """
+def genomic_unit_record(genomic_unit):
+    """
+    Returns a read-only record of the genomic unit that is shared by each of its annotation units rather than copied
+    for each one. A record, or an annotation unit's genomic unit, is returned as is.
+    """
+    if isinstance(genomic_unit, (MappingProxyType, ChainMap)):
+        return genomic_unit
+
+    return MappingProxyType(dict(genomic_unit))
+
+
+class AnnotationUnit:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """
+    Annotation Unit Class that houses the Genomic Unit and its corresponding dataset. The genomic unit's record is
+    shared with the genomic unit's other annotation units, and the dependencies resolved for this annotation unit are
+    kept in an overlay that is only created once a dependency is resolved.
+    """
+
+    __slots__ = (
+        "unit_record", "dependency_values", "dataset", "version", "analysis_name", "transcript_provisioned",
+        "annotation_graph", "annotation_index"
+    )
 
     def __init__(self, genomic_unit, dataset, analysis_name: str = ""):
-        self.genomic_unit = copy.deepcopy(genomic_unit)
+        self.unit_record = genomic_unit_record(genomic_unit)
+        self.dependency_values = None
         self.dataset = dataset
         self.version = ""
         self.analysis_name = analysis_name
 
         self.transcript_provisioned = False
+        self.annotation_graph = None
+        self.annotation_index = None
+
+    @property
+    def genomic_unit(self):
+        """The genomic unit's record with the annotation unit's resolved dependencies"""
+        if self.dependency_values is None:
+            return self.unit_record
+
+        return ChainMap(self.dependency_values, self.unit_record)
 
     def get_genomic_unit(self):
         """Returns 'unit' from genomic_unit"""
@@ -69,6 +101,20 @@ class AnnotationUnit:
         """Returns dependencies of the dataset of the annotation unit"""
         return self.dataset['dependencies'] if 'dependencies' in self.dataset else []
 
+    def get_cached_dependency(self):
+        """
+        Returns the name of the cached dataset dependency, such as 'ENSEMBL_VARIANT_HGVS_VARIANT_CALL_CACHE', that a
+        forge dataset extracts its annotation from. Returns None when the dataset is not forged from a cached dataset.
+        """
+        is_cached_forge_dataset = self.dataset.get('annotation_source_type'
+                                                  ) == 'forge' and self.dataset.get('base_string_cache', False)
+        if not is_cached_forge_dataset or 'attribute' not in self.dataset:
+            return None
+
+        return next((
+            dependency for dependency in self.get_dependencies() if f"{{{dependency}}}" in self.dataset['base_string']
+        ), None)
+
     def get_missing_dependencies(self):
         """
         Returns missing dependencies of the dataset of the annotation unit 
@@ -113,20 +159,10 @@ class AnnotationUnit:
         """
         Assigns annotation value to the genomic unit's missing dependency
         """
-        self.genomic_unit[missing_dependency_name] = dependency_annotation_value
-
-    def should_continue_annotation(self):
-        """
-        Checks if the annotation unit should continue to try and prepare for annotation. Each time the
-        annotation unit checks if it should continue annotation, the delay count increases.  Once it has hit the
-        magic number 10 for times checked to delay, it will return False.
-        """
-        delay_count = self.dataset['delay_count'] + 1 if 'delay_count' in self.dataset else 0
-        self.dataset['delay_count'] = delay_count
-
-        is_delay_count_exceeding = self.dataset['delay_count'] > 20
+        if self.dependency_values is None:
+            self.dependency_values = {}
 
-        return not is_delay_count_exceeding
+        self.dependency_values[missing_dependency_name] = dependency_annotation_value
 
     def set_latest_version(self, version_details):
         """Sets the Annotation Unit with the version"""
@@ -0,0 +1,75 @@
+"""Caches the versions calculated for annotation sources across annotation runs"""
+from datetime import datetime, timezone
+import threading
+import time
+
+# Returned for a version cache id without an unexpired version, since None is a version an annotation source's version
+# attribute can extract
+VERSION_NOT_CACHED = object()
+
+
+class AnnotationVersionCache:
+    """
+    A thread-safe cache of the versions calculated for annotation sources, shared by every annotation run within the
+    application process. Versions expire after a time to live so that a new release of an annotation source is
+    picked up. When a version collection is configured, versions are also persisted to MongoDB so the cache survives
+    application restarts.
+    """
+
+    def __init__(self, ttl_seconds: float = 60 * 60 * 24, version_collection=None, clock=time.time):
+        """Initializes an empty cache"""
+        self.ttl_seconds = ttl_seconds
+        self.version_collection = version_collection
+        self.clock = clock
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def configure(self, ttl_seconds: float, version_collection=None):
+        """Sets the time to live and the optional collection that persists the versions"""
+        with self.lock:
+            self.ttl_seconds = ttl_seconds
+            self.version_collection = version_collection
+
+    def get_version(self, version_cache_id: str, default=None):
+        """Returns the unexpired version cached for the version cache id, otherwise returns the default"""
+        now = self.clock()
+        with self.lock:
+            if version_cache_id in self.versions:
+                version, calculated_at = self.versions[version_cache_id]
+                if now - calculated_at < self.ttl_seconds:
+                    return version
+                del self.versions[version_cache_id]
+
+            if self.version_collection is None:
+                return default
+
+            persisted = self.version_collection.find_version(
+                version_cache_id, datetime.fromtimestamp(now - self.ttl_seconds, timezone.utc)
+            )
+            if persisted is None:
+                return default
+
+            calculated_at = persisted['calculated_at']
+            if calculated_at.tzinfo is None:
+                calculated_at = calculated_at.replace(tzinfo=timezone.utc)
+
+            self.versions[version_cache_id] = (persisted['version'], calculated_at.timestamp())
+            return persisted['version']
+
+    def set_version(self, version_cache_id: str, version):
+        """Caches the version calculated for the version cache id"""
+        calculated_at = self.clock()
+        with self.lock:
+            self.versions[version_cache_id] = (version, calculated_at)
+            if self.version_collection is not None:
+                self.version_collection.save_version(
+                    version_cache_id, version, datetime.fromtimestamp(calculated_at, timezone.utc)
+                )
+
+    def clear(self):
+        """Removes every version cached in memory"""
+        with self.lock:
+            self.versions = {}
+
+
+annotation_version_cache = AnnotationVersionCache()
@@ -0,0 +1,115 @@
+"""A long-lived worker that processes every annotation queued by the application"""
+import concurrent.futures
+import logging
+import threading
+
+from ..repository.analysis_collection import AnalysisCollection
+from ..repository.annotation_response_cache_collection import AnnotationResponseCacheCollection
+from ..repository.annotation_run_collection import AnnotationRunCollection
+from ..repository.genomic_unit_collection import GenomicUnitCollection
+
+from .annotation import AnnotationQueue, AnnotationService, annotation_log_label
+from .annotation_metrics import annotation_metrics
+from .annotation_unit import AnnotationUnit
+from .annotation_version_cache import AnnotationVersionCache
+
+logger = logging.getLogger(__name__)
+
+
+class AnnotationWorker:  # pylint: disable=too-many-instance-attributes
+    """
+    The single consumer of the annotation queue for the application. Routes only enqueue annotation units, and the
+    worker's thread processes them with one bounded pool of annotation task workers and a shared version cache, so
+    the number of concurrent annotation tasks does not grow with the number of requests. Each time the worker
+    processes the queue is one annotation run, whose summary is saved to the run collection when one is provided.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        annotation_queue: AnnotationQueue,
+        genomic_unit_collection: GenomicUnitCollection,
+        analysis_collection: AnalysisCollection,
+        response_cache: AnnotationResponseCacheCollection = None,
+        version_cache: AnnotationVersionCache = None,
+        engine: str = "threaded",
+        max_workers: int = 5,
+        run_collection: AnnotationRunCollection = None
+    ):
+        """Initializes the worker, which does not process annotations until it is started"""
+        self.queue = annotation_queue
+        self.genomic_unit_collection = genomic_unit_collection
+        self.analysis_collection = analysis_collection
+        self.response_cache = response_cache
+        self.version_cache = version_cache
+        self.engine = engine
+        self.max_workers = max_workers
+        self.run_collection = run_collection
+
+        self.work_enqueued = threading.Event()
+        self.stopping = threading.Event()
+        self.task_executor = None
+        self.thread = None
+
+    def __call__(self):
+        """Returns the worker as the dependency injected to routes that enqueue annotations"""
+        return self
+
+    def put(self, annotation_unit: AnnotationUnit):
+        """Enqueues the annotation unit to be annotated by the worker"""
+        self.queue.put(annotation_unit)
+        self.work_enqueued.set()
+
+    def is_running(self) -> bool:
+        """Returns True when the worker's thread is processing the annotation queue"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Starts the worker's thread and pool of annotation task workers"""
+        if self.is_running():
+            return
+
+        logger.info("%s Starting annotation worker...", annotation_log_label())
+        self.stopping.clear()
+        self.task_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        annotation_metrics.set_gauge("rosalution_annotation_task_workers", self.max_workers)
+        self.thread = threading.Thread(target=self.run, name="annotation-worker", daemon=True)
+        self.thread.start()
+
+        # Annotation units enqueued before the worker started are processed right away
+        self.work_enqueued.set()
+
+    def stop(self, timeout: float | None = None):
+        """Stops the worker once the annotations being processed complete, waiting up to 'timeout' seconds"""
+        if self.thread is None:
+            return
+
+        logger.info("%s Stopping annotation worker...", annotation_log_label())
+        self.stopping.set()
+        self.work_enqueued.set()
+        self.thread.join(timeout)
+        self.task_executor.shutdown(wait=False, cancel_futures=True)
+        self.thread = None
+
+    def run(self):
+        """Waits for enqueued annotation units and processes the annotation queue until the worker is stopped"""
+        while True:
+            self.work_enqueued.wait()
+            self.work_enqueued.clear()
+            if self.stopping.is_set():
+                return
+
+            try:
+                AnnotationService.process_tasks(
+                    self.queue,
+                    self.genomic_unit_collection,
+                    self.analysis_collection,
+                    engine=self.engine,
+                    response_cache=self.response_cache,
+                    version_cache=self.version_cache,
+                    task_executor=self.task_executor,
+                    run_collection=self.run_collection
+                )
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                logger.exception(
+                    "%s Annotation worker failed processing the queue [%s]", annotation_log_label(), exception
+                )
@@ -0,0 +1,114 @@
+"""Buffers the annotations saved while annotating to write them to the genomic units in bulk"""
+import time
+
+from .annotation_manifest import AnnotationManifestAccumulator
+from .annotation_metrics import annotation_metrics
+
+ANNOTATION_WRITE_BATCH_SIZE = 500
+ANNOTATION_WRITE_FLUSH_SECONDS = 1.0
+
+
+class BufferedAnnotationWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Buffers the annotations extracted for annotation units and writes them grouped by genomic unit, with one ordered
+    bulk write for each genomic unit. The buffer is flushed once it holds the batch size of writes or its oldest
+    write has waited the flush seconds. The annotation units are accumulated for their analyses' manifests and only
+    added once their annotations are written, so that a manifest never refers to an annotation that has not been
+    saved. Once written, the analyses' views of the annotation values of each of the genomic units are refreshed.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        genomic_unit_collection,
+        analysis_collection,
+        batch_size: int = ANNOTATION_WRITE_BATCH_SIZE,
+        flush_seconds: float = ANNOTATION_WRITE_FLUSH_SECONDS,
+        clock=time.monotonic
+    ):
+        """Initializes the writer with an empty buffer"""
+        self.genomic_unit_collection = genomic_unit_collection
+        self.manifest = AnnotationManifestAccumulator(analysis_collection)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.clock = clock
+
+        self.pending_writes = {}
+        self.pending_views = {}
+        self.pending_count = 0
+        self.oldest_pending_at = None
+
+    def write(self, annotation_unit, annotations: list):
+        """Buffers the annotations of the annotation unit, flushing the buffer once it holds the batch size"""
+        if len(annotations) == 0:
+            return
+
+        genomic_unit_key = (annotation_unit.get_genomic_unit_type_string(), annotation_unit.get_genomic_unit())
+        _, pending_annotations = self.pending_writes.setdefault(genomic_unit_key, (annotation_unit.genomic_unit, []))
+        pending_annotations.extend(annotations)
+        self.manifest.add(annotation_unit)
+        self.add_pending_view(annotation_unit)
+
+        self.pending(len(annotations))
+
+    def add_to_manifest(self, annotation_unit):
+        """Buffers adding an annotation unit whose annotation already exists to its analysis' manifest"""
+        self.manifest.add(annotation_unit)
+        self.add_pending_view(annotation_unit)
+        self.pending(1)
+
+    def add_pending_view(self, annotation_unit):
+        """Buffers refreshing the view of the annotation unit's analysis for its genomic unit"""
+        genomic_unit_key = (annotation_unit.get_genomic_unit_type_string(), annotation_unit.get_genomic_unit())
+        _, analysis_names = self.pending_views.setdefault(genomic_unit_key, (annotation_unit.genomic_unit, {}))
+        analysis_names[annotation_unit.analysis_name] = None
+
+    def pending(self, count: int):
+        """Counts the buffered writes, flushing the buffer once it holds the batch size"""
+        self.pending_count += count
+        if self.oldest_pending_at is None:
+            self.oldest_pending_at = self.clock()
+
+        if self.pending_count >= self.batch_size:
+            self.flush()
+
+    def has_pending_writes(self) -> bool:
+        """Returns True when there are buffered annotations or manifest entries that have not been written"""
+        return self.pending_count > 0
+
+    def seconds_until_flush(self):
+        """Returns the seconds until the buffered annotations are due to be written, or None when there are none"""
+        if not self.has_pending_writes():
+            return None
+
+        return max(0.0, self.oldest_pending_at + self.flush_seconds - self.clock())
+
+    def is_flush_due(self) -> bool:
+        """Returns True when the oldest buffered annotation has waited the flush seconds"""
+        return self.has_pending_writes() and self.seconds_until_flush() == 0
+
+    def flush_if_due(self):
+        """Writes the buffered annotations when the oldest one has waited the flush seconds"""
+        if self.is_flush_due():
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered annotations of each genomic unit, then adds their annotation units to the manifests and
+        refreshes the analyses' views of the genomic units
+        """
+        pending_writes = self.pending_writes
+        pending_views = self.pending_views
+        self.pending_writes = {}
+        self.pending_views = {}
+        self.pending_count = 0
+        self.oldest_pending_at = None
+
+        for genomic_unit, annotations in pending_writes.values():
+            with annotation_metrics.timer("rosalution_annotation_write_seconds", operation="annotations"):
+                self.genomic_unit_collection.bulk_annotate_genomic_unit(genomic_unit, annotations)
+
+        self.manifest.flush()
+
+        for genomic_unit, analysis_names in pending_views.values():
+            with annotation_metrics.timer("rosalution_annotation_write_seconds", operation="views"):
+                self.genomic_unit_collection.refresh_analysis_annotations(genomic_unit, list(analysis_names))
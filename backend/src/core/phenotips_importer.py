@@ -60,10 +60,10 @@ class PhenotipsImporter:
                 "alternate": "",
                 "build": data['reference_genome'],
                 "transcripts": [],
-                "annotations": [],
+                "annotations": {},
             }
         elif data_format == "gene":
-            genomic_data = {"gene_symbol": data['gene'], "gene": data['gene'], "annotations": []}
+            genomic_data = {"gene_symbol": data['gene'], "gene": data['gene'], "annotations": {}}
         else:
             warnings.warn("Invalid data format for import_genomic_unit_collection_data method", UserWarning)
             return None
@@ -6,6 +6,9 @@ from .repository.gridfs_bucket_collection import GridFSBucketCollection
 from .repository.user_collection import UserCollection
 from .repository.analysis_collection import AnalysisCollection
 from .repository.annotation_config_collection import AnnotationConfigCollection
+from .repository.annotation_response_cache_collection import AnnotationResponseCacheCollection
+from .repository.annotation_run_collection import AnnotationRunCollection
+from .repository.annotation_version_collection import AnnotationVersionCollection
 from .repository.genomic_unit_collection import GenomicUnitCollection
 from .repository.project_repository import ProjectRepository
 
@@ -35,7 +38,14 @@ class Database:
         self.collections = {
             "analysis": AnalysisCollection(self.database['analyses']),
             "annotation_config": AnnotationConfigCollection(self.database['annotations_config']),
-            "genomic_unit": GenomicUnitCollection(self.database['genomic_units']),
+            "annotation_response_cache": AnnotationResponseCacheCollection(self.database['annotation_response_cache']),
+            "annotation_version": AnnotationVersionCollection(self.database['annotation_versions']),
+            "annotation_run": AnnotationRunCollection(self.database['annotation_runs']),
+            "genomic_unit":
+                GenomicUnitCollection(
+                    self.database['genomic_units'], self.database['transcript_annotations'],
+                    self.database['analysis_annotation_views']
+                ),
             "user": UserCollection(self.database['users']),
             "project": ProjectRepository(self.database['users'], self.database['analyses']),
             "bucket": GridFSBucketCollection(gridfs_bucket),
@@ -5,7 +5,11 @@ import gridfs
 from pymongo import MongoClient
 from .security.oauth2 import OAuth2ClientCredentials
 
-from .core.annotation import AnnotationQueue
+from .core.annotation import AnnotationQueue, annotation_event_logger
+from .core.annotation_rate_limiter import annotation_rate_limiter
+from .core.annotation_version_cache import annotation_version_cache
+from .core.annotation_worker import AnnotationWorker
+from .conditional_response import revision_response_cache
 from .database import Database
 from .config import get_settings
 
@@ -16,7 +20,43 @@ bucket = gridfs.GridFS(mongodb_client.rosalution_db)
 
 # Database/Repositories
 database = Database(mongodb_client, bucket)
+database.collections['annotation_response_cache'].configure_eviction(
+    settings.annotation_response_cache_ttl_seconds, settings.annotation_response_cache_max_entries
+)
+
+# Annotation configuration loaded once and only loaded again when its version stamp changes
+database.collections['annotation_config'].configure_refresh(settings.annotation_config_refresh_seconds)
+
+# Rate limits shared by every annotation task requesting from annotation sources
+annotation_rate_limiter.configure(
+    settings.annotation_rate_limits, settings.annotation_http_max_retries,
+    settings.annotation_http_backoff_base_seconds, settings.annotation_http_backoff_max_seconds
+)
+
+# Versions of annotation sources shared by every annotation run, optionally persisted between restarts
+annotation_version_cache.configure(
+    settings.annotation_version_cache_ttl_seconds,
+    database.collections['annotation_version'] if settings.annotation_version_cache_persist else None
+)
+
+# Serialized responses of the latest revisions of analyses and their annotations
+revision_response_cache.configure(settings.revision_response_cache_max_entries)
+
+# Format of the annotation units' logged events and the sample of the annotation values logged when saved
+annotation_event_logger.configure(settings.annotation_log_format, settings.annotation_log_saving_sample_rate)
 
 # Queue that processess annotation tasks safely between threads
 annotation_queue = AnnotationQueue()
+
+# The single worker that processes the annotation queue, started and stopped with the application
+annotation_worker = AnnotationWorker(
+    annotation_queue,
+    database.collections['genomic_unit'],
+    database.collections['analysis'],
+    response_cache=database.collections['annotation_response_cache'],
+    version_cache=annotation_version_cache,
+    engine=settings.annotation_engine,
+    max_workers=settings.annotation_max_workers,
+    run_collection=database.collections['annotation_run']
+)
 oauth2_scheme = OAuth2ClientCredentials(tokenUrl=settings.openapi_api_token_route)
@@ -2,6 +2,7 @@
 End points for backend
 """
 
+from contextlib import asynccontextmanager
 import json
 import logging
 import logging.config
@@ -10,11 +11,17 @@ from pathlib import Path
 import urllib3
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi import FastAPI, Security
+from fastapi.responses import PlainTextResponse
+from pymongo.errors import PyMongoError
 
 from .config import get_settings
+from .core.annotation_metrics import annotation_metrics
+from .dependencies import annotation_worker, database
+from .repository.collection_indexes import ensure_indexes
 from .profiler_middleware import register_profiler_middleware
 from .routers import analysis_router, annotation_router, auth_router, project_router
+from .security.security import get_metrics_authorization
 
 urllib3.disable_warnings()
 
@@ -71,7 +78,28 @@ logging.config.fileConfig(log_file_path, disable_existing_loggers=False)
 # create logger
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="rosalution API", description=DESCRIPTION, openapi_tags=tags_metadata, root_path="/rosalution/api/")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Creates the collections' missing indexes and runs the annotation worker for the lifetime of the application"""
+    if settings.mongodb_ensure_indexes:
+        try:
+            ensure_indexes(database.database)
+        except PyMongoError as error:
+            logger.error("Failed to create the collections' indexes: %s", error)
+
+    annotation_worker.start()
+    yield
+    annotation_worker.stop(timeout=30)
+
+
+app = FastAPI(
+    title="rosalution API",
+    description=DESCRIPTION,
+    openapi_tags=tags_metadata,
+    root_path="/rosalution/api/",
+    lifespan=lifespan
+)
 
 app.include_router(analysis_router.router)
 app.include_router(annotation_router.router)
@@ -113,3 +141,18 @@ def heartbeat():
     """Returns a heart-beat that orchestration services can use to determine if the application is running"""
 
     return "thump-thump"
+
+
+@app.get(
+    "/metrics",
+    tags=["lifecycle"],
+    response_class=PlainTextResponse,
+    dependencies=[Security(get_metrics_authorization)],
+)
+def metrics():
+    """
+    Returns the annotation runs' metrics in the Prometheus text format for monitoring services to scrape with the
+    metrics scrape token or an access token
+    """
+
+    return PlainTextResponse(annotation_metrics.exposition(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,112 @@
+"""
+Repository for the materialized view of each analysis' annotation values for each of its genomic units. A view is
+the result of the aggregation matching the genomic unit's annotations to the analysis' manifest, stored with the
+analysis' name and the genomic unit so that reading an analysis' annotations is a single indexed 'find_one'.
+
+{
+    'analysis_name': 'CPAM0002',
+    'unit': 'NM_001017980.3:c.164G>T',
+    'annotations': {'ClinVar_Variation_Id': '581244'},
+    'transcripts': [{'transcript_id': 'NM_001017980.4', 'SIFT Score': 0.02}]
+}
+
+Views are refreshed whenever a genomic unit's annotations are written, and materialized on the first read of a
+missing view. Each refresh increments the view's 'revision', which identifies the view's values for responses.
+Annotations or manifests changed outside of Rosalution leave the views stale until they are removed with
+'etc/fixtures/rebuild-analysis-annotation-views.js', which the fixture scripts run after their changes.
+"""
+import hashlib
+import json
+
+from pymongo import ASCENDING
+
+from .analysis_annotations import analysis_annotations_pipeline
+
+ANALYSIS_ANNOTATION_VIEWS_COLLECTION = "analysis_annotation_views"
+
+
+class AnalysisAnnotationViewCollection:
+    """Repository adapter for the materialized views of the analyses' annotation values of genomic units"""
+
+    def __init__(self, analysis_annotation_views_collection, genomic_units_collection):
+        """
+        Initializes with the 'PyMongo' Collection objects for the 'analysis_annotation_views' collection and the
+        'genomic_units' collection the views are aggregated from
+        """
+        self.collection = analysis_annotation_views_collection
+        self.genomic_units_collection = genomic_units_collection
+        self.view_index_created = False
+
+    def find_view(self, analysis_name: str, unit: str):
+        """Returns the analysis' annotation values of the genomic unit, or None when the view does not exist"""
+        return self.collection.find_one({"analysis_name": analysis_name, "unit": unit},
+                                        {"_id": 0, "annotations": 1, "transcripts": 1})
+
+    def find_view_revision(self, analysis_name: str, unit: str):
+        """Returns the '_id' and 'revision' of the analysis' view of the genomic unit, or None when it does not exist"""
+        return self.collection.find_one({"analysis_name": analysis_name, "unit": unit}, {"_id": 1, "revision": 1})
+
+    def materialize(self, genomic_unit, analysis_name: str):
+        """
+        Aggregates the analysis' annotation values of the genomic unit and merges them into the view with one
+        aggregation, replacing the existing view's values and incrementing its revision. A view is not created for a
+        genomic unit that does not exist.
+        """
+        self.ensure_view_index()
+
+        pipeline = analysis_annotations_pipeline(genomic_unit, analysis_name)
+        pipeline.append({
+            "$addFields": {
+                "analysis_name": {"$literal": analysis_name}, "unit": {"$literal": genomic_unit['unit']},
+                "revision": {"$literal": 1}
+            }
+        })
+        pipeline.append({
+            "$merge": {
+                "into": ANALYSIS_ANNOTATION_VIEWS_COLLECTION, "on": ["analysis_name", "unit"], "whenMatched": [{
+                    "$replaceWith": {
+                        "$mergeObjects": [
+                            "$$new", {"_id": "$_id", "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}
+                        ]
+                    }
+                }], "whenNotMatched": "insert"
+            }
+        })
+
+        self.genomic_units_collection.aggregate(pipeline)
+
+    def aggregate_view(self, genomic_unit, analysis_name: str):
+        """
+        Returns the analysis' annotation values of the genomic unit aggregated from the genomic unit without its view,
+        or None when the genomic unit does not exist
+        """
+        pipeline = analysis_annotations_pipeline(genomic_unit, analysis_name)
+        return next(iter(self.genomic_units_collection.aggregate(pipeline)), None)
+
+    @staticmethod
+    def aggregated_view_revision(aggregated_view):
+        """Returns the '_id' and 'revision' identifying a view's values that were aggregated without its view"""
+        view_json = json.dumps(aggregated_view, sort_keys=True, default=str)
+        return {"_id": "aggregated", "revision": hashlib.sha1(view_json.encode("utf-8")).hexdigest()}
+
+    def ensure_view_index(self):
+        """
+        Creates the unique index of the analysis' name and genomic unit that '$merge' requires to match views, once per
+        application process
+        """
+        if self.view_index_created:
+            return
+
+        self.collection.create_index([("analysis_name", ASCENDING), ("unit", ASCENDING)],
+                                     name="analysis_annotation_view",
+                                     unique=True)
+        self.view_index_created = True
+
+    def refresh(self, genomic_unit, analysis_names: list):
+        """
+        Materializes the genomic unit's views for the analyses, and for every other analysis with a view of the
+        genomic unit since its values fall back to the genomic unit's annotations that are not in its manifest.
+        """
+        viewing_analyses = self.collection.distinct("analysis_name", {"unit": genomic_unit['unit']})
+        for analysis_name in dict.fromkeys([*analysis_names, *viewing_analyses]):
+            self.materialize(genomic_unit, analysis_name)
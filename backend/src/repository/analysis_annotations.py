@@ -0,0 +1,224 @@
+"""
+Builds the MongoDB aggregation that reads a genomic unit's annotations for an analysis. The analysis' manifest is
+joined to the genomic unit within MongoDB and each dataset is reduced to the value of the annotation matching the
+manifest's data source and version, or to the dataset's first annotation when the manifest has no matching entry.
+Only those values are returned rather than the genomic unit's document and the analysis' document.
+
+{
+    'annotations': {'CADD': 24, 'Entrez Gene Id': 203547},
+    'transcripts': [{'transcript_id': 'NM_001017980.4', 'SIFT Score': 0.02}]
+}
+"""
+from ..enums import GenomicUnitType
+
+ANALYSES_COLLECTION = "analyses"
+TRANSCRIPT_ANNOTATIONS_COLLECTION = "transcript_annotations"
+
+
+def keyed_annotations_expression(annotations_field: str):
+    """
+    Constructs the MongoDB aggregation expression that maps a genomic unit's annotations in either layout to the
+    keyed layout. A dataset that is repeated within the list layout is mapped to its last list of annotations.
+    """
+    return {
+        "$cond": [{"$isArray": [annotations_field]}, {
+            "$reduce": {"input": annotations_field, "initialValue": {}, "in": {"$mergeObjects": ["$$value", "$$this"]}}
+        }, {"$ifNull": [annotations_field, {}]}]
+    }
+
+
+def unit_manifest_expression(analyses_field: str):
+    """
+    Constructs the MongoDB aggregation expression that indexes the joined analysis' manifest entries for the genomic
+    unit once, as the list of the datasets' names and the list of their data source and version at the same position,
+    in the order of the manifest.
+
+    [{'unit': 'VMA21', 'manifest': [{'CADD': {'data_source': 'Ensembl', 'version': '112'}}]}]
+
+    becomes
+
+    {'datasets': ['CADD'], 'configurations': [['Ensembl', '112']]}
+    """
+    return {
+        "$let": {
+            "vars": {
+                "entries": {
+                    "$let": {
+                        "vars": {
+                            "unit_manifest": {"$first": {"$ifNull": [{"$first": f"{analyses_field}.manifest"}, []]}}
+                        }, "in": {
+                            "$reduce": {
+                                "input": {"$ifNull": ["$$unit_manifest.manifest", []]}, "initialValue": [],
+                                "in": {"$concatArrays": ["$$value", {"$objectToArray": "$$this"}]}
+                            }
+                        }
+                    }
+                }
+            }, "in": {
+                "datasets": "$$entries.k", "configurations": {
+                    "$map": {"input": "$$entries", "as": "entry", "in": ["$$entry.v.data_source", "$$entry.v.version"]}
+                }
+            }
+        }
+    }
+
+
+def manifest_values_expression(datasets_expression, manifest_field: str):
+    """
+    Constructs the MongoDB aggregation expression that maps each annotated dataset to the value of the annotation
+    matching the dataset's first entry within the indexed manifest, falling back to the dataset's first annotation.
+    The dataset's entry and its annotation are found by their positions, rather than by filtering the manifest and
+    the annotations for each dataset. Datasets without annotations are left out.
+    """
+    configuration_index = {"$indexOfArray": [f"{manifest_field}.datasets", "$$dataset.k"]}
+    annotation_index = {
+        "$cond": [{"$gte": ["$$configuration_index", 0]}, {
+            "$indexOfArray": [{
+                "$map": {
+                    "input": "$$dataset.v", "as": "annotation",
+                    "in": ["$$annotation.data_source", "$$annotation.version"]
+                }
+            }, {"$arrayElemAt": [f"{manifest_field}.configurations", "$$configuration_index"]}]
+        }, 0]
+    }
+    selected_annotation = {
+        "$let": {
+            "vars": {"configuration_index": configuration_index}, "in": {
+                "$let": {
+                    "vars": {"annotation_index": annotation_index},
+                    "in": {"$arrayElemAt": ["$$dataset.v", {"$max": ["$$annotation_index", 0]}]}
+                }
+            }
+        }
+    }
+
+    return {
+        "$arrayToObject": {
+            "$map": {
+                "input": {
+                    "$filter": {
+                        "input": {"$objectToArray": datasets_expression}, "as": "dataset",
+                        "cond": {"$gt": [{"$size": {"$ifNull": ["$$dataset.v", []]}}, 0]}
+                    }
+                }, "as": "dataset", "in": {
+                    "k": "$$dataset.k", "v": {
+                        "$let": {
+                            "vars": {"annotation": selected_annotation},
+                            "in": {"$ifNull": ["$$annotation.value", None]}
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+def transcripts_lookup_stage():
+    """
+    Constructs the MongoDB aggregation stage that joins the HGVS variant's transcript annotations, grouped by
+    transcript in the order the transcripts were first annotated, with the values matching the unit's manifest.
+    """
+    hgvs_variant_field = GenomicUnitType.HGVS_VARIANT.value
+    return {
+        "$lookup": {
+            "from": TRANSCRIPT_ANNOTATIONS_COLLECTION,
+            "localField": hgvs_variant_field,
+            "foreignField": hgvs_variant_field,
+            "let": {"manifest": "$manifest"},
+            "pipeline": [
+                {"$sort": {"_id": 1}},
+                {
+                    "$group": {
+                        "_id": "$transcript_id", "first_annotated": {"$first": "$_id"},
+                        "datasets": {"$push": {"k": "$data_set", "v": "$annotations"}}
+                    }
+                },
+                {"$sort": {"first_annotated": 1}},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "annotations": manifest_values_expression({"$arrayToObject": "$datasets"}, "$$manifest")
+                    }
+                },
+            ],
+            "as": "transcripts",
+        }
+    }
+
+
+def embedded_transcripts_fallback_stage():
+    """
+    Constructs the MongoDB aggregation stage that falls back to the transcripts embedded within an HGVS variant's
+    genomic unit when the variant has no transcript annotations, until they are moved to their own collection.
+    """
+    return {
+        "$set": {
+            "transcripts": {
+                "$cond": [{"$gt": [{"$size": "$transcripts"}, 0]}, "$transcripts", {
+                    "$map": {
+                        "input": {"$ifNull": ["$embedded_transcripts", []]}, "as": "transcript", "in": {
+                            "annotations":
+                                manifest_values_expression(
+                                    keyed_annotations_expression("$$transcript.annotations"), "$manifest"
+                                )
+                        }
+                    }
+                }]
+            }
+        }
+    }
+
+
+def analysis_annotations_pipeline(genomic_unit, analysis_name: str) -> list:
+    """
+    Constructs the MongoDB aggregation pipeline for the genomic unit's annotations matching the analysis' manifest.
+    The analysis is joined with only its manifest entries for the genomic unit, and an HGVS variant's transcript
+    annotations are joined from their own collection, or read from the genomic unit when they are still embedded.
+    """
+    unit = genomic_unit['unit']
+
+    pipeline = [
+        {"$match": {genomic_unit['type'].value: unit}},
+        {"$limit": 1},
+        {
+            "$lookup": {
+                "from": ANALYSES_COLLECTION,
+                "pipeline": [
+                    {"$match": {"name": analysis_name}},
+                    {"$limit": 1},
+                    {
+                        "$project": {
+                            "_id": 0, "manifest": {
+                                "$filter": {
+                                    "input": {"$ifNull": ["$manifest", []]}, "as": "unit_manifest",
+                                    "cond": {"$eq": ["$$unit_manifest.unit", unit]}
+                                }
+                            }
+                        }
+                    },
+                ],
+                "as": "analysis",
+            }
+        },
+        {
+            "$project": {
+                "_id": 0, genomic_unit['type'].value: 1, "annotations": 1,
+                "manifest": unit_manifest_expression("$analysis")
+            }
+        },
+    ]
+
+    if genomic_unit['type'] == GenomicUnitType.HGVS_VARIANT:
+        pipeline[-1]["$project"]["embedded_transcripts"] = "$transcripts"
+
+    projection = {
+        "_id": 0, "annotations": manifest_values_expression(keyed_annotations_expression("$annotations"), "$manifest")
+    }
+    if genomic_unit['type'] == GenomicUnitType.HGVS_VARIANT:
+        pipeline.append(transcripts_lookup_stage())
+        pipeline.append(embedded_transcripts_fallback_stage())
+        projection["transcripts"] = "$transcripts.annotations"
+
+    pipeline.append({"$project": projection})
+
+    return pipeline
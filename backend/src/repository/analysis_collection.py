@@ -5,7 +5,8 @@ from typing import List
 from uuid import uuid4
 
 from bson import ObjectId
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from ..core.annotation_unit import AnnotationUnit
 
@@ -18,6 +19,19 @@ from .analysis_collection_summary import AnalysisCollectionSummary
 # Disabling due to pushing a refactor of Analysis Collection to a later time.
 
 
+def with_revision(update: dict) -> dict:
+    """
+    Returns the update that also increments the analysis' revision. Every update of an analysis, other than to its
+    manifest, increments the revision so that the responses built from an analysis are identified by its revision.
+    A revision within the fields being set, such as when setting the whole analysis document, is left to the increment.
+    """
+    revised_update = {**update, "$inc": {**update.get("$inc", {}), "revision": 1}}
+    if "revision" in update.get("$set", {}):
+        revised_update["$set"] = {field: value for field, value in update["$set"].items() if field != "revision"}
+
+    return revised_update
+
+
 class AnalysisCollection:
     """Repository to access analyses for projects"""
 
@@ -40,6 +54,10 @@ class AnalysisCollection:
 
         return query_result
 
+    def find_revision(self, name: str):
+        """Returns the '_id' and 'revision' of an analysis by name, or None when the analysis does not exist"""
+        return self.collection.find_one({"name": name}, {"_id": 1, "revision": 1})
+
     def project_id_by_name(self, name: str) -> str:
         """Returns analysis by searching for name"""
         return str(self.collection.find_one({"name": name}, {"project_id": 1, "_id": 0})['project_id'])
@@ -107,11 +125,15 @@ class AnalysisCollection:
 
         self.collection.find_one_and_update({
             "name": analysis_name, "genomic_units.gene": {"$ne": new_genomic_unit["gene"]}
-        }, {
-            '$addToSet': {
-                "genomic_units": {"gene": new_genomic_unit["gene"], "transcripts": [], "variants": [], "manual": True}
-            }
-        })
+        },
+                                            with_revision({
+                                                '$addToSet': {
+                                                    "genomic_units": {
+                                                        "gene": new_genomic_unit["gene"], "transcripts": [],
+                                                        "variants": [], "manual": True
+                                                    }
+                                                }
+                                            }))
 
         hgvs_variant = new_genomic_unit["transcript"] + ":" + new_genomic_unit["cdna"]
         find_filter = {
@@ -119,16 +141,17 @@ class AnalysisCollection:
         }
 
         updated_analysis = self.collection.find_one_and_update(
-            find_filter, {
+            find_filter,
+            with_revision({
                 '$addToSet': {
                     "genomic_units.$[unit].transcripts": {"transcript": new_genomic_unit["transcript"]},
                     "genomic_units.$[unit].variants": {
-                        "hgvs_variant": hgvs_variant, "c_dot": new_genomic_unit["cdna"], "p_dot":
-                            new_genomic_unit["protein"], "build": "GRCh38",
+                        "hgvs_variant": hgvs_variant, "c_dot": new_genomic_unit["cdna"],
+                        "p_dot": new_genomic_unit["protein"], "build": "GRCh38",
                         "case": [{"field": "Reason of Interest", "value": new_genomic_unit["reason_of_interest"]}]
                     }
                 }
-            },
+            }),
             array_filters=[{
                 "unit.gene": new_genomic_unit["gene"],
                 "unit.variants": {"$not": {"$elemMatch": {'hgvs_variant': hgvs_variant}}}
@@ -144,12 +167,16 @@ class AnalysisCollection:
         """
         Edits the reason of interest for manually added genomic unit by analysis name, gene, and variant.
         """
-        updated_analysis = self.collection.find_one_and_update({"name": analysis_name, "genomic_units.gene": gene}, {
-            '$set': {
-                "genomic_units.$[unit].variants.$[variant].case":
-                    [{"field": "Reason of Interest", "value": reason_of_interest}]
-            }
-        },
+        updated_analysis = self.collection.find_one_and_update({"name": analysis_name, "genomic_units.gene": gene},
+                                                               with_revision({
+                                                                   '$set': {
+                                                                       "genomic_units.$[unit].variants.$[variant].case":
+                                                                           [{
+                                                                               "field": "Reason of Interest",
+                                                                               "value": reason_of_interest
+                                                                           }]
+                                                                   }
+                                                               }),
                                                                array_filters=[{"unit.gene": gene},
                                                                               {"variant.hgvs_variant": hgvs_variant}],
                                                                return_document=ReturnDocument.AFTER)
@@ -181,13 +208,16 @@ class AnalysisCollection:
                     "variants": {"$elemMatch": {"hgvs_variant": hgvs_variant, "case.field": "Reason of Interest"}}
                 }
             }
-        }, {"$pull": {"genomic_units.$[unit].variants": {"hgvs_variant": hgvs_variant}}},
+        },
+                                   with_revision({
+                                       "$pull": {"genomic_units.$[unit].variants": {"hgvs_variant": hgvs_variant}}
+                                   }),
                                    array_filters=[{'unit.gene': gene}])
 
         self.collection.update_one({
             "name": analysis_name,
             "genomic_units": {"$elemMatch": {"gene": gene, "manual": True, "variants.0": {"$exists": False}}},
-        }, {"$pull": {"genomic_units": {"gene": gene}}})
+        }, with_revision({"$pull": {"genomic_units": {"gene": gene}}}))
 
         updated_analysis = self.collection.find_one({"name": analysis_name})
 
@@ -215,6 +245,36 @@ class AnalysisCollection:
 
         return updated_document['manifest']
 
+    def add_datasets_to_manifest(self, analysis_name: str, unit_datasets: dict, return_manifest: bool = False):
+        """
+        Adds the datasets and their versions for each genomic unit to this Analysis within one ordered bulk write,
+        using one '$addToSet' with '$each' for each genomic unit's datasets. The manifest is only returned when
+        requested.
+
+        unit_datasets = {
+            'VMA21': [{'Entrez Gene Id': {'data_source': 'HGNC', 'version': '2024-09-06'}}]
+        }
+        """
+        operations = []
+        for unit, datasets in unit_datasets.items():
+            operations.append(
+                UpdateOne({"name": analysis_name, "manifest.unit": {"$ne": unit}},
+                          {'$addToSet': {'manifest': {'unit': unit, 'manifest': []}}})
+            )
+            operations.append(
+                UpdateOne({"name": analysis_name, "manifest.unit": unit},
+                          {"$addToSet": {"manifest.$[entry].manifest": {"$each": datasets}}},
+                          array_filters=[{'entry.unit': unit}])
+            )
+
+        if len(operations) > 0:
+            self.collection.bulk_write(operations, ordered=True)
+
+        if not return_manifest:
+            return None
+
+        return self.get_dataset_manifest(analysis_name)
+
     def get_manifest_dataset_config(self, analysis_name: str, omic_unit: str, dataset_name: str):
         """ Returns an individual dataset manifest """
 
@@ -255,15 +315,25 @@ class AnalysisCollection:
         return analysis['manifest']
 
     def create_analysis(self, project_id: str, project_name: str, analysis_data: dict):
-        """Creates a new analysis if the name does not already exist"""
+        """
+        Creates a new analysis if the name does not already exist within any project, since analyses are identified by
+        their name alone
+        """
 
         analysis_data['project_id'] = ObjectId(project_id)
         analysis_data['project_name'] = project_name
 
-        if self.collection.find_one({"name": analysis_data["name"], "project_name": project_name}) is not None:
-            raise ValueError(f"Analysis '{analysis_data['name']}' already exists within Project '{project_name}'")
+        existing_analysis = self.collection.find_one({"name": analysis_data["name"]}, {"project_name": 1})
+        if existing_analysis is not None:
+            existing_project_name = existing_analysis.get('project_name', project_name)
+            raise ValueError(
+                f"Analysis '{analysis_data['name']}' already exists within Project '{existing_project_name}'"
+            )
 
-        return self.collection.insert_one(analysis_data)
+        try:
+            return self.collection.insert_one(analysis_data)
+        except DuplicateKeyError as error:
+            raise ValueError(f"Analysis '{analysis_data['name']}' already exists") from error
 
     def attach_third_party_link(self, analysis_name: str, third_party_enum: str, link: str):
         """ Returns an analysis with a third party link attached to it """
@@ -281,14 +351,14 @@ class AnalysisCollection:
             # Update the existing link
             updated_document = self.collection.find_one_and_update(
                 {"name": analysis_name, "third_party_links.type": third_party_enum},
-                {"$set": {"third_party_links.$.link": link}},
+                with_revision({"$set": {"third_party_links.$.link": link}}),
                 return_document=ReturnDocument.AFTER,
             )
         else:
             # Add a new link to the list
             updated_document = self.collection.find_one_and_update(
                 {"name": analysis_name},
-                {"$push": {"third_party_links": {"type": third_party_enum, "link": link}}},
+                with_revision({"$push": {"third_party_links": {"type": third_party_enum, "link": link}}}),
                 return_document=ReturnDocument.AFTER,
             )
 
@@ -306,7 +376,7 @@ class AnalysisCollection:
 
         updated_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$set": {"timeline": analysis["timeline"]}},
+            with_revision({"$set": {"timeline": analysis["timeline"]}}),
             return_document=ReturnDocument.AFTER,
         )
         # remove the _id field from the returned document since it is not JSON serializable
@@ -317,7 +387,7 @@ class AnalysisCollection:
         """Updates the Nominator field within an analysis"""
         updated_analysis_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$set": {"nominated_by": nominator,}},
+            with_revision({"$set": {"nominated_by": nominator,}}),
             return_document=ReturnDocument.AFTER,
         )
         updated_analysis_document.pop("_id", None)
@@ -331,7 +401,7 @@ class AnalysisCollection:
                 for content in section["content"]:
                     if content["field"] == field_name:
                         content["value"] = updated_value["value"]
-        self.collection.update_one({"name": name}, {"$set": query_results_to_update})
+        self.collection.update_one({"name": name}, with_revision({"$set": query_results_to_update}))
 
     def update_analysis_sections(self, analysis_name: str, updated_sections: List[Section]):
         """Updates each of the sections and fields within the sections if they exist in the database"""
@@ -365,7 +435,7 @@ class AnalysisCollection:
             if field['field'] == field_name:
                 field['value'] = [field_value_file]
 
-        self.collection.update_one({"name": analysis_name}, {'$set': updated_document})
+        self.collection.update_one({"name": analysis_name}, with_revision({'$set': updated_document}))
 
     def attach_section_attachment_link(
         self, analysis_name: str, section_name: str, field_name: str, field_value_link: object
@@ -400,7 +470,7 @@ class AnalysisCollection:
 
         self.collection.find_one_and_update(
             {"name": analysis_name},
-            {'$set': updated_document},
+            with_revision({'$set': updated_document}),
             return_document=ReturnDocument.AFTER,
         )
 
@@ -431,7 +501,8 @@ class AnalysisCollection:
             if content_row["field"] and content_row["field"] == field_name:
                 content_row["value"].append({'file_id': str(file_id)})
 
-        return self.collection.find_one_and_update({"name": analysis_name}, {'$set': updated_document},
+        return self.collection.find_one_and_update({"name": analysis_name},
+                                                   with_revision({'$set': updated_document}),
                                                    return_document=ReturnDocument.AFTER)
 
     def update_section_image(
@@ -462,7 +533,8 @@ class AnalysisCollection:
                         content_row["value"].append({'file_id': str(file_id)})
                         break
 
-        updated_analysis_json = self.collection.find_one_and_update({'name': analysis_name}, {'$set': updated_document},
+        updated_analysis_json = self.collection.find_one_and_update({'name': analysis_name},
+                                                                    with_revision({'$set': updated_document}),
                                                                     return_document=ReturnDocument.AFTER)
 
         return updated_analysis_json['sections']
@@ -494,7 +566,8 @@ class AnalysisCollection:
                             content_row['value'].pop(i)
                             break
 
-        updated_analysis_json = self.collection.find_one_and_update({'name': analysis_name}, {'$set': updated_document},
+        updated_analysis_json = self.collection.find_one_and_update({'name': analysis_name},
+                                                                    with_revision({'$set': updated_document}),
                                                                     return_document=ReturnDocument.AFTER)
         return updated_analysis_json['sections']
 
@@ -502,7 +575,9 @@ class AnalysisCollection:
         """ Appends a new discussion post to an analysis """
 
         updated_document = self.collection.find_one_and_update({"name": analysis_name},
-                                                               {"$push": {"discussions": discussion_post}},
+                                                               with_revision({
+                                                                   "$push": {"discussions": discussion_post}
+                                                               }),
                                                                return_document=ReturnDocument.AFTER)
 
         updated_document.pop("_id", None)
@@ -512,9 +587,12 @@ class AnalysisCollection:
     def updated_discussion_post(self, discussion_post_id: str, discussion_content: list, analysis_name: str):
         """ Edits a discussion post from an analysis to update the discussion post's content """
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$set": {"discussions.$[item].content": discussion_content}
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$set": {
+                                                                       "discussions.$[item].content": discussion_content
+                                                                   }
+                                                               }),
                                                                array_filters=[{"item.post_id": discussion_post_id}],
                                                                return_document=ReturnDocument.AFTER)
 
@@ -524,13 +602,16 @@ class AnalysisCollection:
     def clear_discussion_post_content(self, discussion_post_id: str, analysis_name: str):
         """ Removes a discussion post from an analysis """
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$set": {
-                "discussions.$[item].author_id": "", "discussions.$[item].author_fullname": "",
-                "discussions.$[item].content": [], "discussions.$[item].attachments": [], "discussions.$[item].deleted":
-                    True
-            }
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$set": {
+                                                                       "discussions.$[item].author_id": "",
+                                                                       "discussions.$[item].author_fullname": "",
+                                                                       "discussions.$[item].content": [],
+                                                                       "discussions.$[item].attachments": [],
+                                                                       "discussions.$[item].deleted": True
+                                                                   }
+                                                               }),
                                                                array_filters=[{"item.post_id": discussion_post_id}],
                                                                return_document=ReturnDocument.AFTER)
 
@@ -541,9 +622,12 @@ class AnalysisCollection:
     def delete_discussion_post(self, discussion_post_id: str, analysis_name: str):
         """ Removes a discussion post from an analysis """
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$pull": {"discussions": {"post_id": discussion_post_id}}
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$pull": {
+                                                                       "discussions": {"post_id": discussion_post_id}
+                                                                   }
+                                                               }),
                                                                return_document=ReturnDocument.AFTER)
 
         updated_document.pop("_id", None)
@@ -553,9 +637,12 @@ class AnalysisCollection:
     def add_discussion_reply(self, discussion_post_id: str, analysis_name: str, discussion_reply: object):
         """ Appends a new discussion reply to an existing discussion post to an analysis """
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$push": {"discussions.$[item].thread": discussion_reply}
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$push": {
+                                                                       "discussions.$[item].thread": discussion_reply
+                                                                   }
+                                                               }),
                                                                array_filters=[{"item.post_id": discussion_post_id}],
                                                                return_document=ReturnDocument.AFTER)
 
@@ -568,9 +655,13 @@ class AnalysisCollection:
     ):
         """ Edits a discussion reply from an analysis to update the discussion reply's content """
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$set": {"discussions.$[post].thread.$[reply].content": discussion_reply_content}
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$set": {
+                                                                       "discussions.$[post].thread.$[reply].content":
+                                                                           discussion_reply_content
+                                                                   }
+                                                               }),
                                                                array_filters=[{"post.post_id": discussion_post_id},
                                                                               {"reply.reply_id": discussion_reply_id}],
                                                                return_document=ReturnDocument.AFTER)
@@ -582,9 +673,14 @@ class AnalysisCollection:
     def delete_discussion_reply(self, discussion_post_id: str, analysis_name: str, discussion_reply_id: str):
         """ Removes a Discussion Reply from a Discussion Post's Thread"""
 
-        updated_document = self.collection.find_one_and_update({"name": analysis_name}, {
-            "$pull": {"discussions.$[post].thread": {"reply_id": discussion_reply_id}}
-        },
+        updated_document = self.collection.find_one_and_update({"name": analysis_name},
+                                                               with_revision({
+                                                                   "$pull": {
+                                                                       "discussions.$[post].thread": {
+                                                                           "reply_id": discussion_reply_id
+                                                                       }
+                                                                   }
+                                                               }),
                                                                array_filters=[{"post.post_id": discussion_post_id}],
                                                                return_document=ReturnDocument.AFTER)
 
@@ -603,7 +699,7 @@ class AnalysisCollection:
         }
         updated_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$push": {"attachments": new_attachment}},
+            with_revision({"$push": {"attachments": new_attachment}}),
             return_document=ReturnDocument.AFTER,
         )
         return updated_document
@@ -616,7 +712,7 @@ class AnalysisCollection:
         }
         updated_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$push": {"attachments": new_attachment}},
+            with_revision({"$push": {"attachments": new_attachment}}),
             return_document=ReturnDocument.AFTER,
         )
 
@@ -639,7 +735,7 @@ class AnalysisCollection:
 
         updated_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$set": {"attachments": analysis_attachments}},
+            with_revision({"$set": {"attachments": analysis_attachments}}),
             return_document=ReturnDocument.AFTER,
         )
 
@@ -654,7 +750,7 @@ class AnalysisCollection:
         del analysis_attachments[index_to_remove]
         updated_document = self.collection.find_one_and_update(
             {"name": analysis_name},
-            {"$set": {"attachments": analysis_attachments}},
+            with_revision({"$set": {"attachments": analysis_attachments}}),
             return_document=ReturnDocument.AFTER,
         )
 
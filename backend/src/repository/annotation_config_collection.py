@@ -1,15 +1,38 @@
 """
 Manages the annotation configuration of various genomic units according to the
 type of Genomic Unit.
+
+The configuration is loaded once into a registry indexed by genomic unit type and only loaded again when the
+collection's version stamp changes. The version stamp is the latest '_id', the latest 'updated_at', and the number of
+datasets, and is checked at most once within the refresh interval. Every change to the configuration outside of
+Rosalution sets the changed datasets' 'updated_at', as 'etc/database/set-new-annotations-configuration.sh' and the
+fixture scripts do, so that datasets edited in place are loaded again:
+
+    db.annotations_config.updateOne({'data_set': 'CADD'}, {'$set': {...}, '$currentDate': {'updated_at': true}})
+
+A dataset edited without setting its 'updated_at' is only loaded again once the application restarts.
 """
+import threading
+import time
+
+from ..core.annotation_config_registry import AnnotationConfigRegistry
 
 
 class AnnotationConfigCollection:
     """Repository for querying configurations for annotation"""
 
-    def __init__(self, annotation_config_collection):
+    def __init__(self, annotation_config_collection, refresh_seconds: float = 0, clock=time.time):
         """Initializes with the 'PyMongo' Collection object for the Data sets collection"""
         self.collection = annotation_config_collection
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.loaded_registry = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def configure_refresh(self, refresh_seconds: float):
+        """Sets the interval within which the loaded configuration is used without checking its version stamp"""
+        self.refresh_seconds = refresh_seconds
 
     def all(self):
         """Returns all annotation configurations"""
@@ -19,10 +42,49 @@ class AnnotationConfigCollection:
         """Returns a data set source that matches by name"""
         return self.collection.findOne({"data_set": dataset_name})
 
+    def version_stamp(self):
+        """
+        Returns the latest '_id' and 'updated_at' of the datasets' configurations and the number of configured datasets
+        with one aggregation
+        """
+        pipeline = [{
+            "$group": {
+                "_id": None, "latest_id": {"$max": "$_id"}, "updated_at": {"$max": "$updated_at"},
+                "datasets": {"$sum": 1}
+            }
+        }]
+        stamp = next(iter(self.collection.aggregate(pipeline)), None)
+        if stamp is None:
+            return (None, None, 0)
+
+        return (stamp['latest_id'], stamp['updated_at'], stamp['datasets'])
+
+    def registry(self) -> AnnotationConfigRegistry:
+        """
+        Returns the loaded configuration registry, loading it again when its version stamp changed since the last
+        check outside the refresh interval
+        """
+        now = self.clock()
+        with self.lock:
+            if self.loaded_registry is not None and now - self.checked_at < self.refresh_seconds:
+                return self.loaded_registry
+
+            version_stamp = self.version_stamp()
+            if self.loaded_registry is None or self.loaded_registry.version_stamp != version_stamp:
+                self.loaded_registry = AnnotationConfigRegistry(list(self.all()), version_stamp)
+
+            self.checked_at = now
+            return self.loaded_registry
+
+    def refresh(self):
+        """Loads the configuration again on the next use of the registry regardless of its version stamp"""
+        with self.lock:
+            self.loaded_registry = None
+
     def datasets_to_annotate_by_type(self, types):
         """gets dataset configurations according to the types"""
-        configuration = self.all()
-        return [dataset for dataset in configuration if dataset["genomic_unit_type"] in types]
+        registry = self.registry()
+        return [dataset for genomic_unit_type in types for dataset in registry.datasets_for_type(genomic_unit_type)]
 
     def datasets_to_annotate_for_units(self, genomic_units_to_annotate):
         """
@@ -31,14 +93,8 @@ class AnnotationConfigCollection:
         """
         types_to_annotate = set(map(lambda x: x["type"], genomic_units_to_annotate))
 
-        datasets_to_annotate = self.datasets_to_annotate_by_type(types_to_annotate)
-
-        configuration = {}
-        for genomic_unit_type in types_to_annotate:
-            configuration[genomic_unit_type] = []
-
-        for dataset in datasets_to_annotate:
-            genomic_unit_type = dataset['genomic_unit_type']
-            configuration[genomic_unit_type].append(dataset)
-
-        return configuration
+        registry = self.registry()
+        return {
+            genomic_unit_type: list(registry.datasets_for_type(genomic_unit_type))
+            for genomic_unit_type in types_to_annotate
+        }
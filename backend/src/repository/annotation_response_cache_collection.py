@@ -0,0 +1,96 @@
+"""
+Caches the responses from annotation sources across annotation runs within MongoDB.
+"""
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+
+from pymongo import ASCENDING
+
+
+class AnnotationResponseCacheCollection:
+    """
+    Repository for caching annotation source responses. A response is addressed by the url it was requested from,
+    the dataset's data source, and the data source's calculated version, so a new version of an annotation source
+    is always requested again. Responses expire after a time to live and the oldest responses are evicted once the
+    cache exceeds its maximum number of responses.
+    """
+
+    def __init__(self, response_cache_collection, ttl_seconds: int = 30 * 24 * 60 * 60, max_entries: int = 50000):
+        """Initializes with the 'PyMongo' Collection object for the annotation response cache collection"""
+        self.collection = response_cache_collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.expiration_index_created = False
+        self.approximate_count = None
+
+    def configure_eviction(self, ttl_seconds: int, max_entries: int):
+        """Sets the time to live and the maximum number of cached responses"""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    @staticmethod
+    def cache_key(url: str, data_source: str, version) -> str:
+        """Returns the content address of a response for the url, data source, and version"""
+        key_json = json.dumps([url, data_source, version], sort_keys=True, default=str)
+        return hashlib.sha256(key_json.encode("utf-8")).hexdigest()
+
+    def find_response(self, url: str, data_source: str, version):
+        """Returns the cached response for the url, data source, and version, otherwise returns None"""
+        cached = self.collection.find_one({
+            "_id": self.cache_key(url, data_source, version), "expires_at": {"$gt": datetime.now(timezone.utc)}
+        }, {"response": 1})
+
+        if cached is None:
+            return None
+
+        return json.loads(cached['response'])
+
+    def save_response(self, url: str, data_source: str, version, response):
+        """
+        Caches the response for the url, data source, and version. The response is stored as serialized JSON since
+        the keys within an annotation source's response are not always valid MongoDB field names.
+        """
+        self.ensure_expiration_index()
+
+        cached_at = datetime.now(timezone.utc)
+        updated = self.collection.update_one({"_id": self.cache_key(url, data_source, version)}, {
+            "$set": {
+                "url": url, "data_source": data_source, "version": str(version), "response": json.dumps(response),
+                "cached_at": cached_at, "expires_at": cached_at + timedelta(seconds=self.ttl_seconds)
+            }
+        },
+                                             upsert=True)
+
+        if self.approximate_count is None:
+            self.approximate_count = self.collection.estimated_document_count()
+        elif updated.upserted_id is not None:
+            self.approximate_count += 1
+
+        if self.approximate_count > self.max_entries:
+            self.evict_oldest_responses()
+
+    def evict_oldest_responses(self):
+        """
+        Removes the oldest cached responses when the cache holds more than its maximum number of responses. The
+        count tracked within this process misses responses cached by other processes and expired by MongoDB, so it is
+        counted again before evicting.
+        """
+        cached_count = self.collection.estimated_document_count()
+        self.approximate_count = cached_count
+        if cached_count <= self.max_entries:
+            return
+
+        # Evicts an additional tenth of the cache so that eviction is not needed again on every saved response
+        evict_count = cached_count - self.max_entries + self.max_entries // 10
+        oldest = self.collection.find({}, {"_id": 1}).sort("cached_at", ASCENDING).limit(evict_count)
+        evicted = self.collection.delete_many({"_id": {"$in": [cached['_id'] for cached in oldest]}})
+        self.approximate_count = cached_count - evicted.deleted_count
+
+    def ensure_expiration_index(self):
+        """Creates the TTL index that lets MongoDB remove expired responses, once per application process"""
+        if self.expiration_index_created:
+            return
+
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.expiration_index_created = True
@@ -0,0 +1,15 @@
+"""
+Stores the summary of each annotation run, the metrics recorded while the annotation worker processed the queue.
+"""
+
+
+class AnnotationRunCollection:  # pylint: disable=too-few-public-methods
+    """Repository for the summaries of annotation runs"""
+
+    def __init__(self, annotation_run_collection):
+        """Initializes with the 'PyMongo' Collection object for the annotation runs collection"""
+        self.collection = annotation_run_collection
+
+    def save_run(self, run_summary: dict):
+        """Saves the annotation run's summary"""
+        self.collection.insert_one(dict(run_summary))
@@ -0,0 +1,26 @@
+"""
+Persists the versions calculated for annotation sources so they are shared across application restarts.
+"""
+from datetime import datetime
+
+
+class AnnotationVersionCollection:
+    """Repository for the versions calculated for annotation sources by their version cache id"""
+
+    def __init__(self, annotation_version_collection):
+        """Initializes with the 'PyMongo' Collection object for the annotation versions collection"""
+        self.collection = annotation_version_collection
+
+    def find_version(self, version_cache_id: str, calculated_after: datetime):
+        """
+        Returns the version and when it was calculated for the version cache id if it was calculated after
+        'calculated_after', otherwise returns None.
+        """
+        return self.collection.find_one({"_id": version_cache_id, "calculated_at": {"$gt": calculated_after}},
+                                        {"_id": 0, "version": 1, "calculated_at": 1})
+
+    def save_version(self, version_cache_id: str, version, calculated_at: datetime):
+        """Saves the version calculated for the version cache id"""
+        self.collection.update_one({"_id": version_cache_id},
+                                   {"$set": {"version": version, "calculated_at": calculated_at}},
+                                   upsert=True)
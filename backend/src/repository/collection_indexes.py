@@ -0,0 +1,125 @@
+"""
+Declares the indexes required by the queries of the application's collections. The indexes are created at startup,
+or with the command line, and the indexes missing from a database can be reported without creating them.
+
+    python -m src.repository.collection_indexes [--check]
+"""
+import argparse
+import logging
+import sys
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_INDEXES = {
+    "analyses": [
+        IndexModel([("name", ASCENDING)], name="analysis_name", unique=True),
+        IndexModel([("manifest.unit", ASCENDING)], name="analysis_manifest_unit"),
+    ],
+    "analysis_annotation_views": [
+        IndexModel([("analysis_name", ASCENDING), ("unit", ASCENDING)], name="analysis_annotation_view", unique=True),
+        IndexModel([("unit", ASCENDING)], name="analysis_annotation_view_unit"),
+    ],
+    "genomic_units": [
+        IndexModel([("gene", ASCENDING)],
+                   name="genomic_unit_gene",
+                   unique=True,
+                   partialFilterExpression={"gene": {"$type": "string"}}),
+        IndexModel([("hgvs_variant", ASCENDING)],
+                   name="genomic_unit_hgvs_variant",
+                   unique=True,
+                   partialFilterExpression={"hgvs_variant": {"$type": "string"}}),
+    ],
+    "transcript_annotations": [
+        IndexModel([("hgvs_variant", ASCENDING), ("transcript_id", ASCENDING), ("data_set", ASCENDING)],
+                   name="transcript_annotation_dataset",
+                   unique=True),
+        IndexModel([("hgvs_variant", ASCENDING), ("data_set", ASCENDING)],
+                   name="transcript_annotation_variant_dataset"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], name="user_username", unique=True),
+        IndexModel([("client_id", ASCENDING)],
+                   name="user_client_id",
+                   unique=True,
+                   partialFilterExpression={"client_id": {"$type": "string"}}),
+    ],
+}
+
+
+def index_key(index_document: dict) -> tuple:
+    """Returns the fields and directions of an index, which identify the index regardless of its name"""
+    return tuple((field, direction) for field, direction in dict(index_document['key']).items())
+
+
+def find_missing_indexes(database) -> list:
+    """
+    Returns the (collection name, index model) of each required index that is missing from the database. An index
+    with the same fields under another name satisfies the required index, unless the required index is unique and
+    the existing index is not.
+    """
+    missing_indexes = []
+    for collection_name, index_models in REQUIRED_INDEXES.items():
+        existing_indexes = database[collection_name].index_information().values()
+        existing = {(index_key(index), index.get('unique', False)) for index in existing_indexes}
+
+        for index_model in index_models:
+            required_key = index_key(index_model.document)
+            required_unique = index_model.document.get('unique', False)
+            if (required_key, True) in existing or (required_key, required_unique) in existing:
+                continue
+
+            missing_indexes.append((collection_name, index_model))
+
+    return missing_indexes
+
+
+def ensure_indexes(database) -> list:
+    """
+    Creates the required indexes missing from the database and returns the names of the indexes created. An index
+    that cannot be created, such as a unique index on a collection with duplicate values, is logged and skipped so
+    that the remaining indexes are still created.
+    """
+    created_indexes = []
+    for collection_name, index_model in find_missing_indexes(database):
+        index_name = index_model.document['name']
+        try:
+            database[collection_name].create_indexes([index_model])
+        except PyMongoError as error:
+            logger.error("Failed to create index '%s' on '%s': %s", index_name, collection_name, error)
+            continue
+
+        logger.info("Created index '%s' on '%s'", index_name, collection_name)
+        created_indexes.append(index_name)
+
+    return created_indexes
+
+
+def main():
+    """Creates the missing indexes, or reports them when checking, and exits with 1 when an index is missing"""
+    # Imported here so that the settings are only required when the indexes are managed from the command line
+    from ..config import get_settings  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report the missing indexes without creating them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    settings = get_settings()
+    database = MongoClient(f"mongodb://{settings.mongodb_host}/{settings.mongodb_db}").rosalution_db
+
+    if not args.check:
+        ensure_indexes(database)
+
+    missing_indexes = find_missing_indexes(database)
+    for collection_name, index_model in missing_indexes:
+        print(f"Missing index '{index_model.document['name']}' on '{collection_name}'")
+
+    sys.exit(1 if missing_indexes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Reads and writes a genomic unit's annotations in either of the layouts they are stored in. Annotations were stored
+as a list of single dataset objects, which are being migrated to an object keyed by the dataset's name so that a
+dataset's annotations are found without scanning every dataset.
+
+List layout
+    'annotations': [{'CADD': [{'data_source': 'Ensembl', 'version': '112', 'value': 24}]}, {'SIFT Score': [...]}]
+
+Keyed layout
+    'annotations': {'CADD': [{'data_source': 'Ensembl', 'version': '112', 'value': 24}], 'SIFT Score': [...]}
+
+New genomic units are created with the keyed layout, and both layouts are supported until every genomic unit has
+been migrated with 'etc/fixtures/migrations/genomic-units-keyed-annotations.js'.
+"""
+
+LIST_LAYOUT_FILTER = {"annotations": {"$type": "array"}}
+KEYED_LAYOUT_FILTER = {"annotations": {"$not": {"$type": "array"}}}
+
+
+def annotation_entry(genomic_annotation) -> dict:
+    """Returns the entry of an annotation to add to its dataset's list of annotations"""
+    return {
+        'data_source': genomic_annotation['data_source'],
+        'version': genomic_annotation['version'],
+        'value': genomic_annotation['value'],
+    }
+
+
+def is_keyed_layout(annotations) -> bool:
+    """Returns True when the annotations are keyed by the dataset's name rather than a list of datasets"""
+    return isinstance(annotations, dict)
+
+
+def get_dataset_annotations(annotations, dataset_name: str):
+    """Returns the list of annotations for the dataset, otherwise returns None when the dataset is not annotated"""
+    if is_keyed_layout(annotations):
+        return annotations.get(dataset_name)
+
+    return next((dataset[dataset_name] for dataset in annotations if dataset_name in dataset), None)
+
+
+def iterate_datasets(annotations):
+    """Yields the name and list of annotations of each annotated dataset"""
+    if is_keyed_layout(annotations):
+        yield from annotations.items()
+        return
+
+    for dataset in annotations:
+        yield from dataset.items()
+
+
+def set_dataset_annotations(annotations, dataset_name: str, dataset_annotations: list):
+    """Sets the list of annotations for a dataset that is not yet annotated"""
+    if is_keyed_layout(annotations):
+        annotations[dataset_name] = dataset_annotations
+        return
+
+    annotations.append({dataset_name: dataset_annotations})
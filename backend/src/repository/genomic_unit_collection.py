@@ -4,11 +4,15 @@ Manages the genomic units and their subsequent annotations within MongoDB.
 import logging
 
 from bson import ObjectId
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
 
 from src.enums import GenomicUnitType
 from src.core.annotation_unit import AnnotationUnit
 
+from .analysis_annotation_view_collection import AnalysisAnnotationViewCollection
+from .genomic_unit_annotations import KEYED_LAYOUT_FILTER, LIST_LAYOUT_FILTER, annotation_entry
+from .genomic_unit_annotations import get_dataset_annotations, set_dataset_annotations
 from .genomic_unit_collection_for_transcripts import GenomicUnitCollectionForTranscripts
 
 logger = logging.getLogger(__name__)
@@ -30,11 +34,15 @@ class GenomicUnitQuery():
         return self.genomic_annotation['data_set']
 
     def provision_dataset_query_and_update(self):
-        """Constructs a query's filter and update MongoDB arguments to provision a dataset for a genomic unit."""
+        """
+        Constructs a query's filter and update MongoDB arguments to provision a dataset for a genomic unit with the
+        list layout of annotations.
+        """
 
         query_filter = {
             self.genomic_unit['type'].value: self.genomic_unit['unit'],
-            f"annotations.{self.dataset_name}": {'$exists': False}
+            **LIST_LAYOUT_FILTER,
+            f"annotations.{self.dataset_name}": {'$exists': False},
         }
 
         update_operation = {'$addToSet': {"annotations": {self.dataset_name: []}}}
@@ -44,26 +52,38 @@ class GenomicUnitQuery():
     def annotate_dataset_query_and_update(self):
         """
         Constructs a query's filter, update, and arraysFilter MongoDB arguments to annotate a dataset
-        for a genomic unit.
+        for a genomic unit with the list layout of annotations.
         """
 
         query_filter = {
             self.genomic_unit['type'].value: self.genomic_unit['unit'],
-            f"annotations.{self.dataset_name}": {'$exists': True}
+            **LIST_LAYOUT_FILTER,
+            f"annotations.{self.dataset_name}": {'$exists': True},
         }
 
-        annotation_entry = {
-            'data_source': self.genomic_annotation['data_source'],
-            'version': self.genomic_annotation['version'],
-            'value': self.genomic_annotation['value'],
+        update_operation = {
+            '$addToSet': {f"annotations.$[dataset].{self.dataset_name}": annotation_entry(self.genomic_annotation)}
         }
 
-        update_operation = {'$addToSet': {f"annotations.$[dataset].{self.dataset_name}": annotation_entry}}
-
         arrays_filter = [{f"dataset.{self.dataset_name}": {'$exists': True}}]
 
         return query_filter, update_operation, arrays_filter
 
+    def annotate_keyed_dataset_query_and_update(self):
+        """
+        Constructs a query's filter and update MongoDB arguments to annotate a dataset for a genomic unit with the
+        keyed layout of annotations. The dataset does not need to be provisioned, since adding the annotation to the
+        dataset's key creates it.
+        """
+
+        query_filter = {self.genomic_unit['type'].value: self.genomic_unit['unit'], **KEYED_LAYOUT_FILTER}
+
+        update_operation = {
+            '$addToSet': {f"annotations.{self.dataset_name}": annotation_entry(self.genomic_annotation)}
+        }
+
+        return query_filter, update_operation
+
 
 class AnnotationUnitQuery():
     """
@@ -100,25 +120,66 @@ class AnnotationUnitQuery():
 
     def find_annotation_value_projection(self):
         """
-        Constructs the find projection MongoDB argument for an annotation unit's value by its genomic unit name,
-        dataset, data source, and calculated version.
+        Constructs the find projection MongoDB argument for an annotation unit's dataset, which projects only the
+        dataset's annotations in either layout of annotations.
 
-        find_query = {
-            'gene': 'VMA21',
-            'annotations.CADD': {'$exists': True },
-            'annotations.CADD.data_source': 'Ensembl',
-            'annotations.CADD.version': '112'
+        find_projection = {
+            'annotations.CADD': 1,
+            '_id': 0
         }
         """
-        return {f"annotations.{self.annotation_unit.get_dataset_name()}.$": 1, "_id": 0}
+        return {f"annotations.{self.annotation_unit.get_dataset_name()}": 1, "_id": 0}
+
+
+def annotated_datasets_expression(annotations_field: str):
+    """
+    Constructs the MongoDB aggregation expression that maps the annotated datasets to each dataset's name with
+    the data source and version of each of its annotations, without the annotation values. Annotations with the
+    keyed layout are mapped as a list with one object of every dataset.
+
+    [{'CADD': [{'data_source': 'Ensembl', 'version': '112', 'value': 24}]}]
+
+    becomes
+
+    [[{'data_set': 'CADD', 'annotations': [{'data_source': 'Ensembl', 'version': '112'}]}]]
+    """
+    datasets = {"$cond": [{"$isArray": [annotations_field]}, annotations_field, [{"$ifNull": [annotations_field, {}]}]]}
+    return {
+        "$map": {
+            "input": datasets, "as": "dataset", "in": {
+                "$map": {
+                    "input": {"$objectToArray": "$$dataset"}, "as": "entry", "in": {
+                        "data_set": "$$entry.k", "annotations": {
+                            "$map": {
+                                "input": "$$entry.v", "as": "annotation",
+                                "in": {"data_source": "$$annotation.data_source", "version": "$$annotation.version"}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
 
 
 class GenomicUnitCollection:
     """ Repository for managing genomic units and their annotations """
 
-    def __init__(self, genomic_units_collection):
-        """Initializes with the 'PyMongo' Collection object for the 'genomic_units' collection"""
+    def __init__(
+        self, genomic_units_collection, transcript_annotations_collection, analysis_annotation_views_collection
+    ):
+        """
+        Initializes with the 'PyMongo' Collection objects for the 'genomic_units' collection, the
+        'transcript_annotations' collection of the HGVS variant genomic units' transcripts, and the
+        'analysis_annotation_views' collection of the analyses' annotation values of the genomic units
+        """
         self.collection = genomic_units_collection
+        self.transcripts = GenomicUnitCollectionForTranscripts(
+            transcript_annotations_collection, genomic_units_collection
+        )
+        self.analysis_views = AnalysisAnnotationViewCollection(
+            analysis_annotation_views_collection, genomic_units_collection
+        )
 
     def all(self):
         """ Returns all genomic units that are stored """
@@ -130,14 +191,97 @@ class GenomicUnitCollection:
         calculated version, otherwise returns False.
         """
         if annotation_unit.is_transcript_dataset():
-            collection_for_transcripts = GenomicUnitCollectionForTranscripts(self)
-            return collection_for_transcripts.annotation_exist(annotation_unit)
+            return self.transcripts.annotation_exist(annotation_unit)
 
         annotation_query_adapter = AnnotationUnitQuery(annotation_unit)
         find_query = annotation_query_adapter.find_annotation_query()
 
         return bool(self.collection.count_documents(find_query, limit=1))
 
+    def find_annotated_datasets(self, genomic_units: list) -> list:
+        """
+        Returns the datasets, data sources, and versions that are annotated for each of the genomic units with one
+        aggregation, and for each of their transcripts with one query. The annotation values are not returned.
+        """
+        if len(genomic_units) == 0:
+            return []
+
+        genomic_unit_fields = {genomic_unit_type: 1 for genomic_unit_type in GenomicUnitType.string_types()}
+        pipeline = [{
+            "$match": {"$or": [{genomic_unit['type'].value: genomic_unit['unit']} for genomic_unit in genomic_units]}
+        }, {
+            "$project": {"_id": 0, **genomic_unit_fields, "annotations": annotated_datasets_expression("$annotations")}
+        }]
+        annotated_datasets = list(self.collection.aggregate(pipeline))
+
+        hgvs_variant_field = GenomicUnitType.HGVS_VARIANT.value
+        transcripts = self.transcripts.find_annotated_datasets([
+            genomic_unit['unit']
+            for genomic_unit in genomic_units
+            if genomic_unit['type'] == GenomicUnitType.HGVS_VARIANT
+        ])
+        for document in annotated_datasets:
+            if hgvs_variant_field in document:
+                document['transcripts'] = transcripts.get(document[hgvs_variant_field], [])
+
+        return annotated_datasets
+
+    def find_transcript_annotations(self, hgvs_variant: str) -> list:
+        """Returns the annotations of each of the HGVS variant's transcripts keyed by the dataset's name"""
+        return self.transcripts.find_transcript_annotations(hgvs_variant)
+
+    def find_analysis_annotations(self, genomic_unit, analysis_name: str):
+        """
+        Returns the genomic unit's annotation values matching the analysis' manifest from its materialized view, along
+        with the values of each of an HGVS variant's transcripts. A missing view is materialized before it is read, and
+        the values are aggregated without the view when it cannot be materialized. Returns None if the genomic unit does
+        not exist.
+        """
+        view = self.analysis_views.find_view(analysis_name, genomic_unit['unit'])
+        if view is not None:
+            return view
+
+        if not self.materialize_analysis_annotations(genomic_unit, analysis_name):
+            return self.analysis_views.aggregate_view(genomic_unit, analysis_name)
+
+        return self.analysis_views.find_view(analysis_name, genomic_unit['unit'])
+
+    def find_analysis_annotations_revision(self, genomic_unit, analysis_name: str):
+        """
+        Returns the '_id' and 'revision' of the analysis' view of the genomic unit's annotation values. A missing view
+        is materialized before it is read, and the revision identifies the aggregated values when it cannot be
+        materialized. Returns None if the genomic unit does not exist.
+        """
+        view_revision = self.analysis_views.find_view_revision(analysis_name, genomic_unit['unit'])
+        if view_revision is not None:
+            return view_revision
+
+        if not self.materialize_analysis_annotations(genomic_unit, analysis_name):
+            aggregated_view = self.analysis_views.aggregate_view(genomic_unit, analysis_name)
+            if aggregated_view is None:
+                return None
+
+            return self.analysis_views.aggregated_view_revision(aggregated_view)
+
+        return self.analysis_views.find_view_revision(analysis_name, genomic_unit['unit'])
+
+    def materialize_analysis_annotations(self, genomic_unit, analysis_name: str) -> bool:
+        """Materializes the analysis' view of the genomic unit, returning False when it cannot be materialized"""
+        try:
+            self.analysis_views.materialize(genomic_unit, analysis_name)
+        except PyMongoError as error:
+            logger.error(
+                "Failed to materialize the '%s' view of '%s', aggregating without the view: %s", analysis_name,
+                genomic_unit['unit'], error
+            )
+            return False
+
+        return True
+
+    def refresh_analysis_annotations(self, genomic_unit, analysis_names: list):
+        """Refreshes the materialized views of the genomic unit's annotation values for the analyses"""
+        self.analysis_views.refresh(genomic_unit, analysis_names)
+
     def find_genomic_unit_annotation_value(self, annotation_unit: AnnotationUnit):
         """
         Returns the annotation value for a genomic unit according the the dataset, datasource, and calculated version.
@@ -153,15 +297,14 @@ class GenomicUnitCollection:
         if result is None:
             return None
 
-        dataset_name = annotation_unit.get_dataset_name()
-        dataset_annotations = next((dataset for dataset in result['annotations'] if dataset_name in dataset), None)
+        dataset_annotations = get_dataset_annotations(result['annotations'], annotation_unit.get_dataset_name())
 
         if not dataset_annotations:
             return None
 
         return next((
             annotation['value']
-            for annotation in dataset_annotations[dataset_name]
+            for annotation in dataset_annotations
             if annotation_unit.does_source_and_version_match(annotation['data_source'], annotation['version'])
         ), None)
 
@@ -172,12 +315,23 @@ class GenomicUnitCollection:
         })
 
     def update_genomic_unit_by_mongo_id(self, genomic_unit_document):
-        """ Takes a genomic unit and overwrites the existing object based on the object's id """
+        """
+        Takes a genomic unit and overwrites the existing object based on the object's id, then refreshes the analyses'
+        views of its annotation values
+        """
         genomic_unit_id = genomic_unit_document['_id']
 
-        return self.collection.find_one_and_update({'_id': ObjectId(str(genomic_unit_id))},
-                                                   {'$set': genomic_unit_document},
-                                                   return_document=ReturnDocument.AFTER)
+        updated_document = self.collection.find_one_and_update({'_id': ObjectId(str(genomic_unit_id))},
+                                                               {'$set': genomic_unit_document},
+                                                               return_document=ReturnDocument.AFTER)
+
+        for genomic_unit_type in GenomicUnitType.string_types() & genomic_unit_document.keys():
+            genomic_unit = {
+                'type': GenomicUnitType(genomic_unit_type), 'unit': genomic_unit_document[genomic_unit_type]
+            }
+            self.analysis_views.refresh(genomic_unit, [])
+
+        return updated_document
 
     def annotate_genomic_unit(self, genomic_unit, genomic_annotation):
         """
@@ -193,60 +347,92 @@ class GenomicUnitCollection:
             }]
         }
         """
+        self.bulk_annotate_genomic_unit(genomic_unit, [genomic_annotation])
 
-        if 'transcript_id' in genomic_annotation:
-            collection_for_transcripts = GenomicUnitCollectionForTranscripts(self)
-            return collection_for_transcripts.annotate_transcript_dataset(genomic_unit, genomic_annotation)
+        return True
+
+    def bulk_annotate_genomic_unit(self, genomic_unit, genomic_annotations: list):
+        """
+        Annotates a genomic unit with each of the annotations within one ordered bulk write rather than a round trip
+        for every provision and annotation update. A dataset is only provisioned once within the bulk write
+        regardless of how many of its annotations are written. The annotations of the genomic unit's transcripts are
+        written to the transcript annotations with their own bulk write.
+
+        The operations for both layouts of annotations are written, and each only matches a genomic unit with its
+        layout of annotations, so that genomic units are annotated whether or not they have been migrated.
+        """
+        transcript_annotations = [
+            genomic_annotation for genomic_annotation in genomic_annotations if 'transcript_id' in genomic_annotation
+        ]
+        self.transcripts.bulk_annotate_transcripts(genomic_unit, transcript_annotations)
+
+        operations = []
+        provisioned = set()
+        for genomic_annotation in genomic_annotations:
+            if 'transcript_id' not in genomic_annotation:
+                operations.extend(self.annotate_dataset_operations(genomic_unit, genomic_annotation, provisioned))
+
+        if len(operations) == 0:
+            return None
 
+        return self.collection.bulk_write(operations, ordered=True)
+
+    @staticmethod
+    def annotate_dataset_operations(genomic_unit, genomic_annotation, provisioned: set) -> list:
+        """
+        Returns the ordered bulk write operations that annotate a dataset for a genomic unit in either layout of
+        annotations. The dataset is only provisioned for the list layout when it has not been provisioned by an earlier
+        operation within the same bulk write, which are tracked within 'provisioned'.
+        """
         genomic_unit_query = GenomicUnitQuery(genomic_unit, genomic_annotation)
 
-        provision_dataset, update_operation = genomic_unit_query.provision_dataset_query_and_update()
-        genomic_unit = self.collection.update_one(provision_dataset, update_operation)
+        operations = []
+        if ('dataset', genomic_unit_query.dataset_name) not in provisioned:
+            provisioned.add(('dataset', genomic_unit_query.dataset_name))
+            operations.append(UpdateOne(*genomic_unit_query.provision_dataset_query_and_update()))
 
         add_annotation_query, add_annotation_update_operation, add_annotation_array_filters = \
             genomic_unit_query.annotate_dataset_query_and_update()
-
-        try:
-            self.collection.update_one(
+        operations.append(
+            UpdateOne(
                 add_annotation_query, add_annotation_update_operation, array_filters=add_annotation_array_filters
             )
-        except ValueError as error:
-            raise error
+        )
+        operations.append(UpdateOne(*genomic_unit_query.annotate_keyed_dataset_query_and_update()))
 
-        return True
+        return operations
 
     def annotate_genomic_unit_with_file(self, genomic_unit, genomic_annotation):
         """ Ensures that an annotation is created for the annotation image upload and only one image is allowed """
         genomic_unit_document = self.find_genomic_unit(genomic_unit)
         data_set = genomic_annotation['data_set']
 
-        for annotation in genomic_unit_document['annotations']:
-            if data_set in annotation:
-                annotation[data_set][0]['value'].append(genomic_annotation['value'])
-                return self.update_genomic_unit_by_mongo_id(genomic_unit_document)
+        dataset_annotations = get_dataset_annotations(genomic_unit_document['annotations'], data_set)
+        if dataset_annotations is not None:
+            dataset_annotations[0]['value'].append(genomic_annotation['value'])
+            return self.update_genomic_unit_by_mongo_id(genomic_unit_document)
 
-        annotation_data_set = {
-            genomic_annotation['data_set']: [{
+        set_dataset_annotations(
+            genomic_unit_document['annotations'], data_set, [{
                 'data_source': genomic_annotation['data_source'],
                 'version': genomic_annotation['version'],
                 'value': [genomic_annotation['value']],
             }]
-        }
-
-        genomic_unit_document['annotations'].append(annotation_data_set)
+        )
         return self.update_genomic_unit_by_mongo_id(genomic_unit_document)
 
     def update_genomic_unit_file_annotation(self, genomic_unit, data_set, annotation_value, file_id_old):
         """ Replaces existing annotation image with new image """
         genomic_unit_document = self.find_genomic_unit(genomic_unit)
 
-        for annotation in genomic_unit_document['annotations']:
-            if data_set in annotation:
-                for i in range(len(annotation[data_set][0]['value'])):
-                    if annotation[data_set][0]['value'][i]['file_id'] == file_id_old:
-                        annotation[data_set][0]['value'].pop(i)
-                        annotation[data_set][0]['value'].append(annotation_value)
-                        break
+        dataset_annotations = get_dataset_annotations(genomic_unit_document['annotations'], data_set)
+        if dataset_annotations is not None:
+            file_values = dataset_annotations[0]['value']
+            for i, file_value in enumerate(file_values):
+                if file_value['file_id'] == file_id_old:
+                    file_values.pop(i)
+                    file_values.append(annotation_value)
+                    break
 
         self.update_genomic_unit_by_mongo_id(genomic_unit_document)
 
@@ -255,18 +441,20 @@ class GenomicUnitCollection:
 
         genomic_unit_document = self.find_genomic_unit(genomic_unit)
 
-        for annotation in genomic_unit_document['annotations']:
-            if data_set in annotation:
-                for i in range(len(annotation[data_set][0]['value'])):
-                    if annotation[data_set][0]['value'][i]['file_id'] == file_id:
-                        annotation[data_set][0]['value'].pop(i)
-                        break
+        dataset_annotations = get_dataset_annotations(genomic_unit_document['annotations'], data_set)
+        if dataset_annotations is not None:
+            file_values = dataset_annotations[0]['value']
+            for i, file_value in enumerate(file_values):
+                if file_value['file_id'] == file_id:
+                    file_values.pop(i)
+                    break
 
         return self.update_genomic_unit_by_mongo_id(genomic_unit_document)
 
     def create_genomic_unit(self, genomic_unit):
         """
-        Takes a genomic_unit and adds it to the collection if it doesn't already exist (exact match).
+        Takes a genomic_unit and adds it to the collection if it doesn't already exist (exact match). The genomic unit
+        is upserted so that analyses creating the same genomic unit concurrently do not insert it twice.
         """
         type_to_save = GenomicUnitType.string_types() & genomic_unit.keys()
 
@@ -279,8 +467,6 @@ class GenomicUnitCollection:
         genomic_unit_type = type_to_save.pop()
         find_query = {genomic_unit_type: genomic_unit[genomic_unit_type]}
 
-        if self.collection.find_one(find_query):
+        result = self.collection.update_one(find_query, {"$setOnInsert": genomic_unit}, upsert=True)
+        if result.upserted_id is None:
             logger.info("Genomic unit already exists, skipping creation")
-            return
-
-        self.collection.insert_one(genomic_unit)
@@ -1,13 +1,30 @@
 """
 Module for adapting the GenomicUnitCollection to streamline support for Transcripts as a genomic unit
-within MongoDB.
+within MongoDB. Each transcript dataset's annotations are stored as their own document within the
+'transcript_annotations' collection rather than within the HGVS variant's genomic unit.
+
+{
+    'hgvs_variant': 'NM_001017980.3:c.164G>T',
+    'transcript_id': 'NM_001017980.4',
+    'data_set': 'SIFT Score',
+    'annotations': [{'data_source': 'Ensembl', 'version': '112', 'value': 0.02}]
+}
+
+The transcripts of HGVS variants that are still embedded within their genomic unit are read when the variant has no
+transcript annotations, until 'etc/fixtures/migrations/transcript-annotations-collection.js' has moved them.
 """
+from pymongo import ASCENDING, UpdateOne
+
 from ..core.annotation_unit import AnnotationUnit
+from ..enums import GenomicUnitType
+from .genomic_unit_annotations import annotation_entry, iterate_datasets
+
+HGVS_VARIANT_FIELD = GenomicUnitType.HGVS_VARIANT.value
 
 
 class AnnotationUnitTranscriptQuery():
     """
-    Represents the MongoDB query's filter and update arguments for transcripts of an AnnotationUnit.
+    Represents the MongoDB query's filter arguments for transcripts of an AnnotationUnit.
     """
 
     def __init__(self, annotation_unit: AnnotationUnit):
@@ -19,50 +36,42 @@ class AnnotationUnitTranscriptQuery():
         """Name of the dataset for the annotation."""
         return self.annotation_unit.get_dataset_name()
 
-    @property
-    def genomic_unit_type_string(self):
-        """The type of genomic unit as a string for the annotation."""
-        return self.annotation_unit.get_genomic_unit_type_string()
-
     @property
     def genomic_unit_name(self):
         """The name of the genomic unit for the annotation."""
         return self.annotation_unit.get_genomic_unit()
 
-    def find_genomic_unit_query(self):
+    def find_transcripts_query(self):
         """
-        Constructs the find filter to query MongoDB for the genomic unit for this annotation.
+        Constructs the find filter to query MongoDB for the transcript annotations of the annotation's genomic unit.
         """
-        return {self.genomic_unit_type_string: self.genomic_unit_name}
+        return {HGVS_VARIANT_FIELD: self.genomic_unit_name}
 
-    def find_annotation_query(self, transcript_id):
+    def find_annotation_query(self):
         """
-        Constructs the find filter to query MongoDB for the annotation unit for by its genomic unit name, transcript_id,
-        dataset, data source, and calculated version.
+        Constructs the find filter to query MongoDB for the transcripts annotated by the annotation unit's dataset,
+        data source, and calculated version.
 
         ex.
         find_query = {
             "hgvs_variant": "NM_001017980.3:c.164G>T"
-            "transcripts.transcript_id": "NM_001017980.4",
-            "transcripts.annotations.SIFT Score": {$exists: true},
-            "transcripts.annotations.SIFT Score.data_source": "Ensembl",
-            "transcripts.annotations.SIFT Score.version": 113,
+            "data_set": "SIFT Score",
+            "annotations": {"$elemMatch": {"data_source": "Ensembl", "version": 113}},
         }
         """
-        find_query = {
-            self.genomic_unit_type_string: self.genomic_unit_name, "transcripts.transcript_id": transcript_id,
-            f"transcripts.annotations.{self.dataset_name}": {'$exists': True},
-            f"transcripts.annotations.{self.dataset_name}.data_source": self.annotation_unit.get_dataset_source(),
-            f"transcripts.annotations.{self.dataset_name}.version": self.annotation_unit.version
+        return {
+            HGVS_VARIANT_FIELD: self.genomic_unit_name, "data_set": self.dataset_name, "annotations": {
+                "$elemMatch": {
+                    "data_source": self.annotation_unit.get_dataset_source(), "version": self.annotation_unit.version
+                }
+            }
         }
 
-        return find_query
-
 
-class GenomicUnitTranscriptQuery():
+class GenomicUnitTranscriptQuery():  # pylint: disable=too-few-public-methods
     """
-    Represents the MongoDB query's filter, update, and arraysFilter arguments for transcripts of a genomic unit
-    an its annotation.
+    Represents the MongoDB query's filter and update arguments for a transcript dataset of a genomic unit and its
+    annotation.
     """
 
     def __init__(self, genomic_unit, genomic_annotation):
@@ -71,59 +80,21 @@ class GenomicUnitTranscriptQuery():
         self.genomic_annotation = genomic_annotation
         self.dataset_name = self.genomic_annotation['data_set']
 
-    def provision_transcript_id(self):
-        """Constructs a query and update operation to provision a transcript ID in a unit's transcripts list'"""
-        query_filter = {
-            self.genomic_unit['type'].value: self.genomic_unit['unit'],
-            "transcripts.transcript_id": {'$ne': self.genomic_annotation['transcript_id']},
-        }
-
-        update_operation = {
-            '$addToSet': {
-                'transcripts': {'transcript_id': self.genomic_annotation['transcript_id'], 'annotations': []}
-            }
-        }
-
-        return query_filter, update_operation
-
-    def provision_dataset_query_and_update(self):
-        """Constructs a query, update, and arraysFilter MongoDB arguments to provision a dataset for a transcript id."""
-
-        query_filter = {
-            self.genomic_unit['type'].value: self.genomic_unit['unit'], "transcripts.transcript_id": {'$exists': True},
-            f"transcripts.$[transcript].annotations.$[dataset].{self.dataset_name}": {'$exists': False}
-        }
-
-        update_operation = {'$addToSet': {"transcripts.$[transcript].annotations": {self.dataset_name: []}}}
-
-        arrays_filter = [
-            {"transcript.transcript_id": self.genomic_annotation['transcript_id']},
-        ]
-
-        return query_filter, update_operation, arrays_filter
-
     def annotate_dataset_query_and_update(self):
-        """Constructs a query, update, and arraysFilter MongoDB arguments for annotating a transcript dataset."""
+        """
+        Constructs a query and update MongoDB arguments for annotating a transcript dataset. The transcript
+        dataset's document is created by the update when it does not exist.
+        """
 
         query_filter = {
-            self.genomic_unit['type'].value: self.genomic_unit['unit'],
-            "transcripts.transcript_id": self.genomic_annotation['transcript_id']
+            HGVS_VARIANT_FIELD: self.genomic_unit['unit'],
+            "transcript_id": self.genomic_annotation['transcript_id'],
+            "data_set": self.dataset_name,
         }
 
-        annotation_entry = {
-            'data_source': self.genomic_annotation['data_source'],
-            'version': self.genomic_annotation['version'],
-            'value': self.genomic_annotation['value'],
-        }
-
-        update_operation = {
-            '$addToSet': {f"transcripts.$[transcript].annotations.$[dataset].{self.dataset_name}": annotation_entry}
-        }
+        update_operation = {'$addToSet': {"annotations": annotation_entry(self.genomic_annotation)}}
 
-        arrays_filter = [{"transcript.transcript_id": self.genomic_annotation['transcript_id']},
-                         {f"dataset.{self.dataset_name}": {'$exists': True}}]
-
-        return query_filter, update_operation, arrays_filter
+        return query_filter, update_operation
 
 
 class GenomicUnitCollectionForTranscripts():
@@ -131,49 +102,142 @@ class GenomicUnitCollectionForTranscripts():
     Repository adapter for the genomic unit collection for managing Transcripts for a given HGVS variant genomic unit.
     """
 
-    def __init__(self, genomic_unit_collection):
-        """Initializes the this repository adapter with the GenomicUnitCollection it is adapting."""
-        self.collection = genomic_unit_collection.collection
+    def __init__(self, transcript_annotations_collection, genomic_units_collection):
+        """
+        Initializes the this repository adapter with the 'PyMongo' Collection objects for transcript annotations and
+        the genomic units that may still embed their transcripts
+        """
+        self.collection = transcript_annotations_collection
+        self.genomic_units_collection = genomic_units_collection
+
+    def find_embedded_transcript_datasets(self, hgvs_variants: list) -> list:
+        """
+        Returns the transcript datasets embedded within the HGVS variants' genomic units that have not been migrated,
+        as documents of the 'transcript_annotations' collection.
+        """
+        embedded_units = self.genomic_units_collection.find({
+            HGVS_VARIANT_FIELD: {"$in": hgvs_variants}, "transcripts": {"$exists": True}
+        }, {"_id": 0, HGVS_VARIANT_FIELD: 1, "transcripts": 1})
+
+        transcript_datasets = []
+        for unit in embedded_units:
+            for transcript in unit.get('transcripts') or []:
+                for dataset_name, dataset_annotations in iterate_datasets(transcript.get('annotations') or []):
+                    transcript_datasets.append({
+                        HGVS_VARIANT_FIELD: unit[HGVS_VARIANT_FIELD], 'transcript_id': transcript['transcript_id'],
+                        'data_set': dataset_name, 'annotations': dataset_annotations
+                    })
+
+        return transcript_datasets
+
+    def embedded_annotation_exist(self, annotation_unit: AnnotationUnit):
+        """
+        Returns True if the annotation exists by dataset, data source, and version for every one of the transcripts
+        embedded within the genomic unit, otherwise returns False.
+        """
+        transcript_datasets = self.find_embedded_transcript_datasets([annotation_unit.get_genomic_unit()])
+        transcript_ids = {transcript_dataset['transcript_id'] for transcript_dataset in transcript_datasets}
+        if len(transcript_ids) == 0:
+            return False
+
+        annotated_transcript_ids = {
+            transcript_dataset['transcript_id']
+            for transcript_dataset in transcript_datasets
+            if transcript_dataset['data_set'] == annotation_unit.get_dataset_name() and any(
+                annotation['data_source'] == annotation_unit.get_dataset_source() and
+                annotation['version'] == annotation_unit.version for annotation in transcript_dataset['annotations']
+            )
+        }
+
+        return annotated_transcript_ids == transcript_ids
 
     def annotation_exist(self, annotation_unit: AnnotationUnit):
         """
-        Returns True if the annotation exists by transcript_id, dataset, data source, and version of an AnnotationUnit,
-        otherwise returns False.
+        Returns True if the annotation exists by dataset, data source, and version of an AnnotationUnit for every
+        one of the genomic unit's transcripts, otherwise returns False.
         """
         annotation_query_adapter = AnnotationUnitTranscriptQuery(annotation_unit)
 
-        find_query = annotation_query_adapter.find_genomic_unit_query()
-        hgvs_genomic_unit_json = self.collection.find_one(find_query)
+        transcript_ids = self.collection.distinct("transcript_id", annotation_query_adapter.find_transcripts_query())
+        if len(transcript_ids) == 0:
+            return self.embedded_annotation_exist(annotation_unit)
 
-        if 'transcripts' not in hgvs_genomic_unit_json or len(hgvs_genomic_unit_json['transcripts']) == 0:
-            return False
+        annotated_count = self.collection.count_documents(annotation_query_adapter.find_annotation_query())
+
+        return annotated_count == len(transcript_ids)
 
-        for transcript in hgvs_genomic_unit_json['transcripts']:
-            find_transcript_query = annotation_query_adapter.find_annotation_query(transcript['transcript_id'])
+    def bulk_annotate_transcripts(self, genomic_unit, genomic_annotations: list):
+        """Annotates the transcript datasets of a genomic unit with each of the annotations within one bulk write"""
+        operations = [
+            UpdateOne(
+                *GenomicUnitTranscriptQuery(genomic_unit, genomic_annotation).annotate_dataset_query_and_update(),
+                upsert=True
+            ) for genomic_annotation in genomic_annotations
+        ]
 
-            if not bool(self.collection.count_documents(find_transcript_query, limit=1)):
-                return False
+        if len(operations) == 0:
+            return None
 
-        return True
+        return self.collection.bulk_write(operations, ordered=True)
 
-    def annotate_transcript_dataset(self, genomic_unit, genomic_annotation):
+    def find_transcript_annotations(self, hgvs_variant: str) -> list:
         """
-        Annotates a dataset in a transcript for a genomic unit. It will provision a transcript and dataset for a
-        transcript if it does not exist.
+        Returns the annotations of each of the HGVS variant's transcripts with one query, in the order the transcripts
+        were first annotated. Each transcript's annotations are keyed by the dataset's name.
+
+        [{'transcript_id': 'NM_001017980.4', 'annotations': {'SIFT Score': [{'data_source': 'Ensembl', ...}]}}]
         """
-        transcript_query = GenomicUnitTranscriptQuery(genomic_unit, genomic_annotation)
+        transcript_datasets = list(self.collection.find({HGVS_VARIANT_FIELD: hgvs_variant}, sort=[("_id", ASCENDING)]))
+        if len(transcript_datasets) == 0:
+            transcript_datasets = self.find_embedded_transcript_datasets([hgvs_variant])
+
+        transcripts = {}
+        for transcript_dataset in transcript_datasets:
+            transcript = transcripts.setdefault(
+                transcript_dataset['transcript_id'],
+                {'transcript_id': transcript_dataset['transcript_id'], 'annotations': {}}
+            )
+            transcript['annotations'][transcript_dataset['data_set']] = transcript_dataset['annotations']
 
-        provision_transcript, provision_transcript_update = transcript_query.provision_transcript_id()
-        genomic_unit = self.collection.update_one(provision_transcript, provision_transcript_update)
+        return list(transcripts.values())
 
-        provision_dataset, update_operation, array_filters = transcript_query.provision_dataset_query_and_update()
-        genomic_unit = self.collection.update_one(provision_dataset, update_operation, array_filters=array_filters)
+    def find_annotated_datasets(self, hgvs_variants: list) -> dict:
+        """
+        Returns the datasets, data sources, and versions annotated for each transcript of each of the HGVS variants with
+        one query, keyed by the HGVS variant. The annotation values are not returned.
 
-        add_annotation_query, add_annotation_update_operation, add_annotation_array_filters = \
-            transcript_query.annotate_dataset_query_and_update()
+        {'NM_001017980.3:c.164G>T': [{
+            'transcript_id': 'NM_001017980.4',
+            'annotations': [[{'data_set': 'SIFT Score', 'annotations': [{'data_source': 'Ensembl', 'version': '112'}]}]]
+        }]}
+        """
+        if len(hgvs_variants) == 0:
+            return {}
 
-        result = self.collection.update_one(
-            add_annotation_query, add_annotation_update_operation, array_filters=add_annotation_array_filters
-        )
+        projection = {
+            "_id": 0, HGVS_VARIANT_FIELD: 1, "transcript_id": 1, "data_set": 1, "annotations.data_source": 1,
+            "annotations.version": 1
+        }
 
-        return result
+        transcript_datasets = list(self.collection.find({HGVS_VARIANT_FIELD: {"$in": hgvs_variants}}, projection))
+        annotated_variants = {transcript_dataset[HGVS_VARIANT_FIELD] for transcript_dataset in transcript_datasets}
+        embedded_variants = [variant for variant in hgvs_variants if variant not in annotated_variants]
+        if len(embedded_variants) > 0:
+            for transcript_dataset in self.find_embedded_transcript_datasets(embedded_variants):
+                transcript_dataset['annotations'] = [{
+                    'data_source': annotation['data_source'], 'version': annotation['version']
+                } for annotation in transcript_dataset['annotations']]
+                transcript_datasets.append(transcript_dataset)
+
+        transcripts = {}
+        for transcript_dataset in transcript_datasets:
+            variant_transcripts = transcripts.setdefault(transcript_dataset[HGVS_VARIANT_FIELD], {})
+            transcript = variant_transcripts.setdefault(
+                transcript_dataset['transcript_id'],
+                {'transcript_id': transcript_dataset['transcript_id'], 'annotations': [[]]}
+            )
+            transcript['annotations'][0].append({
+                'data_set': transcript_dataset['data_set'], 'annotations': transcript_dataset['annotations']
+            })
+
+        return {variant: list(variant_transcripts.values()) for variant, variant_transcripts in transcripts.items()}
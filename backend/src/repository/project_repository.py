@@ -26,30 +26,34 @@ class ProjectRepository:
 
         return list(query_result)
 
-    def all_analyses(self, client_id: str):
-        """Returns all analyses available to the user by client id"""
-        pipeline = [{"$match": {"client_id": client_id}}, {
+    @staticmethod
+    def user_analyses_pipeline(client_id: str, projection: dict):
+        """Returns the aggregation pipeline for the projected fields of the analyses available to the user"""
+        return [{"$match": {"client_id": client_id}}, {
             "$lookup": {
                 "from": "analyses", "let": {"projectIds": '$project_ids'},
                 "pipeline": [{"$match": {"$expr": {"$in": ["$project_id", "$$projectIds"]}}}], "as": "analyses"
             }
-        }, {"$unwind": "$analyses"}, {"$replaceRoot": {"newRoot": "$analyses"}},
-                    {"$project": AnalysisCollectionSummary.query_projection()}]
+        }, {"$unwind": "$analyses"}, {"$replaceRoot": {"newRoot": "$analyses"}}, {"$project": projection}]
+
+    def all_analyses(self, client_id: str):
+        """Returns all analyses available to the user by client id"""
+        pipeline = self.user_analyses_pipeline(client_id, AnalysisCollectionSummary.query_projection())
 
         query_result = self.user_collection.aggregate(pipeline)
 
         return list(query_result)
 
+    def all_summary_revisions(self, client_id: str):
+        """Returns the '_id' and 'revision' of each of the analyses available to the user, in the order of summaries"""
+        pipeline = self.user_analyses_pipeline(client_id, {"_id": 1, "revision": 1})
+
+        return list(self.user_collection.aggregate(pipeline))
+
     def all_summaries(self, client_id: str):
         """Returns all of the summaries for all of the analyses within the system"""
 
-        pipeline = [{"$match": {"client_id": client_id}}, {
-            "$lookup": {
-                "from": "analyses", "let": {"projectIds": '$project_ids'},
-                "pipeline": [{"$match": {"$expr": {"$in": ["$project_id", "$$projectIds"]}}}], "as": "analyses"
-            }
-        }, {"$unwind": "$analyses"}, {"$replaceRoot": {"newRoot": "$analyses"}},
-                    {"$project": AnalysisCollectionSummary.query_projection()}]
+        pipeline = self.user_analyses_pipeline(client_id, AnalysisCollectionSummary.query_projection())
 
         query_result = self.user_collection.aggregate(pipeline)
 
@@ -2,10 +2,10 @@
 
 # pylint: disable=duplicate-code
 
-from fastapi import APIRouter, Depends, Security, BackgroundTasks, HTTPException, status
+from fastapi import APIRouter, Depends, Security, HTTPException, status
 from pydantic import BaseModel
 
-from ..dependencies import database, annotation_queue
+from ..dependencies import database, annotation_worker
 from ..security.security import get_write_project_authorization
 
 from ..models.analysis import Analysis
@@ -35,11 +35,10 @@ class IncomingEditGenomicUnit(BaseModel):
     dependencies=[Security(get_write_project_authorization)]
 )
 def add_genomic_units(
-    background_tasks: BackgroundTasks,
     analysis_name: str,
     new_genomic_unit: IncomingGenomicUnit,
     repositories=Depends(database),
-    annotation_task_queue=Depends(annotation_queue)
+    annotation_task_queue=Depends(annotation_worker)
 ):
     """Adding a new genomic unit to an analysis by Analysis Name"""
 
@@ -68,9 +67,6 @@ def add_genomic_units(
     # Calling AnnotationService to queue annotation tasks by given unit
     annotation_service = AnnotationService(repositories["annotation_config"])
     annotation_service.queue_annotation_tasks_by_unit(analysis, new_genomic_unit_to_annotate, annotation_task_queue)
-    background_tasks.add_task(
-        AnnotationService.process_tasks, annotation_task_queue, repositories['genomic_unit'], repositories["analysis"]
-    )
 
     return updated_analysis_json["genomic_units"]
 
@@ -2,9 +2,10 @@
 
 from typing import List
 
-from fastapi import (APIRouter, Depends, HTTPException, Form, Security, status)
+from fastapi import (APIRouter, Depends, HTTPException, Form, Request, Security, status)
 from fastapi.responses import StreamingResponse
 
+from ..conditional_response import conditional_json_response, entity_tag
 from ..dependencies import database
 from ..models.analysis import Analysis, AnalysisSummary
 from ..enums import ThirdPartyLinkType, EventType
@@ -35,10 +36,19 @@ def get_all_analyses(repositories=Depends(database), client_id: VerifyUser = Sec
 
 @router.get("/summary", tags=["analysis"], response_model=List[AnalysisSummary])
 async def get_all_analyses_summaries(
-    repositories=Depends(database), client_id: VerifyUser = Security(get_current_user)
+    request: Request, repositories=Depends(database), client_id: VerifyUser = Security(get_current_user)
 ):
-    """Returns a summary for each analysis available to the user"""
-    return repositories["project"].all_summaries(client_id)
+    """
+    Returns a summary for each analysis available to the user, identified by an ETag of the revisions of the
+    analyses
+    """
+    summary_revisions = repositories["project"].all_summary_revisions(client_id)
+    etag = entity_tag(*[f"{analysis['_id']}@{analysis.get('revision', 0)}" for analysis in summary_revisions])
+
+    def build_summaries():
+        return [AnalysisSummary(**summary) for summary in repositories["project"].all_summaries(client_id)]
+
+    return conditional_json_response(request, ("analysis_summaries", client_id), etag, build_summaries)
 
 
 @router.get("/{analysis_name}", tags=["analysis"], response_model=Analysis, response_model_exclude_none=True)
@@ -78,11 +88,20 @@ def get_genomic_units(analysis_name: str, repositories=Depends(database)):
 )
 def get_analysis_summary_by_name(
     analysis_name: str,
+    request: Request,
     repositories=Depends(database),
 ):
-    """Returns a summary of the analysis"""
+    """Returns a summary of the analysis, identified by an ETag of the analysis' revision"""
+
+    analysis_revision = repositories["analysis"].find_revision(analysis_name)
+    if analysis_revision is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{analysis_name} does not exist.")
+
+    def build_summary():
+        return AnalysisSummary(**repositories["analysis"].summary_by_name(analysis_name))
 
-    return repositories["analysis"].summary_by_name(analysis_name)
+    etag = entity_tag(analysis_revision['_id'], analysis_revision.get('revision', 0))
+    return conditional_json_response(request, ("analysis_summary", analysis_name), etag, build_summary)
 
 
 @router.put(
@@ -4,12 +4,13 @@ import logging
 from datetime import date, datetime
 from typing import List
 
-from fastapi import (APIRouter, Depends, BackgroundTasks, HTTPException, status, UploadFile, File, Response, Security)
+from fastapi import (APIRouter, Depends, HTTPException, status, UploadFile, File, Response, Security)
 
 from ..enums import GenomicUnitType
 from ..core.annotation import AnnotationService
-from ..dependencies import database, annotation_queue
+from ..dependencies import database, annotation_worker
 from ..models.analysis import Analysis
+from ..repository.genomic_unit_annotations import get_dataset_annotations
 
 from ..security.security import get_authorization, get_write_project_authorization
 
@@ -22,10 +23,7 @@ router = APIRouter(prefix="/annotation", tags=["annotation"])
     "/{analysis_name}", status_code=status.HTTP_202_ACCEPTED, dependencies=[Security(get_write_project_authorization)]
 )
 def annotate_analysis(
-    analysis_name: str,
-    background_tasks: BackgroundTasks,
-    repositories=Depends(database),
-    annotation_task_queue=Depends(annotation_queue)
+    analysis_name: str, repositories=Depends(database), annotation_task_queue=Depends(annotation_worker)
 ):
     """
     Initiates annotation for all genomic units within the analysis. Existing annotations for genomic units that are
@@ -39,9 +37,6 @@ def annotate_analysis(
     analysis = Analysis(**analysis_json)
     annotation_service = AnnotationService(repositories["annotation_config"])
     annotation_service.queue_annotation_tasks(analysis, annotation_task_queue)
-    background_tasks.add_task(
-        AnnotationService.process_tasks, annotation_task_queue, repositories['genomic_unit'], repositories["analysis"]
-    )
 
     return {"name": f"{analysis_name} annotations queued."}
 
@@ -92,11 +87,9 @@ def upload_annotation_section(
 
     response.status_code = status.HTTP_201_CREATED
 
-    updated_annotation = next(
-        (annotation for annotation in updated_genomic_unit['annotations'] if data_set_name in annotation), None
-    )
+    updated_annotation = get_dataset_annotations(updated_genomic_unit['annotations'], data_set_name)
 
-    return updated_annotation[data_set_name][0]['value']
+    return updated_annotation[0]['value']
 
 
 @router.put(
@@ -140,11 +133,9 @@ def update_annotation_image(
     except Exception as exception:
         raise HTTPException(status_code=500, detail=str(exception)) from exception
 
-    updated_annotation = next(
-        (annotation for annotation in updated_genomic_unit['annotations'] if data_set_name in annotation), None
-    )
+    updated_annotation = get_dataset_annotations(updated_genomic_unit['annotations'], data_set_name)
 
-    return updated_annotation[data_set_name][0]['value']
+    return updated_annotation[0]['value']
 
 
 @router.delete(
@@ -174,8 +165,6 @@ def remove_annotation_image(
     except Exception as exception:
         raise HTTPException(status_code=500, detail=str(exception)) from exception
 
-    updated_annotation = next(
-        (annotation for annotation in updated_genomic_unit['annotations'] if data_set_name in annotation), None
-    )
+    updated_annotation = get_dataset_annotations(updated_genomic_unit['annotations'], data_set_name)
 
-    return updated_annotation[data_set_name][0]['value']
+    return updated_annotation[0]['value']
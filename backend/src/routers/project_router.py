@@ -3,11 +3,11 @@
 import json
 from typing import Annotated, List
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, File, Security
+from fastapi import APIRouter, Depends, HTTPException, File, Security
 
 from ..core.annotation import AnnotationService
 from ..core.phenotips_importer import PhenotipsImporter
-from ..dependencies import database, annotation_queue
+from ..dependencies import database, annotation_worker
 from ..models.analysis import Analysis, Project
 from ..models.event import Event
 from ..models.user import VerifyUser
@@ -28,9 +28,8 @@ def get_projects(repositories=Depends(database), client_id: VerifyUser = Securit
 async def create_analysis(
     project_id: str,
     phenotips_file: Annotated[bytes, File()],
-    background_tasks: BackgroundTasks,
     repositories=Depends(database),
-    annotation_task_queue=Depends(annotation_queue),
+    annotation_task_queue=Depends(annotation_worker),
     user_project: VerifyUser = Security(get_create_project_authorization)
 ):
     """Create an analysis within a project from an uploaded JSON file and queue annotation tasks by genomic units."""
@@ -51,8 +50,5 @@ async def create_analysis(
     analysis = Analysis(**new_analysis)
     annotation_service = AnnotationService(repositories["annotation_config"])
     annotation_service.queue_annotation_tasks(analysis, annotation_task_queue)
-    background_tasks.add_task(
-        AnnotationService.process_tasks, annotation_task_queue, repositories['genomic_unit'], repositories["analysis"]
-    )
 
     return new_analysis
@@ -150,6 +150,33 @@ def get_authorization(
     return True
 
 
+def get_metrics_authorization(token: str = Depends(oauth2_scheme), settings: Settings = Depends(get_settings)):
+    """
+    Verifies the requester is authorized to scrape the metrics with either the configured metrics scrape token, so
+    monitoring services do not need a Rosalution user, or a valid access token.
+    """
+    if settings.metrics_scrape_token and secrets.compare_digest(
+        token.encode("utf-8"), settings.metrics_scrape_token.encode("utf-8")
+    ):
+        return True
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    try:
+        payload = jwt.decode(token, settings.rosalution_key, algorithms=[settings.oauth2_algorithm])
+    except InvalidTokenError as jwt_error:
+        raise credentials_exception from jwt_error
+
+    if payload.get("sub") is None:
+        raise credentials_exception
+
+    return True
+
+
 def get_project_authorization(
     analysis_name: str = Path(...), repositories=Depends(database), client_id=Depends(get_current_user)
 ):
@@ -5,6 +5,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.main import app
+from src.conditional_response import revision_response_cache
 from src.database import Database
 from src.config import get_settings, Settings
 from src.dependencies import database, annotation_queue
@@ -35,8 +36,13 @@ def mock_database_collections():
 
     mock_database_client.rosalution_db = {
         "analyses": mock_mongo_collection(),
+        "analysis_annotation_views": mock_mongo_collection(),
         "annotations_config": mock_mongo_collection(),
+        "annotation_response_cache": mock_mongo_collection(),
+        "annotation_runs": mock_mongo_collection(),
+        "annotation_versions": mock_mongo_collection(),
         "genomic_units": mock_mongo_collection(),
+        "transcript_annotations": mock_mongo_collection(),
         "users": mock_mongo_collection(),
         "bucket": mock_gridfs_bucket(),
     }
@@ -47,6 +53,14 @@ def mock_database_collections():
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="revision_response_cache")
+def fixture_revision_response_cache():
+    """The in-process cache of serialized responses, emptied before and after the test"""
+    revision_response_cache.clear()
+    yield revision_response_cache
+    revision_response_cache.clear()
+
+
 @pytest.fixture(name="mock_settings")
 def mock_application_settings(settings_json):
     """The mocked settings which overrides the applications need for environment variables or .env file"""
@@ -166,6 +180,12 @@ def fixture_hgvs_variant_json():
     return read_test_fixture("annotations-NM001017980_3_c_164G_T.json")
 
 
+@pytest.fixture(name="variant_nm001017980_3_c_164g_t_transcript_annotations_json")
+def fixture_hgvs_variant_transcript_annotations_json():
+    """JSON for the transcript annotations of the HGVS variant NM_001017980.3:c.164G>T"""
+    return read_test_fixture("transcript-annotations-NM001017980_3_c_164G_T.json")
+
+
 @pytest.fixture(name="genomic_units_collection_json")
 def fixture_genomic_unit_collection_json(gene_vma21_annotations_json, variant_nm001017980_3_c_164g_t_annotations_json):
     """JSON for the genomic units collection"""
@@ -2,15 +2,26 @@
 
 import pytest
 
+from src.conditional_response import entity_tag
 
-@pytest.mark.usefixtures("mock_security_get_project_authorization")
-def test_get_annotations_by_gene_in_analysis(
-    client, mock_access_token, mock_repositories, gene_vma21_annotations_json, cpam0002_analysis_json
-):
+
+@pytest.fixture(name="gene_vma21_analysis_view")
+def fixture_gene_vma21_analysis_view():
+    """The CPAM0002 analysis' view of the VMA21 gene's annotation values"""
+    return {
+        "_id": "vma21-view-id", "revision": 3, "annotations": {
+            "Entrez Gene Id": 203547, "HPO_NCBI_GENE_ID": "NCBIGene:203547", "Ensembl Gene Id": "ENSG00000160131",
+            "ClinGen_gene_url": "https://search.clinicalgenome.org/kb/genes/HGNC:22082", "OMIM": "Not Available",
+            "Gene Summary": "summary"
+        }
+    }
+
+
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
+def test_get_annotations_by_gene_in_analysis(client, mock_access_token, mock_repositories, gene_vma21_analysis_view):
     """Testing that the annotations by gene endpoint returns the annotations correctly"""
 
-    mock_repositories['analysis'].collection.find_one.return_value = cpam0002_analysis_json
-    mock_repositories['genomic_unit'].collection.find_one.return_value = gene_vma21_annotations_json
+    mock_repositories['genomic_unit'].analysis_views.collection.find_one.return_value = gene_vma21_analysis_view
     response = client.get(
         "/analysis/CPAM0002/gene/VMA21",
         headers={"Authorization": "Bearer " + mock_access_token},
@@ -18,17 +29,83 @@ def test_get_annotations_by_gene_in_analysis(
 
     assert response.status_code == 200
     assert len(response.json()) == 6
+    assert response.json()['Entrez Gene Id'] == 203547
+    assert response.headers['ETag'] == entity_tag("vma21-view-id", 3)
+    mock_repositories['analysis'].collection.find_one.assert_not_called()
+    mock_repositories['genomic_unit'].collection.find_one.assert_not_called()
+    mock_repositories['genomic_unit'].collection.aggregate.assert_not_called()
+
+
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
+def test_get_annotations_by_gene_not_modified(client, mock_access_token, mock_repositories, gene_vma21_analysis_view):
+    """Testing that the annotations by gene endpoint responds not modified when the view's revision is unchanged"""
+
+    views_collection = mock_repositories['genomic_unit'].analysis_views.collection
+    views_collection.find_one.reset_mock()
+    views_collection.find_one.return_value = gene_vma21_analysis_view
+    response = client.get(
+        "/analysis/CPAM0002/gene/VMA21",
+        headers={"Authorization": "Bearer " + mock_access_token, "If-None-Match": entity_tag("vma21-view-id", 3)},
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    views_collection.find_one.assert_called_once()
 
 
-@pytest.mark.usefixtures("mock_security_get_project_authorization")
-def test_get_annotations_by_hgvs_varian_in_analysis(
-    client, mock_access_token, mock_repositories, variant_nm001017980_3_c_164g_t_annotations_json,
-    cpam0002_analysis_json
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
+def test_get_annotations_by_gene_repeated_from_cache(
+    client, mock_access_token, mock_repositories, gene_vma21_analysis_view
 ):
+    """Testing that a repeated request for an unchanged revision is served without reading the view's values"""
+
+    views_collection = mock_repositories['genomic_unit'].analysis_views.collection
+    views_collection.find_one.reset_mock()
+    views_collection.find_one.return_value = gene_vma21_analysis_view
+
+    first_response = client.get(
+        "/analysis/CPAM0002/gene/VMA21", headers={"Authorization": "Bearer " + mock_access_token}
+    )
+    assert views_collection.find_one.call_count == 2
+
+    repeated_response = client.get(
+        "/analysis/CPAM0002/gene/VMA21", headers={"Authorization": "Bearer " + mock_access_token}
+    )
+    assert views_collection.find_one.call_count == 3
+    assert repeated_response.json() == first_response.json()
+
+    views_collection.find_one.return_value = {**gene_vma21_analysis_view, "revision": 4, "annotations": {"OMIM": "1"}}
+    revised_response = client.get(
+        "/analysis/CPAM0002/gene/VMA21", headers={"Authorization": "Bearer " + mock_access_token}
+    )
+    assert revised_response.json() == {"OMIM": "1"}
+    assert revised_response.headers['ETag'] == entity_tag("vma21-view-id", 4)
+
+
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
+def test_get_annotations_by_gene_not_found(client, mock_access_token, mock_repositories):
+    """Testing that the annotations by gene endpoint responds not found when the gene does not exist"""
+
+    mock_repositories['genomic_unit'].analysis_views.collection.find_one.return_value = None
+    response = client.get(
+        "/analysis/CPAM0002/gene/NOT-A-GENE",
+        headers={"Authorization": "Bearer " + mock_access_token},
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
+def test_get_annotations_by_hgvs_varian_in_analysis(client, mock_access_token, mock_repositories):
     """Testing that the annotations by HGVS variant endpoint returns the annotations correctly"""
 
-    mock_repositories['analysis'].collection.find_one.return_value = cpam0002_analysis_json
-    mock_repositories['genomic_unit'].collection.find_one.return_value = variant_nm001017980_3_c_164g_t_annotations_json
+    mock_repositories['genomic_unit'].analysis_views.collection.find_one.return_value = {
+        "_id": "variant-view-id", "revision": 1, "annotations": {
+            "ClinVar_Variation_Id": "581244",
+            "ClinVar_variant_url": "https://www.ncbi.nlm.nih.gov/clinvar/variation/581244",
+        }, "transcripts": [{"transcript_id": "NM_001017980.4", "SIFT Prediction": "deleterious", "SIFT Score": 0.02},
+                           {"transcript_id": "NM_001363810.1", "SIFT Prediction": "deleterious", "SIFT Score": 0.01}]
+    }
     response = client.get(
         "/analysis/CPAM0002/hgvsVariant/NM_001017980.3:c.164G>T",
         headers={"Authorization": "Bearer " + mock_access_token},
@@ -39,3 +116,7 @@ def test_get_annotations_by_hgvs_varian_in_analysis(
     assert len(response_annotations['transcripts']) == 2
     assert response_annotations['ClinVar_Variation_Id'] == "581244"
     assert response_annotations['ClinVar_variant_url'] == "https://www.ncbi.nlm.nih.gov/clinvar/variation/581244"
+    assert response_annotations['transcripts'][0]['SIFT Prediction'] == "deleterious"
+    assert response.headers['ETag'] == entity_tag("variant-view-id", 1)
+    mock_repositories['genomic_unit'].collection.aggregate.assert_not_called()
+    mock_repositories['genomic_unit'].transcripts.collection.find.assert_not_called()
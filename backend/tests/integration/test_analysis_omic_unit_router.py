@@ -5,9 +5,7 @@ from unittest.mock import patch
 import json
 import pytest
 
-from fastapi import BackgroundTasks
-
-from src.core.annotation import AnnotationService
+from src.dependencies import annotation_worker
 
 
 @pytest.mark.usefixtures("mock_security_get_project_authorization")
@@ -31,9 +29,12 @@ def test_adding_and_annotating_new_omic_unit_to_analysis( # pylint: disable=too-
 
     mock_repositories["analysis"].collection.find_one_and_update.return_value = successfully_added_genomic_units
     mock_repositories['annotation_config'].collection.find.return_value = annotations_config_collection_json
+    mock_repositories['annotation_config'].collection.aggregate.return_value = [{
+        "latest_id": "annotation-config-id", "updated_at": None, "datasets": 1
+    }]
     mock_repositories['genomic_unit'].collection.find.return_value = genomic_units_collection_json
 
-    with patch.object(BackgroundTasks, "add_task", return_value=None) as mock_background_add_task:
+    with patch.object(annotation_worker, "work_enqueued") as mock_work_enqueued:
         response = client.post(
             "/analysis/CPAM0002/genomic_unit",
             headers={"Authorization": "Bearer " + mock_access_token},
@@ -42,10 +43,7 @@ def test_adding_and_annotating_new_omic_unit_to_analysis( # pylint: disable=too-
 
         assert mock_annotation_queue.put.call_count == 9
 
-        mock_background_add_task.assert_called_once_with(
-            AnnotationService.process_tasks, mock_annotation_queue, mock_repositories['genomic_unit'],
-            mock_repositories['analysis']
-        )
+        mock_work_enqueued.set.assert_called()
 
         assert response.status_code == 200
         actual_genomic_units = json.loads(response.text)
@@ -5,6 +5,7 @@ import datetime
 
 import pytest
 
+from src.conditional_response import entity_tag
 from src.enums import ThirdPartyLinkType
 
 from ..test_utils import read_test_fixture
@@ -21,17 +22,34 @@ def test_get_analyses(client, mock_access_token, mock_repositories, analysis_col
     assert response.json()[1]["name"] == "CPAM0047"
 
 
+@pytest.mark.usefixtures("revision_response_cache")
 def test_get_analysis_summary(client, mock_access_token, mock_repositories, analysis_collection_json):
     """Testing if the analysis summary endpoint returns all of the analyses available"""
-    mock_repositories['user'].collection.aggregate.return_value = analysis_collection_json
+    mock_repositories['user'].collection.aggregate.side_effect = [[{"_id": "cpam0002-id", "revision": 4},
+                                                                   {"_id": "cpam0047-id", "revision": 1}],
+                                                                  analysis_collection_json]
     response = client.get("/analysis/summary", headers={"Authorization": "Bearer " + mock_access_token})
     assert len(response.json()) == 2
+    assert response.headers['ETag'] == entity_tag("cpam0002-id@4", "cpam0047-id@1")
 
 
-@pytest.mark.usefixtures("mock_security_get_project_authorization")
+@pytest.mark.usefixtures("revision_response_cache")
+def test_get_analysis_summary_not_modified(client, mock_access_token, mock_repositories):
+    """Testing that the analysis summary endpoint responds not modified when none of the analyses were revised"""
+    mock_repositories['user'].collection.aggregate.side_effect = [[{"_id": "cpam0002-id", "revision": 4}]]
+    response = client.get(
+        "/analysis/summary",
+        headers={"Authorization": "Bearer " + mock_access_token, "If-None-Match": entity_tag("cpam0002-id@4")}
+    )
+
+    assert response.status_code == 304
+
+
+@pytest.mark.usefixtures("mock_security_get_project_authorization", "revision_response_cache")
 def test_get_summary_by_name(client, mock_access_token, mock_repositories, cpam0002_analysis_json):
     """Tests the summary_by_name endpoint"""
-    mock_repositories['analysis'].collection.find_one.return_value = cpam0002_analysis_json
+    mock_repositories['analysis'].collection.find_one.side_effect = [{"_id": "cpam0002-id", "revision": 4},
+                                                                     cpam0002_analysis_json]
     response = client.get("/analysis/CPAM0002/summary", headers={"Authorization": "Bearer " + mock_access_token})
 
     assert response.status_code == 200
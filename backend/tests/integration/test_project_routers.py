@@ -4,10 +4,9 @@ import json
 
 from unittest.mock import patch
 import pytest
+from pymongo.errors import DuplicateKeyError
 
-from fastapi import BackgroundTasks
-
-from src.core.annotation import AnnotationService
+from src.dependencies import annotation_worker
 
 from ..test_utils import fixture_filepath
 
@@ -22,9 +21,12 @@ def test_import_with_new_analysis_json(
     mock_repositories["analysis"].collection.find_one.return_value = None
     mock_repositories["genomic_unit"].collection.find_one.return_value = None
     mock_repositories['annotation_config'].collection.find.return_value = annotations_config_collection_json
+    mock_repositories['annotation_config'].collection.aggregate.return_value = [{
+        "latest_id": "annotation-config-id", "updated_at": None, "datasets": 1
+    }]
     mock_repositories['genomic_unit'].collection.find.return_value = genomic_units_collection_json
 
-    with patch.object(BackgroundTasks, "add_task", return_value=None) as mock_background_add_task:
+    with patch.object(annotation_worker, "work_enqueued") as mock_work_enqueued:
         analysis_import_json_filepath = fixture_filepath('new-analysis-import.json')
         with open(analysis_import_json_filepath, "rb") as import_file:
             response = client.post(
@@ -37,12 +39,27 @@ def test_import_with_new_analysis_json(
 
             assert mock_annotation_queue.put.call_count == 9
 
-            mock_background_add_task.assert_called_once_with(
-                AnnotationService.process_tasks, mock_annotation_queue, mock_repositories['genomic_unit'],
-                mock_repositories['analysis']
-            )
+            mock_work_enqueued.set.assert_called()
 
     assert response.status_code == 200
     response_data = json.loads(response.text)
     assert response_data['latest_status'] == "Preparation"
     assert response_data['timeline'][0]['username'] == 'johndoe-client-id'
+
+
+@pytest.mark.usefixtures("mock_security_get_create_project_authorization")
+def test_import_analysis_name_existing_in_another_project(client, mock_access_token, mock_repositories):
+    """Testing that importing an analysis whose name exists within another project conflicts rather than failing"""
+    mock_repositories["analysis"].collection.find_one.return_value = None
+    mock_repositories["genomic_unit"].collection.find_one.return_value = None
+    mock_repositories["analysis"].collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key error")
+
+    with open(fixture_filepath('new-analysis-import.json'), "rb") as import_file:
+        response = client.post(
+            "/project/695d5b157709ebcd1c7325c2/analysis",
+            headers={"Authorization": "Bearer " + mock_access_token},
+            files={"phenotips_file": ("new-analysis-import.json", import_file.read())}
+        )
+
+    mock_repositories["analysis"].collection.insert_one.side_effect = None
+    assert response.status_code == 409
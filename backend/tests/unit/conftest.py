@@ -92,6 +92,12 @@ def fixture_hgvs_variant_json():
     return read_test_fixture("annotations-NM001017980_3_c_164G_T.json")
 
 
+@pytest.fixture(name="variant_nm001017980_3_c_164g_t_transcript_annotations_json")
+def fixture_hgvs_variant_transcript_annotations_json():
+    """JSON for the transcript annotations of the HGVS variant NM_001017980.3:c.164G>T"""
+    return read_test_fixture("transcript-annotations-NM001017980_3_c_164G_T.json")
+
+
 @pytest.fixture(name="genomic_unit_collection_json")
 def fixture_genomic_unit_collection_json(gene_vma21_annotations_json, variant_nm001017980_3_c_164g_t_annotations_json):
     """Returns array of JSON for the genomic units within the collection"""
@@ -105,7 +111,10 @@ def fixture_genomic_unit_collection(genomic_unit_collection_json):
     mock_collection = mock_mongo_collection()
     mock_collection.find = Mock(return_value=genomic_unit_collection_json)
 
-    return GenomicUnitCollection(mock_collection)
+    mock_analysis_views_collection = mock_mongo_collection()
+    mock_analysis_views_collection.distinct = Mock(return_value=[])
+
+    return GenomicUnitCollection(mock_collection, mock_mongo_collection(), mock_analysis_views_collection)
 
 
 @pytest.fixture(name="annotation_config_collection_json")
@@ -120,7 +129,9 @@ def fixture_annotation_config_collection(annotation_config_collection_json):
     """Returns the annotation collection for the datasets to be mocked"""
     mock_collection = mock_mongo_collection()
     mock_collection.find = Mock(return_value=annotation_config_collection_json)
-    mock_collection.find_one = Mock(return_value=read_test_fixture("annotations-config.json"))
+    mock_collection.aggregate = Mock(
+        return_value=[{"latest_id": "annotation-config-id", "updated_at": None, "datasets": 1}]
+    )
     return AnnotationConfigCollection(mock_collection)
 
 
@@ -131,7 +142,9 @@ def fixture_annotation_config_collection_with_cached_dataset():
     json_from_fixture = read_test_fixture("annotations-config-with-forge-using-cached-dependnecy.json")
     mock_collection = mock_mongo_collection()
     mock_collection.find = Mock(return_value=json_from_fixture)
-    mock_collection.find_one = Mock(return_value=read_test_fixture("annotations-config.json"))
+    mock_collection.aggregate = Mock(
+        return_value=[{"latest_id": "annotation-config-id", "updated_at": None, "datasets": 1}]
+    )
     return AnnotationConfigCollection(mock_collection)
 
 
@@ -1,11 +1,16 @@
 """Tests to verify annotation tasks"""
 
-from unittest.mock import Mock, patch
+import threading
+from unittest.mock import AsyncMock, Mock, patch
 import pytest
 
-from src.core.annotation import AnnotationService
+from src.core.annotation import AnnotationProcess, AnnotationQueue, AnnotationService
+from src.core.annotation_unit import AnnotationUnit
+from src.core.annotation_version_cache import AnnotationVersionCache
+from src.core.annotation_writer import BufferedAnnotationWriter
 from src.enums import GenomicUnitType
 from src.repository.analysis_collection import AnalysisCollection
+from src.repository.annotation_run_collection import AnnotationRunCollection
 from src.repository.genomic_unit_collection import GenomicUnitCollection
 
 from ...test_utils import SkipDependencies
@@ -25,11 +30,11 @@ def test_queuing_annotations_for_genomic_units(cpam0046_analysis, annotation_con
 
 def test_processing_cpam0046_annotation_tasks(process_cpam0046_tasks):
     """Verifies that each item on the annotation queue is read and executed"""
-    assert process_cpam0046_tasks['http'].call_count == 6
+    assert process_cpam0046_tasks['http'].call_count == 7
     assert process_cpam0046_tasks['none'].call_count == 0
     assert process_cpam0046_tasks['forge'].call_count == 2
 
-    assert process_cpam0046_tasks['extract'].call_count == 8
+    assert process_cpam0046_tasks['extract'].call_count == 9
 
 
 def test_processing_cpam0002_annotations_tasks(process_cpam0002_tasks):
@@ -38,33 +43,53 @@ def test_processing_cpam0002_annotations_tasks(process_cpam0002_tasks):
         CPAM analysis 0002
     """
 
-    assert process_cpam0002_tasks['http'].call_count == 6
+    assert process_cpam0002_tasks['http'].call_count == 7
     assert process_cpam0002_tasks['none'].call_count == 0
     assert process_cpam0002_tasks['forge'].call_count == 2
 
-    assert process_cpam0002_tasks['extract'].call_count == 8
+    assert process_cpam0002_tasks['extract'].call_count == 9
 
-    process_cpam0002_tasks['genomic_unit_collection'].annotate_genomic_unit.assert_called()
+    process_cpam0002_tasks['genomic_unit_collection'].bulk_annotate_genomic_unit.assert_called()
+
+
+def test_processing_cpam0002_loads_existing_annotations_once(process_cpam0002_tasks):
+    """Verifies the existing annotations of the analysis' genomic units are loaded once rather than queried for each"""
+    genomic_unit_collection = process_cpam0002_tasks['genomic_unit_collection']
+
+    genomic_unit_collection.find_annotated_datasets.assert_called_once()
+    genomic_unit_collection.annotation_exist.assert_not_called()
+
+
+def test_processing_cpam0002_loads_analysis_manifest_once(process_cpam0002_tasks):
+    """Verifies the analysis' manifest is loaded once rather than queried for each dataset's manifest entry"""
+    analysis_collection = process_cpam0002_tasks['analysis_collection']
+
+    analysis_collection.get_dataset_manifest.assert_called_once_with("CPAM0002")
+    analysis_collection.get_manifest_dataset_config.assert_not_called()
 
 
 def test_processing_cpam0002_annotation_tasks_for_datasets_with_dependencies(process_cpam0002_tasks):
     """
-    Tests that the dependencies will put the annotation task back onto the processing queue when its missing a
-    depedency
+    Tests that datasets with dependencies receive the annotation values of the datasets they depend on once those
+    are annotated, without querying for the dependencies' annotations.
     """
 
-    assert process_cpam0002_tasks['genomic_unit_collection'].find_genomic_unit_annotation_value.call_count == 4
+    genomic_unit_collection = process_cpam0002_tasks['genomic_unit_collection']
+    assert genomic_unit_collection.find_genomic_unit_annotation_value.call_count == 0
+
+    annotated_annotation_units = [write_call.args[1] for write_call in process_cpam0002_tasks['write'].call_args_list]
+    assert any(annotation_unit.genomic_unit.get('HGNC_ID') == '9000' for annotation_unit in annotated_annotation_units)
 
 
 def test_processing_cpam0002_datasets_with_dependencies(cpam0002_annotation_queue, process_cpam0002_tasks):
     """ Confirms that the datasets with dependencies configured to annotate for analysis CPAM0002 are processed """
     assert cpam0002_annotation_queue.empty()
 
-    assert process_cpam0002_tasks['http'].call_count == 6
+    assert process_cpam0002_tasks['http'].call_count == 7
     assert process_cpam0002_tasks['none'].call_count == 0
     assert process_cpam0002_tasks['forge'].call_count == 2
 
-    assert process_cpam0002_tasks['extract'].call_count == 8
+    assert process_cpam0002_tasks['extract'].call_count == 9
 
 
 def test_processing_cpam0002_version_annotation_tasks(process_cpam0002_tasks):
@@ -77,6 +102,302 @@ def test_processing_cpam0002_version_annotation_tasks(process_cpam0002_tasks):
     assert process_cpam0002_tasks['version'].call_count == 3
 
 
+def test_processing_cpam0002_versions_from_shared_version_cache(cpam0002_annotation_queue, cpam0002_analysis_json):
+    """Verifies no versions are calculated when a previous annotation run cached them in the shared version cache"""
+    mock_version_cache = Mock(spec=AnnotationVersionCache)
+    mock_version_cache.get_version.return_value = 'cached-version'
+    mock_extract_result = [{'data_set': 'mock_datset', 'data_source': 'mock_source', 'version': '0.0', 'value': '9000'}]
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract",
+              return_value=mock_extract_result), patch("src.core.annotation_task.VersionAnnotationTask.annotate") as
+        version_task_annotate, patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate") as http_task_annotate
+    ):
+        skip_depends = SkipDependencies()
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
+            skip_depends.skip_hgncid_get_value_first_time_mock
+        )
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue,
+            mock_genomic_unit_collection,
+            mock_analysis_collection,
+            version_cache=mock_version_cache
+        )
+
+    assert version_task_annotate.call_count == 0
+    assert http_task_annotate.call_count == 7
+    mock_version_cache.set_version.assert_not_called()
+
+
+def test_processing_cpam0046_saves_annotation_run_summary(cpam0046_annotation_queue, cpam0046_analysis_json):
+    """Verifies the summary of the annotation run's outcomes and version cache lookups is saved once it completes"""
+    mock_extract_result = [{'data_set': 'mock_datset', 'data_source': 'mock_source', 'version': '0.0', 'value': '9000'}]
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract", return_value=mock_extract_result),
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract_version",
+              return_value='fake-version'), patch("src.core.annotation_task.VersionAnnotationTask.annotate"),
+        patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate")
+    ):
+        skip_depends = SkipDependencies()
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
+            skip_depends.skip_hgncid_get_value_first_time_mock
+        )
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0046_analysis_json['manifest']
+        mock_run_collection = Mock(spec=AnnotationRunCollection)
+
+        AnnotationService.process_tasks(
+            cpam0046_annotation_queue,
+            mock_genomic_unit_collection,
+            mock_analysis_collection,
+            version_cache=AnnotationVersionCache(),
+            run_collection=mock_run_collection
+        )
+
+    run_summary = mock_run_collection.save_run.call_args.args[0]
+    assert run_summary['engine'] == "threaded"
+    assert run_summary['peak_queue_depth'] > 0
+    assert run_summary['units'] == [{'outcome': 'annotated', 'count': 9}]
+    assert [cache['cache'] for cache in run_summary['cache']] == ['version']
+    assert run_summary['cache'][0]['miss'] > 0
+    assert len(run_summary['extraction']) > 0
+
+
+def test_failed_version_not_calculated_again(cpam0002_annotation_queue, cpam0002_analysis_json):
+    """Verifies a version that failed to calculate is not requested again for each annotation unit waiting on it"""
+    with (
+        patch(
+            "src.core.annotation_task.AnnotationTaskInterface.extract_version",
+            side_effect=ValueError("Version endpoint unavailable")
+        ), patch("src.core.annotation_task.VersionAnnotationTask.annotate") as
+        version_task_annotate, patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate") as http_task_annotate
+    ):
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue,
+            mock_genomic_unit_collection,
+            mock_analysis_collection,
+            version_cache=AnnotationVersionCache()
+        )
+
+    assert cpam0002_annotation_queue.empty()
+    assert version_task_annotate.call_count == 3
+    assert http_task_annotate.call_count == 0
+
+
+def test_version_without_a_value_not_calculated_again(cpam0002_annotation_queue, cpam0002_analysis_json):
+    """Verifies a version attribute that extracts no version is cached and reused rather than calculated again"""
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract_version",
+              return_value=None), patch("src.core.annotation_task.VersionAnnotationTask.annotate") as
+        version_task_annotate, patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate",
+              return_value={}), patch("src.core.annotation_task.NoneAnnotationTask.annotate", return_value={})
+    ):
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue,
+            mock_genomic_unit_collection,
+            mock_analysis_collection,
+            version_cache=AnnotationVersionCache()
+        )
+
+    assert cpam0002_annotation_queue.empty()
+    assert version_task_annotate.call_count == 3
+
+
+def test_releasing_only_annotation_units_deferred_on_a_version():
+    """Verifies only the annotation units waiting on a version are released once its version task completes"""
+    processor = AnnotationProcess(AnnotationQueue(), Mock(spec=GenomicUnitCollection), Mock(spec=AnalysisCollection))
+    ensembl_annotation_unit = Mock(spec=AnnotationUnit)
+    clinvar_annotation_unit = Mock(spec=AnnotationUnit)
+    processor.defer_annotation_unit(ensembl_annotation_unit, "Ensembl-rest")
+    processor.defer_annotation_unit(clinvar_annotation_unit, "ClinVar-date")
+
+    processor.release_deferred_annotation_units("Ensembl-rest")
+
+    assert processor.queue.get() is ensembl_annotation_unit
+    assert processor.annotation_unit_queue_empty()
+    assert processor.deferred_annotation_units == {"ClinVar-date": [clinvar_annotation_unit]}
+
+
+def test_processing_completed_tasks_without_waiting_on_in_flight_tasks(cpam0002_annotation_queue):
+    """
+    Verifies that annotations from completed tasks are saved while another annotation task is still in-flight instead
+    of waiting on every in-flight task after each annotation unit is processed.
+    """
+    another_annotation_saved = threading.Event()
+    slow_task_results = []
+
+    def http_annotate_side_effect():
+        """The first HTTP task stays in-flight until another task's annotation is saved"""
+        if not slow_task_results:
+            slow_task_results.append(None)
+            slow_task_results[0] = another_annotation_saved.wait(timeout=5)
+        return {}
+
+    def bulk_annotate_side_effect(*_args):
+        """Signals the in-flight HTTP task once another task's annotations are written"""
+        another_annotation_saved.set()
+
+    mock_extract_result = [{'data_set': 'mock_datset', 'data_source': 'mock_source', 'version': '0.0', 'value': '9000'}]
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract", return_value=mock_extract_result),
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract_version",
+              return_value='fake-version'), patch("src.core.annotation_task.VersionAnnotationTask.annotate"),
+        patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate", side_effect=http_annotate_side_effect)
+    ):
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_genomic_unit_collection.bulk_annotate_genomic_unit.side_effect = bulk_annotate_side_effect
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = []
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue, mock_genomic_unit_collection, mock_analysis_collection
+        )
+
+    assert slow_task_results == [True]
+
+
+def test_processing_cpam0002_annotation_tasks_with_async_engine(cpam0002_annotation_queue, cpam0002_analysis_json):
+    """Verifies the async engine runs the same annotation tasks as coroutines using the pooled HTTP client"""
+    mock_extract_result = [{'data_set': 'mock_datset', 'data_source': 'mock_source', 'version': '0.0', 'value': '9000'}]
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract",
+              return_value=mock_extract_result) as extract_task_annotate,
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract_version", return_value='fake-version'),
+        patch("src.core.annotation_task.VersionAnnotationTask.annotate_async", new_callable=AsyncMock) as
+        version_task_annotate, patch("src.core.annotation_task.ForgeAnnotationTask.annotate") as forge_task_annotate,
+        patch("src.core.annotation_task.HttpAnnotationTask.annotate_async",
+              new_callable=AsyncMock) as http_task_annotate
+    ):
+        skip_depends = SkipDependencies()
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
+            skip_depends.skip_hgncid_get_value_first_time_mock
+        )
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue, mock_genomic_unit_collection, mock_analysis_collection, engine="async"
+        )
+
+    assert cpam0002_annotation_queue.empty()
+    assert version_task_annotate.await_count == 3
+    assert http_task_annotate.await_count == 7
+    assert forge_task_annotate.call_count == 2
+    assert extract_task_annotate.call_count == 9
+
+
+def test_async_engine_queries_outside_the_event_loop(cpam0002_annotation_queue, cpam0002_analysis_json):
+    """Verifies the async engine queries and writes annotations from worker threads rather than the event loop"""
+    event_loop_threads = set()
+    query_threads = set()
+
+    async def http_annotate_async_side_effect(*_args):
+        """Records the thread running the event loop's annotation tasks"""
+        event_loop_threads.add(threading.get_ident())
+        return {}
+
+    mock_extract_result = [{'data_set': 'mock_datset', 'data_source': 'mock_source', 'version': '0.0', 'value': '9000'}]
+    with (
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract", return_value=mock_extract_result),
+        patch("src.core.annotation_task.AnnotationTaskInterface.extract_version", return_value='fake-version'),
+        patch("src.core.annotation_task.VersionAnnotationTask.annotate_async",
+              new_callable=AsyncMock), patch("src.core.annotation_task.ForgeAnnotationTask.annotate"),
+        patch(
+            "src.core.annotation_task.HttpAnnotationTask.annotate_async", side_effect=http_annotate_async_side_effect
+        )
+    ):
+        skip_depends = SkipDependencies()
+        mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+        mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
+            skip_depends.skip_hgncid_get_value_first_time_mock
+        )
+        mock_genomic_unit_collection.find_annotated_datasets.side_effect = (
+            lambda *_args: query_threads.add(threading.get_ident()) or []
+        )
+        mock_genomic_unit_collection.bulk_annotate_genomic_unit.side_effect = (
+            lambda *_args: query_threads.add(threading.get_ident())
+        )
+        mock_analysis_collection = Mock(spec=AnalysisCollection)
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+
+        AnnotationService.process_tasks(
+            cpam0002_annotation_queue, mock_genomic_unit_collection, mock_analysis_collection, engine="async"
+        )
+
+    assert len(event_loop_threads) == 1
+    assert len(query_threads) > 0
+    assert event_loop_threads.isdisjoint(query_threads)
+
+
+def test_processing_datasets_forged_from_the_same_cached_dataset_together():
+    """Verifies the datasets forged from the same cached dataset are annotated by one task rather than one each"""
+    call_cache = [{"transcript_consequences": [{"transcript_id": "NM_001017980.4", "cadd_phred": 24, "revel": 0.61}]}]
+    genomic_unit = {
+        "unit": "NM_001017980.3:c.164G>T", "type": GenomicUnitType.HGVS_VARIANT, "transcript": "NM_001017980",
+        "ENSEMBL_VARIANT_HGVS_VARIANT_CALL_CACHE": call_cache
+    }
+    annotation_queue = AnnotationQueue()
+    for data_set, value_attribute in [("CADD", "cadd_phred"), ("revel", "revel")]:
+        annotation_queue.put(
+            AnnotationUnit(
+                genomic_unit, {
+                    "data_set": data_set, "data_source": "Ensembl", "genomic_unit_type": "hgvs_variant",
+                    "annotation_source_type": "forge", "base_string_cache": True,
+                    "base_string": "{ENSEMBL_VARIANT_HGVS_VARIANT_CALL_CACHE}", "attribute":
+                        f".{data_set} | .[].transcript_consequences[] | " +
+                        f"select( .transcript_id | contains(\"{{transcript}}\") ) | {{ value: .{value_attribute} }}",
+                    "dependencies": ["transcript", "ENSEMBL_VARIANT_HGVS_VARIANT_CALL_CACHE"
+                                    ], "versioning_type": "rest", "version_url":
+                                        "https://rest.ensembl.org/info/data/?content-type=application/json"
+                }, "CPAM0002"
+            )
+        )
+    mock_version_cache = Mock(spec=AnnotationVersionCache)
+    mock_version_cache.get_version.return_value = '112'
+    mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+    mock_genomic_unit_collection.annotation_exist.return_value = False
+    mock_analysis_collection = Mock(spec=AnalysisCollection)
+    mock_analysis_collection.get_dataset_manifest.return_value = []
+
+    with patch("src.core.annotation_task.ForgeAnnotationTask.annotate") as forge_task_annotate:
+        AnnotationService.process_tasks(
+            annotation_queue, mock_genomic_unit_collection, mock_analysis_collection, version_cache=mock_version_cache
+        )
+
+    saved_annotations = [
+        annotation for bulk_annotate_call in mock_genomic_unit_collection.bulk_annotate_genomic_unit.call_args_list
+        for annotation in bulk_annotate_call.args[1]
+    ]
+    assert forge_task_annotate.call_count == 0
+    assert mock_genomic_unit_collection.bulk_annotate_genomic_unit.call_count == 1
+    assert [(annotation['data_set'], annotation['value']) for annotation in saved_annotations] == [("CADD", 24),
+                                                                                                   ("revel", 0.61)]
+
+
 @pytest.fixture(name="cpam0046_hgvs_variant_json")
 def fixture_cpam0046_hgvs_variant(cpam0046_analysis):
     """Returns the HGVS variant within the CPAM0046 analysis."""
@@ -90,7 +411,7 @@ def fixture_cpam0046_hgvs_variant(cpam0046_analysis):
 
 
 @pytest.fixture(name="process_cpam0002_tasks")
-def fixture_extract_and_annotate_cpam0002(cpam0002_annotation_queue, get_dataset_manifest_config):
+def fixture_extract_and_annotate_cpam0002(cpam0002_annotation_queue, cpam0002_analysis_json):
     """
     Emulates processing the annotations for the configured genomic unit's datasets within the CPAM0002 analysis.
     """
@@ -108,7 +429,9 @@ def fixture_extract_and_annotate_cpam0002(cpam0002_annotation_queue, get_dataset
         extract_task_version_annotate, patch("src.core.annotation_task.VersionAnnotationTask.annotate") as
         version_task_annotate, patch("src.core.annotation_task.ForgeAnnotationTask.annotate") as forge_task_annotate,
         patch("src.core.annotation_task.HttpAnnotationTask.annotate") as http_task_annotate,
-        patch("src.core.annotation_task.NoneAnnotationTask.annotate") as none_task_annotate
+        patch("src.core.annotation_task.NoneAnnotationTask.annotate") as none_task_annotate,
+        patch.object(BufferedAnnotationWriter, "write", autospec=True,
+                     side_effect=BufferedAnnotationWriter.write) as annotation_writer_write
     ):
         skip_depends = SkipDependencies()
         mock_genomic_unit_collection = Mock(spec=GenomicUnitCollection)
@@ -116,10 +439,8 @@ def fixture_extract_and_annotate_cpam0002(cpam0002_annotation_queue, get_dataset
         mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
             skip_depends.skip_hgncid_get_value_first_time_mock
         )
-        mock_analysis_collection.get_manifest_dataset_config.return_value = get_dataset_manifest_config(
-            "CPAM0002", "VMA21", 'HGNC_ID'
-        )
-        mock_genomic_unit_collection.annotation_exist.return_value = False
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0002_analysis_json['manifest']
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
 
         AnnotationService.process_tasks(
             cpam0002_annotation_queue, mock_genomic_unit_collection, mock_analysis_collection
@@ -128,12 +449,13 @@ def fixture_extract_and_annotate_cpam0002(cpam0002_annotation_queue, get_dataset
         yield {
             'extract': extract_task_annotate, 'version': version_task_annotate, 'http': http_task_annotate,
             'none': none_task_annotate, 'forge': forge_task_annotate,
-            'genomic_unit_collection': mock_genomic_unit_collection, 'extract_version': extract_task_version_annotate
+            'genomic_unit_collection': mock_genomic_unit_collection, 'extract_version': extract_task_version_annotate,
+            'write': annotation_writer_write, 'analysis_collection': mock_analysis_collection
         }
 
 
 @pytest.fixture(name="process_cpam0046_tasks")
-def fixture_extract_and_annotate_cpam0046(cpam0046_annotation_queue, get_dataset_manifest_config):
+def fixture_extract_and_annotate_cpam0046(cpam0046_annotation_queue, cpam0046_analysis_json):
     """
     Emulates processing the annotations for the configured genomic unit's datasets within the CPAM0046 analysis.
     """
@@ -159,9 +481,8 @@ def fixture_extract_and_annotate_cpam0046(cpam0046_annotation_queue, get_dataset
         mock_genomic_unit_collection.find_genomic_unit_annotation_value.side_effect = (
             skip_depends.skip_hgncid_get_value_first_time_mock
         )
-        dependency_dataset = get_dataset_manifest_config("CPAM0046", "LMNA", 'HGNC_ID')
-        mock_analysis_collection.get_manifest_dataset_config.return_value = dependency_dataset
-        mock_genomic_unit_collection.annotation_exist.return_value = False
+        mock_analysis_collection.get_dataset_manifest.return_value = cpam0046_analysis_json['manifest']
+        mock_genomic_unit_collection.find_annotated_datasets.return_value = []
 
         AnnotationService.process_tasks(
             cpam0046_annotation_queue, mock_genomic_unit_collection, mock_analysis_collection
@@ -0,0 +1,41 @@
+"""Tests validating and indexing the annotation configuration"""
+from src.core.annotation_config_registry import AnnotationConfigRegistry, dataset_schema_errors
+from src.enums import GenomicUnitType
+
+
+def test_configuration_indexed_by_genomic_unit_type(annotation_config_collection_json):
+    """Tests that every dataset of the configuration is valid and indexed by its genomic unit type"""
+    registry = AnnotationConfigRegistry(annotation_config_collection_json)
+
+    assert not registry.invalid_datasets
+    assert len(registry.datasets_for_type(GenomicUnitType.GENE)) == 6
+    assert len(registry.datasets_for_type("hgvs_variant")) == 3
+    assert not registry.datasets_for_type(GenomicUnitType.TRANSCRIPT)
+
+
+def test_invalid_dataset_left_out(annotation_config_collection_json):
+    """Tests that a dataset with an invalid configuration is not indexed"""
+    invalid_dataset = {
+        "data_set": "ClinVar_Variation_Id", "data_source": "Ensembl", "genomic_unit_type": "hgvs_variant",
+        "annotation_source_type": "http", "attribute": ".clinvar", "versioning_type": "rest"
+    }
+    registry = AnnotationConfigRegistry([*annotation_config_collection_json, invalid_dataset])
+
+    assert registry.invalid_datasets == {
+        "ClinVar_Variation_Id": ["missing 'url'", "missing 'version_url'", "missing 'version_attribute'"]
+    }
+    assert len(registry.datasets_for_type(GenomicUnitType.HGVS_VARIANT)) == 3
+
+
+def test_dataset_schema_errors():
+    """Tests the reasons reported for the dataset configurations that cannot be annotated"""
+    assert dataset_schema_errors({"data_set": "OMIM"}) == [
+        "missing 'data_source'", "missing 'genomic_unit_type'", "missing 'annotation_source_type'",
+        "missing 'versioning_type'"
+    ]
+    assert dataset_schema_errors({
+        "data_set": "OMIM", "data_source": "OMIM", "genomic_unit_type": "protein", "annotation_source_type": "ftp",
+        "versioning_type": "date", "dependencies": "HGNC_ID"
+    }) == [
+        "unknown genomic unit type 'protein'", "unknown annotation source type 'ftp'", "'dependencies' is not a list"
+    ]
@@ -0,0 +1,129 @@
+"""Tests scheduling annotation units through the dependency graph of their datasets"""
+import pytest
+
+from src.core.annotation_dependency_graph import AnnotationDependencyGraph, GenomicUnitAnnotationGraph
+from src.core.annotation_unit import AnnotationUnit
+from src.enums import GenomicUnitType
+
+
+def test_dependency_graph_from_annotation_configuration(gene_dependency_graph):
+    """Verifies the datasets' dependencies are compiled into parents and children"""
+    assert gene_dependency_graph.parents['ClinGen_gene_url'] == ['HGNC_ID']
+    assert sorted(gene_dependency_graph.children['HPO_NCBI_GENE_ID']) == ['Entrez Gene Id', 'OMIM']
+    assert not gene_dependency_graph.cyclic_datasets
+
+
+def test_transcript_datasets_depend_on_transcript_id(variant_dependency_graph):
+    """Verifies transcript datasets implicitly depend on the 'transcript_id' dataset"""
+    assert variant_dependency_graph.parents['Polyphen Prediction'] == ['transcript_id']
+    assert not variant_dependency_graph.parents['transcript_id']
+
+
+def test_dependency_cycles_reported():
+    """Verifies datasets within a dependency cycle, and those depending on them, cannot be annotated"""
+    datasets = [
+        {"data_set": "A", "dependencies": ["C"]},
+        {"data_set": "B", "dependencies": ["A"]},
+        {"data_set": "C", "dependencies": ["B"]},
+        {"data_set": "D", "dependencies": ["C"]},
+        {"data_set": "E"},
+    ]
+
+    dependency_graph = AnnotationDependencyGraph("gene", datasets)
+
+    assert dependency_graph.cyclic_datasets == {"A", "B", "C", "D"}
+    assert set(dependency_graph.unschedulable_datasets({"unit": "VMA21"})) == {"A", "B", "C", "D"}
+
+
+def test_missing_genomic_unit_attribute_reported():
+    """Verifies datasets depending on a genomic unit attribute the genomic unit does not have cannot be annotated"""
+    datasets = [
+        {"data_set": "protvar_protein_linkout", "dependencies": ["protein"]},
+        {"data_set": "protvar_linkout_label", "dependencies": ["protvar_protein_linkout"]},
+        {"data_set": "CADD", "dependencies": ["transcript"]},
+    ]
+    dependency_graph = AnnotationDependencyGraph("hgvs_variant", datasets)
+
+    unschedulable = dependency_graph.unschedulable_datasets({"unit": "NM_001017980.3:c.164G>T", "transcript": "NM"})
+
+    assert unschedulable == {
+        "protvar_protein_linkout": "missing ['protein']",
+        "protvar_linkout_label": "depends on a dataset that cannot be annotated",
+    }
+
+
+def test_annotation_units_released_when_their_parents_complete(gene_dependency_graph, gene_annotation_units):
+    """Verifies a waiting annotation unit is released with its dependency's value when its parent completes"""
+    annotation_graph = GenomicUnitAnnotationGraph(gene_dependency_graph, list(gene_annotation_units.values()))
+    clingen = gene_annotation_units['ClinGen_gene_url']
+
+    assert not annotation_graph.is_runnable(clingen)
+    annotation_graph.wait_for_parents(clingen)
+
+    released = annotation_graph.complete(gene_annotation_units['HGNC_ID'], "HGNC:22082")
+
+    assert released == [clingen]
+    assert annotation_graph.is_runnable(clingen)
+    assert clingen.genomic_unit['HGNC_ID'] == "HGNC:22082"
+
+
+def test_transcript_datasets_released_when_transcript_id_completes(variant_dependency_graph, variant_annotation_units):
+    """Verifies transcript datasets are provisioned once 'transcript_id' is annotated"""
+    annotation_graph = GenomicUnitAnnotationGraph(variant_dependency_graph, list(variant_annotation_units.values()))
+    polyphen = variant_annotation_units['Polyphen Prediction']
+    annotation_graph.wait_for_parents(polyphen)
+
+    assert not annotation_graph.complete(variant_annotation_units['ClinVar_Variation_Id'], "1234")
+    assert annotation_graph.complete(variant_annotation_units['transcript_id'], "NM_001017980.3") == [polyphen]
+    assert polyphen.is_transcript_provisioned()
+
+
+def test_failed_annotation_unit_cancels_its_descendants(gene_dependency_graph, gene_annotation_units):
+    """Verifies the annotation units depending on a failed annotation unit are cancelled"""
+    annotation_graph = GenomicUnitAnnotationGraph(gene_dependency_graph, list(gene_annotation_units.values()))
+    annotation_graph.wait_for_parents(gene_annotation_units['OMIM'])
+
+    cancelled = annotation_graph.fail(gene_annotation_units['HPO_NCBI_GENE_ID'])
+
+    assert [annotation_unit.get_dataset_name() for annotation_unit in cancelled] == ['Entrez Gene Id', 'OMIM']
+    assert annotation_graph.is_cancelled(gene_annotation_units['Entrez Gene Id'])
+    assert not annotation_graph.waiting
+
+
+@pytest.fixture(name="gene_dependency_graph")
+def fixture_gene_dependency_graph(annotation_config_collection_json):
+    """The dependency graph of the gene datasets within the annotation configuration"""
+    return AnnotationDependencyGraph(
+        "gene", [dataset for dataset in annotation_config_collection_json if dataset['genomic_unit_type'] == "gene"]
+    )
+
+
+@pytest.fixture(name="variant_dependency_graph")
+def fixture_variant_dependency_graph(annotation_config_collection_json):
+    """The dependency graph of the HGVS variant datasets within the annotation configuration"""
+    return AnnotationDependencyGraph(
+        "hgvs_variant",
+        [dataset for dataset in annotation_config_collection_json if dataset['genomic_unit_type'] == "hgvs_variant"]
+    )
+
+
+@pytest.fixture(name="gene_annotation_units")
+def fixture_gene_annotation_units(gene_dependency_graph):
+    """An annotation unit for each gene dataset for the VMA21 gene"""
+    genomic_unit = {"unit": "VMA21", "type": GenomicUnitType.GENE}
+    return {
+        name: AnnotationUnit(genomic_unit, dataset, "CPAM0002")
+        for name, dataset in gene_dependency_graph.datasets.items()
+    }
+
+
+@pytest.fixture(name="variant_annotation_units")
+def fixture_variant_annotation_units(variant_dependency_graph):
+    """An annotation unit for each HGVS variant dataset for a VMA21 variant"""
+    genomic_unit = {
+        "unit": "NM_001017980.3:c.164G>T", "type": GenomicUnitType.HGVS_VARIANT, "transcript": "NM_001017980"
+    }
+    return {
+        name: AnnotationUnit(genomic_unit, dataset, "CPAM0002")
+        for name, dataset in variant_dependency_graph.datasets.items()
+    }
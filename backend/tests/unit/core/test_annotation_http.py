@@ -0,0 +1,103 @@
+"""Tests the shared HTTP clients used by annotation tasks"""
+import asyncio
+import concurrent.futures
+import threading
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+
+from src.core.annotation_http import AnnotationHttpClientPool, SingleFlight
+
+
+def test_http_client_pool_limits_connections_by_host():
+    """Verifies requests to the same host share a concurrency limit while other hosts have their own"""
+
+    async def host_limits():
+        http_client_pool = AnnotationHttpClientPool(max_connections_per_host=2)
+        ensembl_limit = http_client_pool.host_limit("https://rest.ensembl.org/info/data")
+        same_ensembl_limit = http_client_pool.host_limit("https://rest.ensembl.org/vep/human/hgvs/NM_001017980.3")
+        hgnc_limit = http_client_pool.host_limit("https://rest.genenames.org/fetch/symbol/VMA21")
+        await http_client_pool.aclose()
+        return ensembl_limit, same_ensembl_limit, hgnc_limit
+
+    ensembl_limit, same_ensembl_limit, hgnc_limit = asyncio.run(host_limits())
+
+    assert ensembl_limit is same_ensembl_limit
+    assert ensembl_limit is not hgnc_limit
+
+
+def test_single_flight_coalesces_concurrent_calls_for_the_same_key():
+    """Verifies concurrent calls for the same key wait on the first call and receive its result"""
+    single_flight = SingleFlight()
+    flight_lookups = threading.Semaphore(0)
+    release_leader = threading.Event()
+    function_calls = []
+
+    class ObservedFlights(dict):
+        """Signals each time a caller looks up whether its call is already in-flight"""
+
+        def get(self, key, default=None):
+            """Signals the lookup before returning the in-flight call"""
+            flight_lookups.release()
+            return super().get(key, default)
+
+    single_flight.flights = ObservedFlights()
+
+    def slow_request():
+        """Stays in-flight until the followers have called"""
+        function_calls.append("request")
+        release_leader.wait(timeout=5)
+        return {"symbol": "VMA21"}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(single_flight.do, "https://rest.ensembl.org/lookup/symbol/VMA21", slow_request)
+        followers = [
+            executor.submit(single_flight.do, "https://rest.ensembl.org/lookup/symbol/VMA21", slow_request)
+            for _ in range(2)
+        ]
+        for _ in range(3):
+            assert flight_lookups.acquire(timeout=5)  # pylint: disable=consider-using-with
+        release_leader.set()
+
+        results = [leader.result(timeout=5)] + [follower.result(timeout=5) for follower in followers]
+
+    assert function_calls == ["request"]
+    assert results == [{"symbol": "VMA21"}] * 3
+    assert not single_flight.flights
+
+
+def test_single_flight_raises_the_in_flight_exception():
+    """Verifies the exception raised by a call is raised again for the next call rather than cached"""
+    single_flight = SingleFlight()
+
+    def failing_request():
+        """Fails the request"""
+        raise ValueError("failed request")
+
+    with pytest.raises(ValueError):
+        single_flight.do("https://rest.ensembl.org/info/data", failing_request)
+
+    assert single_flight.do("https://rest.ensembl.org/info/data", lambda: "version") == "version"
+
+
+def test_http_client_pool_coalesces_concurrent_requests_for_the_same_url():
+    """Verifies concurrent requests for the same url share one request while other urls are requested separately"""
+
+    async def request_concurrently():
+        http_client_pool = AnnotationHttpClientPool()
+        http_client_pool.client = Mock()
+        http_client_pool.client.get = AsyncMock(return_value=httpx.Response(200, json={"symbol": "VMA21"}))
+
+        responses = await asyncio.gather(
+            http_client_pool.get("https://rest.ensembl.org/lookup/symbol/VMA21", "Ensembl"),
+            http_client_pool.get("https://rest.ensembl.org/lookup/symbol/VMA21", "Ensembl"),
+            http_client_pool.get("https://rest.genenames.org/fetch/symbol/VMA21", "HGNC"),
+        )
+        return http_client_pool, responses
+
+    http_client_pool, responses = asyncio.run(request_concurrently())
+
+    assert http_client_pool.client.get.await_count == 2
+    assert responses[0] is responses[1]
+    assert not http_client_pool.flights
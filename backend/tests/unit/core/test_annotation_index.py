@@ -0,0 +1,93 @@
+"""Tests indexing the existing annotations of the genomic units queued together to annotate"""
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.annotation_index import AnnotationIndex
+from src.core.annotation_unit import AnnotationUnit
+from src.enums import GenomicUnitType
+from src.repository.genomic_unit_collection import GenomicUnitCollection
+
+
+@pytest.mark.parametrize(
+    "dataset,version,expected", [
+        ({"data_set": "HGNC_ID", "data_source": "HGNC"}, "2024-09-06", True),
+        ({"data_set": "HGNC_ID", "data_source": "HGNC"}, "2024-10-01", False),
+        ({"data_set": "Entrez Gene Id", "data_source": "HGNC"}, "2024-09-06", False),
+    ],
+    ids=["annotated", "different_version", "not_annotated"]
+)
+def test_gene_annotation_exist(annotation_index, vma21_genomic_unit, dataset, version, expected):
+    """Verifies a gene's annotation exists when its dataset, data source, and version are annotated"""
+    annotation_unit = AnnotationUnit(vma21_genomic_unit, dataset)
+    annotation_unit.set_latest_version(version)
+
+    assert annotation_index.annotation_exist(annotation_unit) is expected
+
+
+@pytest.mark.parametrize(
+    "data_set,expected", [("SIFT Score", True), ("Polyphen Score", False)],
+    ids=["every_transcript_annotated", "one_transcript_not_annotated"]
+)
+def test_transcript_annotation_exist(annotation_index, variant_genomic_unit, data_set, expected):
+    """Verifies a transcript dataset only exists when every one of the variant's transcripts is annotated"""
+    annotation_unit = AnnotationUnit(
+        variant_genomic_unit, {"data_set": data_set, "data_source": "Ensembl", "transcript": True}
+    )
+    annotation_unit.set_latest_version("112")
+
+    assert annotation_index.annotation_exist(annotation_unit) is expected
+
+
+def test_loads_with_one_aggregation(
+    annotation_index, genomic_unit_collection, vma21_genomic_unit, variant_genomic_unit
+):
+    """Verifies the index is loaded with one query for every genomic unit"""
+    assert annotation_index.is_loaded()
+    genomic_unit_collection.find_annotated_datasets.assert_called_once_with([vma21_genomic_unit, variant_genomic_unit])
+
+
+@pytest.fixture(name="vma21_genomic_unit")
+def fixture_vma21_genomic_unit():
+    """Returns the VMA21 gene genomic unit"""
+    return {"unit": "VMA21", "type": GenomicUnitType.GENE}
+
+
+@pytest.fixture(name="variant_genomic_unit")
+def fixture_variant_genomic_unit():
+    """Returns the NM_001017980.3:c.164G>T HGVS variant genomic unit"""
+    return {"unit": "NM_001017980.3:c.164G>T", "type": GenomicUnitType.HGVS_VARIANT}
+
+
+@pytest.fixture(name="annotation_index")
+def fixture_annotation_index(genomic_unit_collection, vma21_genomic_unit, variant_genomic_unit):
+    """Returns an annotation index loaded for the VMA21 gene and one of its variants"""
+    annotation_index = AnnotationIndex([vma21_genomic_unit, variant_genomic_unit])
+    annotation_index.load(genomic_unit_collection)
+    return annotation_index
+
+
+@pytest.fixture(name="genomic_unit_collection")
+def fixture_genomic_unit_collection():
+    """Returns a genomic unit collection with the annotated datasets of the VMA21 gene and one of its variants"""
+    genomic_unit_collection = Mock(spec=GenomicUnitCollection)
+    genomic_unit_collection.find_annotated_datasets.return_value = [{
+        "gene": "VMA21",
+        "annotations": [[{"data_set": "HGNC_ID", "annotations": [{"data_source": "HGNC", "version": "2024-09-06"}]}]],
+        "transcripts": [],
+    }, {
+        "hgvs_variant": "NM_001017980.3:c.164G>T",
+        "annotations": [],
+        "transcripts": [{
+            "transcript_id": "NM_001017980.4", "annotations": [
+                [{"data_set": "SIFT Score", "annotations": [{"data_source": "Ensembl", "version": "112"}]}],
+                [{"data_set": "Polyphen Score", "annotations": [{"data_source": "Ensembl", "version": "112"}]}],
+            ]
+        }, {
+            "transcript_id": "NM_001363810.1",
+            "annotations": [[{"data_set": "SIFT Score", "annotations": [{"data_source": "Ensembl", "version": "112"}]}],
+                           ]
+        }],
+    }]
+
+    return genomic_unit_collection
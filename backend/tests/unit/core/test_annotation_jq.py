@@ -0,0 +1,72 @@
+"""Tests compiling, caching, and parameterizing the jq queries configured for datasets"""
+from src.core.annotation_jq import compile_jq, extract_with_placeholders, extract_group_with_placeholders
+from src.core.annotation_jq import parameterize_jq
+
+TRANSCRIPT_QUERY = '.[].transcript_consequences[] | select( .transcript_id | contains("{transcript}") ) | .gene_id'
+
+VEP_JSON = [{
+    "transcript_consequences": [
+        {"transcript_id": "NM_001017980.3", "gene_id": "203547"},
+        {"transcript_id": "NM_001363810.1", "gene_id": "100506164"},
+    ]
+}]
+
+
+def test_parameterize_placeholder_within_string():
+    """Verifies placeholders within string literals become interpolations of the $vars object"""
+    parameterized = parameterize_jq(TRANSCRIPT_QUERY, ["transcript"])
+
+    assert parameterized == TRANSCRIPT_QUERY.replace("{transcript}", '\\($vars["transcript"])')
+
+
+def test_parameterize_placeholder_outside_string():
+    """Verifies placeholders outside of string literals cannot be parameterized"""
+    assert parameterize_jq('.[] | select(.id == {Entrez Gene Id})', ["Entrez Gene Id"]) is None
+
+
+def test_parameterize_placeholder_after_interpolation():
+    """Verifies placeholders following an existing interpolation within the string are still parameterized"""
+    jq_query = '{ "value": "NCBIGene:\\(.entrez_id) {gene}" }'
+
+    assert parameterize_jq(jq_query, ["gene"]) == '{ "value": "NCBIGene:\\(.entrez_id) \\($vars["gene"])" }'
+
+
+def test_extract_with_placeholders_matches_substituted_query():
+    """Verifies the parameterized query extracts the same results as substituting the placeholders into the query"""
+    parameterized = list(extract_with_placeholders(TRANSCRIPT_QUERY, {"transcript": "NM_001017980"}, VEP_JSON))
+    substituted = list(
+        extract_with_placeholders(TRANSCRIPT_QUERY.replace("{transcript}", "NM_001017980"), {}, VEP_JSON)
+    )
+
+    assert parameterized == substituted == ["203547"]
+
+
+def test_extract_with_placeholders_reuses_compiled_program():
+    """Verifies one compiled program is shared by the genomic units that use different placeholder values"""
+    compile_jq.cache_clear()
+
+    first = list(extract_with_placeholders(TRANSCRIPT_QUERY, {"transcript": "NM_001017980"}, VEP_JSON))
+    second = list(extract_with_placeholders(TRANSCRIPT_QUERY, {"transcript": "NM_001363810"}, VEP_JSON))
+
+    assert first == ["203547"]
+    assert second == ["100506164"]
+    assert compile_jq.cache_info().misses == 1
+    assert compile_jq.cache_info().hits == 1
+
+
+def test_extract_with_placeholders_outside_string_substitutes_query():
+    """Verifies placeholders that cannot be parameterized are substituted into the query's text"""
+    results = extract_with_placeholders(
+        '.[] | select(.id == {Entrez Gene Id}) | .symbol', {"Entrez Gene Id": "203547"},
+        [{"id": 203547, "symbol": "VMA21"}, {"id": 1, "symbol": "OTHER"}]
+    )
+
+    assert list(results) == ["VMA21"]
+
+
+def test_extract_group_with_placeholders():
+    """Verifies each query run together on the same JSON has the same results as when it is run separately"""
+    gene_query = '.[].transcript_consequences[] | .gene_id'
+    results = extract_group_with_placeholders([TRANSCRIPT_QUERY, gene_query], {"transcript": "NM_001363810"}, VEP_JSON)
+
+    assert results == [["100506164"], ["203547", "100506164"]]
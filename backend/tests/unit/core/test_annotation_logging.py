@@ -0,0 +1,79 @@
+"""Tests logging the events of annotation units"""
+import json
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.annotation import format_annotation_logging
+from src.core.annotation_logging import AnnotationEventLogger, truncated_value
+from src.core.annotation_unit import AnnotationUnit
+from src.enums import GenomicUnitType
+
+
+def test_text_event_formatted_with_padded_label(annotation_unit_vma21, caplog):
+    """Tests that a 'text' event is logged after the annotation unit's padded label"""
+    event_logger = AnnotationEventLogger(logging.getLogger("test.annotation"), format_annotation_logging)
+
+    with caplog.at_level(logging.INFO, logger="test.annotation"):
+        event_logger.info(annotation_unit_vma21, "Version Calculated %s...", "112")
+
+    assert caplog.messages == [f"{format_annotation_logging(annotation_unit_vma21)} Version Calculated 112..."]
+
+
+def test_json_event(annotation_unit_vma21, caplog):
+    """Tests that a 'json' event is logged as a compact JSON line"""
+    event_logger = AnnotationEventLogger(logging.getLogger("test.annotation"), format_annotation_logging, "json")
+    annotation_unit_vma21.set_latest_version("112")
+
+    with caplog.at_level(logging.INFO, logger="test.annotation"):
+        event_logger.error(annotation_unit_vma21, "Exception [%s]", "Not Found")
+
+    assert json.loads(caplog.messages[0]) == {
+        "analysis": "CPAM0002", "unit": "VMA21", "dataset": "Ensembl Gene Id", "data_source": "Ensembl",
+        "version": "112", "message": "Exception [Not Found]"
+    }
+    assert caplog.messages[0].startswith('{"analysis":"CPAM0002","unit":"VMA21",')
+
+
+def test_event_not_formatted_when_level_disabled(annotation_unit_vma21):
+    """Tests that neither the label nor the message is formatted for a disabled level"""
+    text_label = Mock()
+    disabled_logger = logging.getLogger("test.annotation.disabled")
+    disabled_logger.setLevel(logging.WARNING)
+    event_logger = AnnotationEventLogger(disabled_logger, text_label)
+
+    event_logger.info(annotation_unit_vma21, "Saving %s...", "value")
+    event_logger.saving(annotation_unit_vma21, "value")
+
+    text_label.assert_not_called()
+
+
+@pytest.mark.parametrize("sample_rate,expected_logged", [(1.0, 100), (0.1, 10), (0.25, 25), (0, 0)])
+def test_saving_events_sampled(annotation_unit_vma21, sample_rate, expected_logged):
+    """Tests that the 'Saving' events are logged by the sample rate"""
+    event_logger = AnnotationEventLogger(logging.getLogger("test.annotation.sampled"), format_annotation_logging)
+    event_logger.configure("text", sample_rate)
+    event_logger.log = Mock()
+    event_logger.logger.setLevel(logging.INFO)
+
+    for value in range(100):
+        event_logger.saving(annotation_unit_vma21, value)
+
+    assert event_logger.log.call_count == expected_logged
+
+
+def test_saved_value_truncated():
+    """Tests that a large annotation value is truncated"""
+    assert truncated_value("short") == "short"
+    assert truncated_value("x" * 250) == f"{'x' * 200}...[50 more characters]"
+
+
+@pytest.fixture(name="annotation_unit_vma21")
+def fixture_annotation_unit_vma21():
+    """An annotation unit of the VMA21 gene's 'Ensembl Gene Id' dataset for the CPAM0002 analysis"""
+    dataset = {
+        "data_set": "Ensembl Gene Id", "data_source": "Ensembl", "genomic_unit_type": "gene",
+        "annotation_source_type": "http", "versioning_type": "rest"
+    }
+    return AnnotationUnit({"unit": "VMA21", "type": GenomicUnitType.GENE}, dataset, analysis_name="CPAM0002")
@@ -0,0 +1,54 @@
+"""Tests the snapshot of an analysis' dataset manifest used during an annotation run"""
+import pytest
+
+from src.core.annotation_manifest import AnalysisManifestSnapshot
+from src.core.annotation_unit import AnnotationUnit
+
+
+def test_snapshot_dataset_config_matches_manifest(manifest_snapshot, get_dataset_manifest_config):
+    """Verifies the snapshot's dataset entry is the same as the analysis' manifest entry"""
+    assert manifest_snapshot.get_dataset_config("VMA21", "HGNC_ID"
+                                               ) == get_dataset_manifest_config("CPAM0002", "VMA21", "HGNC_ID")
+
+
+def test_snapshot_dataset_config_missing(manifest_snapshot):
+    """Verifies None is returned for a dataset that is not in the genomic unit's manifest"""
+    assert manifest_snapshot.get_dataset_config("VMA21", "Polyphen Score") is None
+    assert manifest_snapshot.get_dataset_config("LMNA", "HGNC_ID") is None
+
+
+def test_snapshot_dataset_config_is_a_copy(manifest_snapshot):
+    """Verifies changing a returned dataset entry does not change the snapshot"""
+    manifest_snapshot.get_dataset_config("NM_001017980.3:c.164G>T", "transcript_id")['transcript'] = True
+
+    assert 'transcript' not in manifest_snapshot.get_dataset_config("NM_001017980.3:c.164G>T", "transcript_id")
+
+
+def test_snapshot_add_annotation_unit(manifest_snapshot):
+    """Verifies a saved annotation unit's dataset is added to the snapshot without replacing an existing entry"""
+    annotation_unit = AnnotationUnit({"unit": "VMA21", "type": "gene"}, {
+        "data_set": "ClinGen_gene_url", "data_source": "ClinGen", "genomic_unit_type": "gene"
+    }, "CPAM0002")
+    annotation_unit.set_latest_version("rosalution-manifest-01")
+    existing_count = len(manifest_snapshot)
+
+    manifest_snapshot.add(annotation_unit)
+    annotation_unit.dataset['data_set'] = "Gene Summary"
+    manifest_snapshot.add(annotation_unit)
+
+    assert len(manifest_snapshot) == existing_count + 1
+    assert manifest_snapshot.get_dataset_config("VMA21", "ClinGen_gene_url")['version'] == "rosalution-manifest-00"
+    assert manifest_snapshot.get_dataset_config("VMA21", "Gene Summary") == {
+        "data_set": "Gene Summary", "data_source": "ClinGen", "version": "rosalution-manifest-01"
+    }
+
+
+def test_snapshot_of_missing_analysis():
+    """Verifies the snapshot of an analysis that does not exist has no datasets"""
+    assert len(AnalysisManifestSnapshot(None)) == 0
+
+
+@pytest.fixture(name="manifest_snapshot")
+def fixture_manifest_snapshot(cpam0002_analysis_json):
+    """Returns the manifest snapshot of the CPAM0002 analysis"""
+    return AnalysisManifestSnapshot(cpam0002_analysis_json['manifest'])
@@ -0,0 +1,86 @@
+"""Tests recording, exposing, and summarizing the metrics of annotation runs"""
+import pytest
+
+from src.core.annotation_metrics import AnnotationMetrics, format_labels
+
+
+def test_counter_and_gauge_exposition(metrics):
+    """Tests that counters and gauges are exposed with their help, type, and labelled samples"""
+    metrics.increment("rosalution_annotation_units_total", outcome="annotated")
+    metrics.increment("rosalution_annotation_units_total", outcome="annotated")
+    metrics.set_gauge("rosalution_annotation_queue_depth", 7)
+
+    exposition = metrics.exposition().splitlines()
+
+    assert "# TYPE rosalution_annotation_units_total counter" in exposition
+    assert 'rosalution_annotation_units_total{outcome="annotated"} 2' in exposition
+    assert "# HELP rosalution_annotation_queue_depth Annotation units waiting within the annotation queue" in exposition
+    assert "rosalution_annotation_queue_depth 7" in exposition
+
+
+def test_histogram_exposition_cumulative_buckets(metrics):
+    """Tests that a histogram's buckets count the observations at or below each bucket"""
+    metrics.observe("rosalution_annotation_http_request_seconds", 0.05, data_source="Ensembl")
+    metrics.observe("rosalution_annotation_http_request_seconds", 0.5, data_source="Ensembl")
+    metrics.observe("rosalution_annotation_http_request_seconds", 3, data_source="Ensembl")
+
+    exposition = metrics.exposition().splitlines()
+
+    assert 'rosalution_annotation_http_request_seconds_bucket{data_source="Ensembl",le="0.1"} 1' in exposition
+    assert 'rosalution_annotation_http_request_seconds_bucket{data_source="Ensembl",le="1"} 2' in exposition
+    assert 'rosalution_annotation_http_request_seconds_bucket{data_source="Ensembl",le="+Inf"} 3' in exposition
+    assert 'rosalution_annotation_http_request_seconds_sum{data_source="Ensembl"} 3.55' in exposition
+    assert 'rosalution_annotation_http_request_seconds_count{data_source="Ensembl"} 3' in exposition
+
+
+def test_label_values_escaped():
+    """Tests that quotes, backslashes, and line feeds within label values are escaped"""
+    assert format_labels((("type", 'Not "Found"\\\n'),)) == '{type="Not \\"Found\\"\\\\\\n"}'
+
+
+def test_timer_records_when_context_raises():
+    """Tests that the timer records the elapsed seconds even when the timed context raises"""
+    clock_readings = iter([10.0, 10.25])
+    metrics = AnnotationMetrics(buckets=(1,), clock=lambda: next(clock_readings))
+
+    with pytest.raises(ValueError):
+        with metrics.timer("rosalution_annotation_extraction_seconds", data_source="ClinVar"):
+            raise ValueError("Invalid jq query")
+
+    assert "rosalution_annotation_extraction_seconds_sum{data_source=\"ClinVar\"} 0.25" in metrics.exposition()
+
+
+def test_run_summary_only_includes_the_run(metrics):
+    """Tests that the run summary only includes the samples recorded since the run's snapshot"""
+    metrics.increment("rosalution_annotation_units_total", outcome="annotated")
+    metrics.observe("rosalution_annotation_write_seconds", 0.2, operation="annotations")
+    before = metrics.snapshot()
+
+    metrics.increment("rosalution_annotation_units_total", outcome="annotated", amount=3)
+    metrics.increment("rosalution_annotation_failures_total", type="HTTPError", data_source="Ensembl")
+    metrics.observe("rosalution_annotation_write_seconds", 0.1, operation="annotations")
+    metrics.observe("rosalution_annotation_write_seconds", 0.3, operation="annotations")
+
+    summary = metrics.run_summary(before)
+
+    assert summary['units'] == [{'outcome': 'annotated', 'count': 3}]
+    assert summary['failures'] == [{'data_source': 'Ensembl', 'type': 'HTTPError', 'count': 1}]
+    assert summary['writes'] == [{
+        'operation': 'annotations', 'count': 2, 'seconds': pytest.approx(0.4), 'mean_seconds': pytest.approx(0.2)
+    }]
+    assert summary['http_requests'] == []
+
+
+def test_run_summary_cache_hit_rate(metrics):
+    """Tests that the run summary reports each cache's hits, misses, and hit rate"""
+    before = metrics.snapshot()
+    for result in ["hit", "hit", "hit", "miss"]:
+        metrics.increment("rosalution_annotation_cache_requests_total", cache="version", result=result)
+
+    assert metrics.run_summary(before)['cache'] == [{'cache': 'version', 'hit': 3, 'miss': 1, 'hit_rate': 0.75}]
+
+
+@pytest.fixture(name="metrics")
+def fixture_metrics():
+    """Annotation metrics without any recorded samples"""
+    return AnnotationMetrics()
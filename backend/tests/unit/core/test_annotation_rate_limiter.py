@@ -0,0 +1,183 @@
+"""Tests rate limiting and retrying the HTTP requests made to annotation sources"""
+import asyncio
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+import requests
+
+from src.core.annotation_http import AnnotationHttpClientPool, rate_limited_get
+from src.core.annotation_rate_limiter import AnnotationRateLimiter, TokenBucket, parse_retry_after
+
+
+class FakeClock:  # pylint: disable=too-few-public-methods
+    """A monotonic clock that only advances when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reserves_available_tokens_without_waiting():
+    """Verifies requests within the bucket's capacity are not delayed"""
+    bucket = TokenBucket(rate=2, clock=FakeClock())
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_delays_requests_exceeding_the_rate():
+    """Verifies each request beyond the capacity waits for its token to refill"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_token_bucket_pause_delays_the_next_request():
+    """Verifies pausing a bucket, such as for a 'Retry-After', delays the next request by the paused seconds"""
+    bucket = TokenBucket(rate=10, clock=FakeClock())
+    bucket.pause(3)
+
+    assert bucket.reserve() == pytest.approx(3.1)
+
+
+@pytest.mark.parametrize("retry_after,expected", [(None, None), ("7", 7.0), ("-2", 0.0), ("not-a-date", None)])
+def test_parse_retry_after(retry_after, expected):
+    """Verifies the 'Retry-After' header is parsed as seconds"""
+    assert parse_retry_after(retry_after) == expected
+
+
+def test_parse_retry_after_http_date():
+    """Verifies a 'Retry-After' HTTP date in the past does not delay"""
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_rate_limiter_prefers_data_source_limit_over_host():
+    """Verifies limits are configured by data source or the url's host"""
+    rate_limiter = AnnotationRateLimiter({"Ensembl": 15, "api-v3.monarchinitiative.org": 5})
+
+    ensembl_bucket = rate_limiter.bucket_for("https://rest.ensembl.org/info/data", "Ensembl")
+    monarch_bucket = rate_limiter.bucket_for("https://api-v3.monarchinitiative.org/v3/api/entity/HGNC:1", "Monarch")
+
+    assert ensembl_bucket.rate == 15
+    assert monarch_bucket.rate == 5
+    assert rate_limiter.bucket_for("https://hpo.jax.org/api/hpo/gene/45614", "HPO") is None
+
+
+def test_rate_limiter_retry_delay_honors_retry_after():
+    """Verifies the 'Retry-After' is the retry delay and pauses the source's bucket"""
+    rate_limiter = AnnotationRateLimiter({"rest.ensembl.org": 15})
+
+    assert rate_limiter.retry_delay("https://rest.ensembl.org/info/data", "Ensembl", 0, "2") == 2
+    assert rate_limiter.wait_seconds("https://rest.ensembl.org/info/data", "Ensembl") > 2
+
+
+def test_rate_limiter_retry_delay_caps_retry_after():
+    """Verifies a 'Retry-After' longer than the maximum backoff is capped, as is the pause of the source's bucket"""
+    rate_limiter = AnnotationRateLimiter({"rest.ensembl.org": 15}, backoff_max_seconds=30)
+
+    assert rate_limiter.retry_delay("https://rest.ensembl.org/info/data", "Ensembl", 0, "86400") == 30
+    assert rate_limiter.wait_seconds("https://rest.ensembl.org/info/data", "Ensembl") < 31
+
+
+def test_rate_limiter_retry_delay_exponential_backoff_is_jittered_and_capped():
+    """Verifies the backoff without a 'Retry-After' is within the exponential window and never exceeds the maximum"""
+    rate_limiter = AnnotationRateLimiter(backoff_base_seconds=0.5, backoff_max_seconds=3)
+
+    for attempt, window in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 3.0)]:
+        assert 0 <= rate_limiter.retry_delay("https://rest.ensembl.org", None, attempt) <= window
+
+
+def test_rate_limited_get_retries_throttled_responses():
+    """Verifies a 429 response is retried after the 'Retry-After' until the request succeeds"""
+    throttled = Mock(status_code=429, headers={"Retry-After": "1"})
+    succeeded = Mock(status_code=200, headers={})
+    rate_limiter = AnnotationRateLimiter()
+
+    with (
+        patch("src.core.annotation_http.requests.get", side_effect=[throttled, succeeded]) as
+        mock_get, patch("src.core.annotation_http.time.sleep") as mock_sleep
+    ):
+        actual = rate_limited_get("https://rest.ensembl.org/info/data", "Ensembl", rate_limiter)
+
+    assert actual is succeeded
+    assert mock_get.call_count == 2
+    mock_sleep.assert_called_once_with(1.0)
+
+
+def test_rate_limited_get_returns_last_response_when_retries_exhausted():
+    """Verifies the throttled response is returned once the retries are exhausted to be raised by the task"""
+    throttled = Mock(status_code=503, headers={})
+    rate_limiter = AnnotationRateLimiter(max_retries=2)
+
+    with (
+        patch("src.core.annotation_http.requests.get", return_value=throttled) as
+        mock_get, patch("src.core.annotation_http.time.sleep")
+    ):
+        actual = rate_limited_get("https://rest.ensembl.org/info/data", "Ensembl", rate_limiter)
+
+    assert actual is throttled
+    assert mock_get.call_count == 3
+
+
+def test_rate_limited_get_retries_connection_errors():
+    """Verifies requests that fail to connect or time out are retried, and the last error raised once exhausted"""
+    succeeded = Mock(status_code=200, headers={})
+    rate_limiter = AnnotationRateLimiter(max_retries=2)
+
+    with (
+        patch("src.core.annotation_http.requests.get",
+              side_effect=[requests.ConnectionError(), succeeded]), patch("src.core.annotation_http.time.sleep")
+    ):
+        assert rate_limited_get("https://rest.ensembl.org/info/data", "Ensembl", rate_limiter) is succeeded
+
+    with (
+        patch("src.core.annotation_http.requests.get", side_effect=requests.Timeout()) as
+        mock_get, patch("src.core.annotation_http.time.sleep"), pytest.raises(requests.Timeout)
+    ):
+        rate_limited_get("https://rest.ensembl.org/info/data", "Ensembl", rate_limiter)
+
+    assert mock_get.call_count == 3
+
+
+def test_http_client_pool_retries_throttled_responses():
+    """Verifies the pooled asynchronous client retries a throttled response"""
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json={"releases": [112]})]
+
+    async def get_with_retry():
+        http_client_pool = AnnotationHttpClientPool(rate_limiter=AnnotationRateLimiter())
+        with patch.object(http_client_pool.client, "get", side_effect=responses) as mock_get:
+            response = await http_client_pool.get("https://rest.ensembl.org/info/data", "Ensembl")
+        await http_client_pool.aclose()
+        return response, mock_get.call_count
+
+    response, call_count = asyncio.run(get_with_retry())
+
+    assert response.status_code == 200
+    assert call_count == 2
+
+
+def test_http_client_pool_retries_transport_errors():
+    """Verifies the pooled asynchronous client retries a request that failed to connect"""
+    responses = [httpx.ConnectError("Connection refused"), httpx.Response(200, json={"releases": [112]})]
+
+    async def get_with_retry():
+        http_client_pool = AnnotationHttpClientPool(rate_limiter=AnnotationRateLimiter(backoff_base_seconds=0))
+        with patch.object(http_client_pool.client, "get", side_effect=responses) as mock_get:
+            response = await http_client_pool.get("https://rest.ensembl.org/info/data", "Ensembl")
+        await http_client_pool.aclose()
+        return response, mock_get.call_count
+
+    response, call_count = asyncio.run(get_with_retry())
+
+    assert response.status_code == 200
+    assert call_count == 2
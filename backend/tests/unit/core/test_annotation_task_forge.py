@@ -1,7 +1,7 @@
 """Tests Annotation Tasks and the creation of them"""
 import pytest
 
-from src.core.annotation_task import ForgeAnnotationTask
+from src.core.annotation_task import ForgeAnnotationGroupTask, ForgeAnnotationTask
 from src.enums import GenomicUnitType
 from src.core.annotation_unit import AnnotationUnit
 
@@ -79,6 +79,40 @@ def test_extraction_forge_from_cache_dataset_dependency_hpo_ncbi_id(forge_annota
     assert actual_extractions[0]['value'] == 'NCBIGene:6305'
 
 
+def test_extraction_forge_group_from_cache_dataset(
+    hgvs_variant_genomic_unit, cadd_dataset_config, polyphen_dataset_config
+):
+    """Verifies the datasets forged from the same cached dataset are extracted together like they are separately"""
+    cadd_annotation_unit = AnnotationUnit(hgvs_variant_genomic_unit, cadd_dataset_config)
+    polyphen_annotation_unit = AnnotationUnit(hgvs_variant_genomic_unit, polyphen_dataset_config)
+    group_task = ForgeAnnotationGroupTask([cadd_annotation_unit, polyphen_annotation_unit])
+
+    extractions = group_task.extract_group(group_task.annotate())
+
+    assert [annotation_unit for annotation_unit, _ in extractions] == [cadd_annotation_unit, polyphen_annotation_unit]
+    assert extractions[0][1] == ForgeAnnotationTask(cadd_annotation_unit).extract({
+        "CADD": hgvs_variant_genomic_unit['ENSEMBL_VARIANT_CALL_CACHE']
+    })
+    assert [annotation['value'] for annotation in extractions[1][1]] == ['possibly_damaging', 'probably_damaging']
+    assert [annotation['transcript_id'] for annotation in extractions[1][1]] == ['NM_001017980.4', 'NM_001363810.1']
+
+
+def test_extraction_forge_group_reports_failing_dataset(hgvs_variant_genomic_unit, cadd_dataset_config):
+    """Verifies a dataset that fails to extract from the cached dataset does not fail the other datasets"""
+    failing_dataset_config = {
+        **cadd_dataset_config, "data_set": "failing", "attribute": ".failing | .[] | error(\"failed\")"
+    }
+    cadd_annotation_unit = AnnotationUnit(hgvs_variant_genomic_unit, cadd_dataset_config)
+    failing_annotation_unit = AnnotationUnit(hgvs_variant_genomic_unit, failing_dataset_config)
+    group_task = ForgeAnnotationGroupTask([cadd_annotation_unit, failing_annotation_unit])
+
+    extractions = group_task.extract_group(group_task.annotate())
+
+    assert extractions[0][1][0]['value'] == 24
+    assert extractions[1][0] is failing_annotation_unit
+    assert isinstance(extractions[1][1], RuntimeError)
+
+
 ## Fixtures ##
 
 
@@ -1,4 +1,8 @@
 """Tests Annotation Tasks and the creation of them"""
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
 import pytest
 
 from src.core.annotation_task import AnnotationTaskFactory, HttpAnnotationTask
@@ -86,6 +90,63 @@ def test_annotation_extraction_value_error_exception(http_annotation_task_gene,
         assert 'Failed to annotate "HPO"' in runtime_error
 
 
+def test_http_annotation_task_annotate_async(http_annotation_task_gene):
+    """Verifies the HTTP annotation task requests the built url with the pooled client and returns the JSON"""
+    mock_pool = AsyncMock()
+    mock_pool.get.return_value = httpx.Response(
+        200, json={"diseaseAssoc": []}, request=httpx.Request("GET", "https://hpo.jax.org/api/hpo/gene/45614")
+    )
+
+    actual = asyncio.run(http_annotation_task_gene.annotate_async(mock_pool))
+
+    mock_pool.get.assert_awaited_once_with("https://hpo.jax.org/api/hpo/gene/45614", "HPO")
+    assert actual == {"diseaseAssoc": []}
+
+
+def test_http_annotation_task_annotate_async_raises_http_error(http_annotation_task_gene):
+    """Verifies that a failing response status raises an HTTP error for the annotation process to track"""
+    mock_pool = AsyncMock()
+    mock_pool.get.return_value = httpx.Response(
+        429, text="Too Many Requests", request=httpx.Request("GET", "https://hpo.jax.org/api/hpo/gene/45614")
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(http_annotation_task_gene.annotate_async(mock_pool))
+
+
+def test_http_annotation_task_uses_cached_response(http_annotation_task_gene):
+    """Verifies a cached response for the url and the dataset's version is returned without requesting it"""
+    mock_response_cache = Mock()
+    mock_response_cache.find_response.return_value = {"diseaseAssoc": []}
+    http_annotation_task_gene.annotation_unit.set_latest_version("2024-09-16")
+    http_annotation_task_gene.set_response_cache(mock_response_cache)
+
+    with patch("src.core.annotation_task.coalesced_get") as mock_get:
+        actual = http_annotation_task_gene.annotate()
+
+    mock_get.assert_not_called()
+    mock_response_cache.find_response.assert_called_once_with(
+        "https://hpo.jax.org/api/hpo/gene/45614", "HPO", "2024-09-16"
+    )
+    assert actual == {"diseaseAssoc": []}
+
+
+def test_http_annotation_task_caches_response(http_annotation_task_gene):
+    """Verifies a requested response is cached for the url and the dataset's version"""
+    mock_response_cache = Mock()
+    mock_response_cache.find_response.return_value = None
+    http_annotation_task_gene.annotation_unit.set_latest_version("2024-09-16")
+    http_annotation_task_gene.set_response_cache(mock_response_cache)
+
+    with patch("src.core.annotation_task.coalesced_get") as mock_get:
+        mock_get.return_value.json.return_value = {"diseaseAssoc": []}
+        http_annotation_task_gene.annotate()
+
+    mock_response_cache.save_response.assert_called_once_with(
+        "https://hpo.jax.org/api/hpo/gene/45614", "HPO", "2024-09-16", {"diseaseAssoc": []}
+    )
+
+
 ## Fixtures ##
 
 
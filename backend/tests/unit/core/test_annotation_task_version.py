@@ -1,7 +1,9 @@
 """Tests Annotation Tasks and the creation of them"""
+import asyncio
 from datetime import date
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 import requests
 
@@ -32,6 +34,7 @@ def test_process_annotation_versioning_all_types(genomic_unit, dataset_name, exp
     """Verifies that Version Annotation Tasks process and annotate for all 3 versioning types- date, rest, rosalution"""
 
     mock_response = Mock(spec=requests.Response)
+    mock_response.status_code = 200
     mock_response.json.return_value = {"releases": [112]}
 
     with (patch("requests.get", return_value=mock_response), patch('src.core.annotation_task.date') as mock_date):
@@ -42,6 +45,24 @@ def test_process_annotation_versioning_all_types(genomic_unit, dataset_name, exp
         assert actual_version_json == expected
 
 
+@pytest.mark.parametrize(
+    "genomic_unit,dataset_name,expected", [
+        ('VMA21', 'Entrez Gene Id', {"rosalution": "rosalution-manifest-00"}),
+        ('VMA21', 'Ensembl Gene Id', {"releases": [112]}),
+    ]
+)
+def test_process_annotation_versioning_async(genomic_unit, dataset_name, expected, get_version_task):
+    """Verifies that only REST versioning requests the version using the pooled HTTP client"""
+    mock_pool = AsyncMock()
+    mock_pool.get.return_value = httpx.Response(200, json={"releases": [112]})
+
+    task = get_version_task(genomic_unit, dataset_name)
+    actual_version_json = asyncio.run(task.annotate_async(mock_pool))
+
+    assert actual_version_json == expected
+    assert mock_pool.get.await_count == (1 if task.annotation_unit.get_dataset_version_type() == "rest" else 0)
+
+
 @pytest.mark.parametrize(
     "genomic_unit,dataset_name,version_to_extract,expected", [
         ('VMA21', 'Entrez Gene Id', {"rosalution": "rosalution-manifest-00"}, "rosalution-manifest-00"),
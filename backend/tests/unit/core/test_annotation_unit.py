@@ -1,7 +1,7 @@
 """Tests for annotation unit class"""
 import pytest
 
-from src.core.annotation_unit import AnnotationUnit
+from src.core.annotation_unit import AnnotationUnit, genomic_unit_record
 
 
 def test_annotation_unit_gets_missing_dependencies(annotation_unit_lmna):
@@ -24,22 +24,31 @@ def test_annotation_unit_not_ready_for_annotation(annotation_unit_lmna):
     assert actual is False
 
 
-def test_annotation_unit_should_continue_annotation(annotation_unit_lmna):
-    """
-    Verifies if the annotation unit should continue annotation for both cases
-    of annotation_unit with delay_count not exceeded and exceeded.
-    """
+def test_annotation_units_share_genomic_unit_record(annotation_unit_lmna):
+    """Verifies that a dependency resolved for an annotation unit does not change the genomic unit's other units"""
+    unit_record = genomic_unit_record({'unit': 'LMNA'})
+    clingen = AnnotationUnit(unit_record, annotation_unit_lmna.dataset)
+    omim = AnnotationUnit(unit_record, {"data_set": "OMIM", "dependencies": ["HGNC_ID"]})
 
-    assert annotation_unit_lmna.should_continue_annotation()
+    clingen.set_annotation_for_dependency('HGNC_ID', "HGNC:6636")
 
+    assert omim.genomic_unit is unit_record
+    assert clingen.genomic_unit['HGNC_ID'] == "HGNC:6636"
+    assert not clingen.get_missing_dependencies()
+    assert omim.get_missing_dependencies() == ['HGNC_ID']
+    assert 'HGNC_ID' not in unit_record
 
-def test_annotation_unit_should_not_continue_annotation(annotation_unit_lmna_exceeded_delay_count):
-    """
-    Verifies if the annotation unit should not continue annotation for the case
-    of annotation_unit with exceeded delay_count.
-    """
 
-    assert not annotation_unit_lmna_exceeded_delay_count.should_continue_annotation()
+def test_genomic_unit_record_is_read_only():
+    """Verifies that the record shared by a genomic unit's annotation units cannot be changed through them"""
+    genomic_unit = {'unit': 'LMNA'}
+    unit_record = genomic_unit_record(genomic_unit)
+    genomic_unit['HGNC_ID'] = "HGNC:6636"
+
+    assert 'HGNC_ID' not in unit_record
+    assert genomic_unit_record(unit_record) is unit_record
+    with pytest.raises(TypeError):
+        unit_record['unit'] = 'VMA21'
 
 
 @pytest.fixture(name="annotation_unit_lmna")
@@ -49,7 +58,7 @@ def fixture_annotation_unit_lmna():
     dataset = {
         "data_set": "ClinGen_gene_url", "data_source": "Rosalution", "genomic_unit_type": "gene",
         "annotation_source_type": "forge", "base_string": "https://search.clinicalgenome.org/kb/genes/{HGNC_ID}",
-        "attribute": "{ \"ClinGen_gene_url\": .ClinGen_gene_url }", "dependencies": ["HGNC_ID"], "delay_count": 5
+        "attribute": "{ \"ClinGen_gene_url\": .ClinGen_gene_url }", "dependencies": ["HGNC_ID"]
     }
     return AnnotationUnit(genomic_unit, dataset)
 
@@ -59,10 +68,3 @@ def fixture_annotation_unit_lmna_has_dependencies(annotation_unit_lmna):
     """Provides annotation unit that has all of its dependencies gathered"""
     annotation_unit_lmna.set_annotation_for_dependency("HGNC_ID", "FAKE_HGNC_ID_VALUE")
     return annotation_unit_lmna
-
-
-@pytest.fixture(name="annotation_unit_lmna_exceeded_delay_count")
-def fixture_annotation_unit_lmna_with_annotated_dependency(annotation_unit_lmna):
-    """Returns the annotation unit for the genomic unit LMNA and the dataset Clingen gene url"""
-    annotation_unit_lmna.dataset['delay_count'] = 20
-    return annotation_unit_lmna
@@ -0,0 +1,70 @@
+"""Tests the version cache shared by annotation runs"""
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.annotation_version_cache import AnnotationVersionCache
+
+ENSEMBL_VERSION_URL = "https://rest.ensembl.org/info/data/?content-type=application/json"
+
+
+def test_version_cached_until_expired(clock):
+    """Verifies a cached version is returned until its time to live has passed"""
+    version_cache = AnnotationVersionCache(ttl_seconds=60, clock=clock)
+    version_cache.set_version(ENSEMBL_VERSION_URL, 112)
+
+    clock.return_value = 1059.0
+    assert version_cache.get_version(ENSEMBL_VERSION_URL) == 112
+
+    clock.return_value = 1060.0
+    assert version_cache.get_version(ENSEMBL_VERSION_URL) is None
+
+
+def test_version_without_a_value_cached(clock):
+    """Verifies a None version is cached and returned rather than the default of a version that is not cached"""
+    version_cache = AnnotationVersionCache(ttl_seconds=60, clock=clock)
+    not_cached = object()
+
+    assert version_cache.get_version(ENSEMBL_VERSION_URL, not_cached) is not_cached
+
+    version_cache.set_version(ENSEMBL_VERSION_URL, None)
+
+    assert version_cache.get_version(ENSEMBL_VERSION_URL, not_cached) is None
+
+
+def test_version_persisted(clock):
+    """Verifies a calculated version is saved to the version collection"""
+    version_collection = Mock()
+    version_cache = AnnotationVersionCache(ttl_seconds=60, version_collection=version_collection, clock=clock)
+
+    version_cache.set_version(ENSEMBL_VERSION_URL, 112)
+
+    version_collection.save_version.assert_called_once_with(
+        ENSEMBL_VERSION_URL, 112, datetime.fromtimestamp(1000.0, timezone.utc)
+    )
+
+
+def test_version_loaded_from_persisted_versions(clock):
+    """Verifies a version persisted by a previous application process is loaded once and then kept in memory"""
+    version_collection = Mock()
+    version_collection.find_version.return_value = {
+        "version": 112, "calculated_at": datetime.fromtimestamp(990.0, timezone.utc).replace(tzinfo=None)
+    }
+    version_cache = AnnotationVersionCache(ttl_seconds=60, version_collection=version_collection, clock=clock)
+
+    assert version_cache.get_version(ENSEMBL_VERSION_URL) == 112
+    assert version_cache.get_version(ENSEMBL_VERSION_URL) == 112
+    version_collection.find_version.assert_called_once_with(
+        ENSEMBL_VERSION_URL, datetime.fromtimestamp(940.0, timezone.utc)
+    )
+
+    clock.return_value = 1050.0
+    version_collection.find_version.return_value = None
+    assert version_cache.get_version(ENSEMBL_VERSION_URL) is None
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+    """A clock frozen in time that the tests can advance"""
+    return Mock(return_value=1000.0)
@@ -0,0 +1,67 @@
+"""Tests the long-lived worker that processes the application's annotation queue"""
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.annotation import AnnotationQueue
+from src.core.annotation_worker import AnnotationWorker
+
+
+def test_enqueued_annotation_units_processed_by_started_worker(annotation_worker):
+    """Verifies the worker processes the annotation units enqueued before it started with its own task executor"""
+    processed = threading.Event()
+    with patch("src.core.annotation_worker.AnnotationService.process_tasks") as mock_process_tasks:
+        mock_process_tasks.side_effect = lambda *args, **kwargs: processed.set()
+
+        annotation_worker.put(Mock())
+        annotation_worker.start()
+
+        assert processed.wait(timeout=5)
+        annotation_worker.stop(timeout=5)
+
+    assert not annotation_worker.queue.empty()
+    assert mock_process_tasks.call_args.kwargs['task_executor'] is not None
+    assert mock_process_tasks.call_args.kwargs['engine'] == "threaded"
+
+
+def test_enqueuing_without_started_worker(annotation_worker):
+    """Verifies routes only enqueue annotation units and never process the queue themselves"""
+    with patch("src.core.annotation_worker.AnnotationService.process_tasks") as mock_process_tasks:
+        annotation_worker.put(Mock())
+
+    mock_process_tasks.assert_not_called()
+    assert not annotation_worker.queue.empty()
+    assert annotation_worker.work_enqueued.is_set()
+
+
+def test_worker_continues_after_processing_fails(annotation_worker):
+    """Verifies an unexpected failure while processing the queue does not stop the worker"""
+    first_processing = threading.Event()
+    second_processing = threading.Event()
+
+    def process_tasks_side_effect(*_args, **_kwargs):
+        """Fails the first time the queue is processed"""
+        if not first_processing.is_set():
+            first_processing.set()
+            raise RuntimeError("unexpected")
+        second_processing.set()
+
+    with patch("src.core.annotation_worker.AnnotationService.process_tasks") as mock_process_tasks:
+        mock_process_tasks.side_effect = process_tasks_side_effect
+
+        annotation_worker.start()
+        assert first_processing.wait(timeout=5)
+        annotation_worker.put(Mock())
+
+        assert second_processing.wait(timeout=5)
+        assert annotation_worker.is_running()
+        annotation_worker.stop(timeout=5)
+
+    assert not annotation_worker.is_running()
+
+
+@pytest.fixture(name="annotation_worker")
+def fixture_annotation_worker():
+    """An annotation worker with mocked repositories"""
+    return AnnotationWorker(AnnotationQueue(), Mock(), Mock())
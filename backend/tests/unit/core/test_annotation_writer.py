@@ -0,0 +1,116 @@
+"""Tests buffering the annotations saved while annotating to write them in bulk"""
+from unittest.mock import Mock, call
+
+import pytest
+
+from src.core.annotation_unit import AnnotationUnit
+from src.core.annotation_writer import BufferedAnnotationWriter
+from src.enums import GenomicUnitType
+from src.repository.analysis_collection import AnalysisCollection
+from src.repository.genomic_unit_collection import GenomicUnitCollection
+
+
+def test_writes_buffered_annotations_grouped_by_genomic_unit(annotation_writer, annotation_units):
+    """Verifies the buffered annotations are written with one bulk write for each genomic unit"""
+    vma21_cadd, vma21_revel, sbf1_cadd = annotation_units
+    annotation_writer.write(vma21_cadd, [annotation_for("CADD", 24)])
+    annotation_writer.write(vma21_revel, [annotation_for("revel", 0.61)])
+    annotation_writer.write(sbf1_cadd, [annotation_for("CADD", 12)])
+
+    annotation_writer.flush()
+
+    bulk_annotate_calls = annotation_writer.genomic_unit_collection.bulk_annotate_genomic_unit.call_args_list
+    assert [(call.args[0]['unit'], [annotation['value'] for annotation in call.args[1]]) for call in bulk_annotate_calls
+           ] == [("VMA21", [24, 0.61]), ("SBF1", [12])]
+    annotation_writer.manifest.analysis_collection.add_datasets_to_manifest.assert_has_calls([
+        call("CPAM0002", {"VMA21": [manifest_dataset("CADD"), manifest_dataset("revel")]}),
+        call("CPAM0046", {"SBF1": [manifest_dataset("CADD")]}),
+    ])
+    refresh_calls = annotation_writer.genomic_unit_collection.refresh_analysis_annotations.call_args_list
+    assert [(call.args[0]['unit'], call.args[1]) for call in refresh_calls] == [("VMA21", ["CPAM0002"]),
+                                                                                ("SBF1", ["CPAM0046"])]
+    assert not annotation_writer.has_pending_writes()
+
+
+def test_flushes_once_buffer_holds_batch_size(annotation_writer, annotation_units):
+    """Verifies the annotations are written once the buffer holds the batch size of annotations"""
+    annotation_writer.batch_size = 2
+    vma21_cadd, vma21_revel, _ = annotation_units
+
+    annotation_writer.write(vma21_cadd, [annotation_for("CADD", 24)])
+    annotation_writer.manifest.analysis_collection.add_datasets_to_manifest.assert_not_called()
+
+    annotation_writer.write(vma21_revel, [annotation_for("revel", 0.61)])
+    annotation_writer.genomic_unit_collection.bulk_annotate_genomic_unit.assert_called_once()
+    annotation_writer.manifest.analysis_collection.add_datasets_to_manifest.assert_called_once()
+
+
+def test_flushes_once_oldest_annotation_waited_flush_seconds(annotation_writer, annotation_units):
+    """Verifies the annotations are written once the oldest buffered annotation has waited the flush seconds"""
+    vma21_cadd, _, _ = annotation_units
+    annotation_writer.write(vma21_cadd, [annotation_for("CADD", 24)])
+
+    annotation_writer.clock.return_value = 100.5
+    assert annotation_writer.seconds_until_flush() == 0.5
+    annotation_writer.flush_if_due()
+    annotation_writer.genomic_unit_collection.bulk_annotate_genomic_unit.assert_not_called()
+
+    annotation_writer.clock.return_value = 101.0
+    annotation_writer.flush_if_due()
+    annotation_writer.genomic_unit_collection.bulk_annotate_genomic_unit.assert_called_once()
+    assert annotation_writer.seconds_until_flush() is None
+
+
+def test_adds_existing_annotations_to_manifest_once(annotation_writer, annotation_units):
+    """Verifies an annotation unit whose annotation exists is added to the manifest once without writing annotations"""
+    vma21_cadd, _, _ = annotation_units
+    annotation_writer.add_to_manifest(vma21_cadd)
+    annotation_writer.add_to_manifest(vma21_cadd)
+    assert len(annotation_writer.manifest) == 1
+
+    annotation_writer.flush()
+
+    annotation_writer.genomic_unit_collection.bulk_annotate_genomic_unit.assert_not_called()
+    annotation_writer.manifest.analysis_collection.add_datasets_to_manifest.assert_called_once_with(
+        "CPAM0002", {"VMA21": [manifest_dataset("CADD")]}
+    )
+    annotation_writer.genomic_unit_collection.refresh_analysis_annotations.assert_called_once_with(
+        vma21_cadd.genomic_unit, ["CPAM0002"]
+    )
+
+
+def manifest_dataset(data_set):
+    """Returns the manifest entry for the dataset"""
+    return {data_set: {"data_source": "Ensembl", "version": "112"}}
+
+
+def annotation_for(data_set, value):
+    """Returns an extracted annotation for the dataset"""
+    return {"data_set": data_set, "data_source": "Ensembl", "version": "112", "value": value}
+
+
+@pytest.fixture(name="annotation_writer")
+def fixture_annotation_writer():
+    """Returns an annotation writer with mocked collections and clock"""
+    return BufferedAnnotationWriter(
+        Mock(spec=GenomicUnitCollection),
+        Mock(spec=AnalysisCollection),
+        flush_seconds=1.0,
+        clock=Mock(return_value=100.0)
+    )
+
+
+@pytest.fixture(name="annotation_units")
+def fixture_annotation_units():
+    """Returns annotation units for the VMA21 gene's CADD and revel datasets and the SBF1 gene's CADD dataset"""
+    vma21 = {"unit": "VMA21", "type": GenomicUnitType.GENE}
+    sbf1 = {"unit": "SBF1", "type": GenomicUnitType.GENE}
+    annotation_units = [
+        AnnotationUnit(vma21, {"data_set": "CADD", "data_source": "Ensembl"}, "CPAM0002"),
+        AnnotationUnit(vma21, {"data_set": "revel", "data_source": "Ensembl"}, "CPAM0002"),
+        AnnotationUnit(sbf1, {"data_set": "CADD", "data_source": "Ensembl"}, "CPAM0046"),
+    ]
+    for annotation_unit in annotation_units:
+        annotation_unit.set_latest_version("112")
+
+    return annotation_units
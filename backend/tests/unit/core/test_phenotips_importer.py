@@ -19,7 +19,7 @@ def test_import_genomic_unit_data_gene(phenotips_importer):
     """Tests the format_genomic_unit_data function"""
     data = {"gene": "BRCA1"}
     actual = phenotips_importer.import_genomic_unit_collection_data(data, "gene")
-    assert actual == {"gene": "BRCA1", "gene_symbol": "BRCA1", "annotations": []}
+    assert actual == {"gene": "BRCA1", "gene_symbol": "BRCA1", "annotations": {}}
 
 
 def test_import_genomic_unit_data_incorrect_format(phenotips_importer):
@@ -0,0 +1,54 @@
+"""Tests the aggregation that reads a genomic unit's annotations matching an analysis' manifest"""
+from src.enums import GenomicUnitType
+from src.repository.analysis_annotations import analysis_annotations_pipeline
+
+
+def test_gene_pipeline_joins_only_the_gene_manifest():
+    """Verifies the analysis is joined with only its manifest entries for the gene and without transcripts"""
+    pipeline = analysis_annotations_pipeline({'unit': 'VMA21', 'type': GenomicUnitType.GENE}, 'CPAM0002')
+
+    assert pipeline[:2] == [{"$match": {"gene": "VMA21"}}, {"$limit": 1}]
+    analysis_lookup = pipeline[2]["$lookup"]
+    assert analysis_lookup["from"] == "analyses"
+    assert analysis_lookup["pipeline"][0] == {"$match": {"name": "CPAM0002"}}
+    manifest_filter = analysis_lookup["pipeline"][-1]["$project"]["manifest"]["$filter"]
+    assert manifest_filter["cond"] == {"$eq": ["$$unit_manifest.unit", "VMA21"]}
+    assert all(stage.get("$lookup", {}).get("from") != "transcript_annotations" for stage in pipeline)
+    assert list(pipeline[-1]["$project"]) == ["_id", "annotations"]
+
+
+def test_hgvs_variant_pipeline_joins_transcript_annotations():
+    """Verifies an HGVS variant's transcript annotations are joined by the variant with the unit's manifest"""
+    variant = 'NM_001017980.3:c.164G>T'
+    pipeline = analysis_annotations_pipeline({'unit': variant, 'type': GenomicUnitType.HGVS_VARIANT}, 'CPAM0002')
+
+    assert pipeline[0] == {"$match": {"hgvs_variant": variant}}
+    transcripts_lookup = pipeline[-3]["$lookup"]
+    assert transcripts_lookup["from"] == "transcript_annotations"
+    assert transcripts_lookup["localField"] == "hgvs_variant"
+    assert transcripts_lookup["foreignField"] == "hgvs_variant"
+    assert transcripts_lookup["let"] == {"manifest": "$manifest"}
+    assert pipeline[-1]["$project"]["transcripts"] == "$transcripts.annotations"
+
+
+def test_manifest_is_indexed_once_for_the_unit_and_its_transcripts():
+    """Verifies the unit's manifest is indexed by dataset once and shared with the transcripts' values"""
+    variant = 'NM_001017980.3:c.164G>T'
+    pipeline = analysis_annotations_pipeline({'unit': variant, 'type': GenomicUnitType.HGVS_VARIANT}, 'CPAM0002')
+
+    indexed_manifest = pipeline[3]["$project"]["manifest"]["$let"]["in"]
+    assert indexed_manifest["datasets"] == "$$entries.k"
+    assert list(indexed_manifest["configurations"]["$map"]["in"]) == ["$$entry.v.data_source", "$$entry.v.version"]
+    transcript_values = pipeline[-3]["$lookup"]["pipeline"][-1]["$project"]["annotations"]
+    assert "$$manifest.datasets" in str(transcript_values)
+
+
+def test_hgvs_variant_pipeline_falls_back_to_embedded_transcripts():
+    """Verifies the transcripts embedded within the HGVS variant are read when it has no transcript annotations"""
+    variant = 'NM_001017980.3:c.164G>T'
+    pipeline = analysis_annotations_pipeline({'unit': variant, 'type': GenomicUnitType.HGVS_VARIANT}, 'CPAM0002')
+
+    assert pipeline[3]["$project"]["embedded_transcripts"] == "$transcripts"
+    fallback = pipeline[-2]["$set"]["transcripts"]["$cond"]
+    assert fallback[:2] == [{"$gt": [{"$size": "$transcripts"}, 0]}, "$transcripts"]
+    assert fallback[2]["$map"]["input"] == {"$ifNull": ["$embedded_transcripts", []]}
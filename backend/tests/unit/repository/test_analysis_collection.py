@@ -5,6 +5,7 @@ from bson import ObjectId
 import pytest
 
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from src.enums import EventType
 from src.models.event import Event
 from ...test_utils import read_test_fixture
@@ -103,6 +104,7 @@ def test_create_analysis(analysis_collection, cpam0002_analysis_json):
 
 def test_create_analysis_already_exists(analysis_collection, cpam0002_analysis_json):
     """Tests the create_analysis function"""
+    analysis_collection.collection.find_one.return_value = {"name": "CPAM0002", "project_name": "CPAM"}
     try:
         project_id = "695d5b157709ebcd1c7325c0"
         project_name = "CPAM"
@@ -112,12 +114,32 @@ def test_create_analysis_already_exists(analysis_collection, cpam0002_analysis_j
         assert str(error) == "Analysis 'CPAM0002' already exists within Project 'CPAM'"
 
 
+def test_create_analysis_already_exists_in_another_project(analysis_collection, cpam0002_analysis_json):
+    """Tests that an analysis is not created when its name already exists within another project"""
+    analysis_collection.collection.find_one.return_value = {"name": "CPAM0002", "project_name": "CPAM"}
+
+    with pytest.raises(ValueError, match="Analysis 'CPAM0002' already exists within Project 'CPAM'"):
+        analysis_collection.create_analysis("695d5b157709ebcd1c7325c1", "Ciliopathies", cpam0002_analysis_json)
+
+    analysis_collection.collection.find_one.assert_called_once_with({"name": "CPAM0002"}, {"project_name": 1})
+    analysis_collection.collection.insert_one.assert_not_called()
+
+
+def test_create_analysis_created_concurrently(analysis_collection, cpam0002_analysis_json):
+    """Tests that an analysis inserted by another request after the name was checked is reported as existing"""
+    analysis_collection.collection.find_one.return_value = None
+    analysis_collection.collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key error")
+
+    with pytest.raises(ValueError, match="Analysis 'CPAM0002' already exists"):
+        analysis_collection.create_analysis("695d5b157709ebcd1c7325c1", "Ciliopathies", cpam0002_analysis_json)
+
+
 def test_attach_third_party_link_monday(analysis_collection, cpam0002_analysis_json):
     """Tests the attach_third_party_link function"""
     analysis_collection.collection.find_one.return_value = cpam0002_analysis_json
     analysis_collection.attach_third_party_link("CPAM0002", "monday_com", "https://monday.com")
     analysis_collection.collection.find_one_and_update.assert_called_with({'name': 'CPAM0002'}, {
-        '$push': {'third_party_links': {'type': "monday_com", 'link': "https://monday.com"}}
+        '$push': {'third_party_links': {'type': "monday_com", 'link': "https://monday.com"}}, '$inc': {'revision': 1}
     },
                                                                           return_document=True)
 
@@ -127,7 +149,8 @@ def test_attach_third_party_link_phenotips(analysis_collection, cpam0002_analysi
     analysis_collection.collection.find_one.return_value = cpam0002_analysis_json
     analysis_collection.attach_third_party_link("CPAM0002", "phenotips_com", "https://phenotips.com")
     analysis_collection.collection.find_one_and_update.assert_called_with({'name': 'CPAM0002'}, {
-        '$push': {'third_party_links': {'type': "phenotips_com", 'link': 'https://phenotips.com'}}
+        '$push': {'third_party_links': {'type': "phenotips_com", 'link': 'https://phenotips.com'}},
+        '$inc': {'revision': 1}
     },
                                                                           return_document=True)
 
@@ -180,7 +203,8 @@ def test_mark_ready(analysis_collection, cpam0002_analysis_json, create_timestam
                         {'event': 'create', 'timestamp': create_timestamp, 'username': 'user01'},
                         {'event': EventType.READY, 'timestamp': ready_timestamp, 'username': 'user01'},
                     ]
-                }
+                },
+                "$inc": {"revision": 1},
             },
             return_document=ReturnDocument.AFTER,
         )
@@ -215,6 +239,18 @@ def test_update_analysis_section(analysis_collection, cpam0112_analysis_json):
     assert actual_updated_field is not None
 
 
+def test_update_analysis_section_increments_revision(analysis_collection, cpam0112_analysis_json):
+    """Tests setting the whole analysis increments its revision rather than setting the revision that was read"""
+    analysis_collection.collection.find_one.return_value = {**cpam0112_analysis_json, "revision": 7}
+    analysis_collection.update_analysis_section(
+        "CPAM0112", "Brief", "Reason", {"value": ["the quick brown fox jumps over the lazy dog."]}
+    )
+
+    (_, actual_update_query) = analysis_collection.collection.update_one.call_args[0]
+    assert "revision" not in actual_update_query['$set']
+    assert actual_update_query['$inc'] == {"revision": 1}
+
+
 def test_add_image_to_pedigree_section(analysis_collection, cpam0002_analysis_json_without_pedigree_section_image):
     """Tests adding an image to the pedigree section of the CPAM0002 analysis"""
     analysis_collection.collection.find_one.return_value = cpam0002_analysis_json_without_pedigree_section_image
@@ -404,7 +440,7 @@ def test_update_discussion_post_in_analysis(analysis_collection):
     analysis_name = "CPAM0002"
 
     expected_find = {"name": analysis_name}
-    expected_update = {"$set": {"discussions.$[item].content": discussion_content}}
+    expected_update = {"$set": {"discussions.$[item].content": discussion_content}, "$inc": {"revision": 1}}
     expected_filter = [{"item.post_id": discussion_post_id}]
 
     analysis_collection.updated_discussion_post(discussion_post_id, discussion_content, analysis_name)
@@ -421,7 +457,7 @@ def test_delete_discussion_post_in_analysis(analysis_collection):
     analysis_name = "CPAM0002"
 
     expected_find = {"name": analysis_name}
-    expected_update = {"$pull": {"discussions": {"post_id": discussion_post_id}}}
+    expected_update = {"$pull": {"discussions": {"post_id": discussion_post_id}}, "$inc": {"revision": 1}}
 
     analysis_collection.delete_discussion_post(discussion_post_id, analysis_name)
     analysis_collection.collection.find_one_and_update.assert_called_with(
@@ -498,6 +534,37 @@ def test_delete_omic_unit_fail_when_not_manual(analysis_collection, cpam0002_ana
         assert str(error) == "VMA21 NM_001017980.3:c.164G>T is not a manually added unit within analysis CPAM0002"
 
 
+def test_add_datasets_to_manifest(analysis_collection):
+    """Verifies each genomic unit's datasets are added to the manifest with one '$each' within one bulk write"""
+    unit_datasets = {
+        "VMA21": [{"Entrez Gene Id": {"data_source": "HGNC", "version": "2024-09-06"}},
+                  {"HGNC_ID": {"data_source": "HGNC", "version": "2024-09-06"}}],
+        "NM_001017980.3:c.164G>T": [{"CADD": {"data_source": "Ensembl", "version": "112"}}]
+    }
+
+    actual = analysis_collection.add_datasets_to_manifest("CPAM0002", unit_datasets)
+
+    assert actual is None
+    analysis_collection.collection.find_one_and_update.assert_not_called()
+    analysis_collection.collection.find_one.assert_not_called()
+    operations = analysis_collection.collection.bulk_write.call_args.args[0]
+    assert len(operations) == 4
+    assert operations[1]._doc == {  # pylint: disable=protected-access
+        "$addToSet": {"manifest.$[entry].manifest": {"$each": unit_datasets["VMA21"]}}
+    }
+
+
+def test_add_datasets_to_manifest_returns_manifest_when_requested(analysis_collection, cpam0002_analysis_json):
+    """Verifies the manifest is returned after adding the datasets only when it is requested"""
+    analysis_collection.collection.find_one.return_value = cpam0002_analysis_json
+
+    actual = analysis_collection.add_datasets_to_manifest(
+        "CPAM0002", {"VMA21": [{"CADD": {"data_source": "Ensembl", "version": "112"}}]}, return_manifest=True
+    )
+
+    assert actual == cpam0002_analysis_json['manifest']
+
+
 @pytest.fixture(name="analysis_with_no_p_dot")
 def fixture_analysis_with_no_p_dot():
     """Returns an analysis with no p. in the genomic unit"""
@@ -1,4 +1,6 @@
 """Tests to verify dataset configuration is returned"""
+from datetime import datetime, timezone
+
 import pytest
 
 from src.enums import GenomicUnitType
@@ -18,6 +20,54 @@ def test_get_datasets_to_annotate_for_units(annotation_config_collection, genomi
     assert len(actual_configuration["hgvs_variant"]) == 3
 
 
+def test_configuration_loaded_once(annotation_config_collection, genomic_units_for_annotation):
+    """Tests that the configuration is only loaded again when its version stamp changes"""
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    annotation_config_collection.collection.find.assert_called_once()
+
+    annotation_config_collection.collection.aggregate.return_value = [{
+        "latest_id": "reimported-annotation-config-id", "updated_at": None, "datasets": 1
+    }]
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    assert annotation_config_collection.collection.find.call_count == 2
+
+
+def test_configuration_loaded_again_when_edited_in_place(annotation_config_collection, genomic_units_for_annotation):
+    """Tests that a dataset edited in place, which keeps its '_id', is loaded again once its 'updated_at' is set"""
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    annotation_config_collection.collection.aggregate.return_value = [{
+        "latest_id": "annotation-config-id", "updated_at": datetime(2026, 10, 18, tzinfo=timezone.utc), "datasets": 1
+    }]
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    assert annotation_config_collection.collection.find.call_count == 2
+
+
+def test_version_stamp_not_checked_within_refresh_interval(annotation_config_collection, genomic_units_for_annotation):
+    """Tests that annotation queueing within the refresh interval does not query the configuration's collection"""
+    now = [1000.0]
+    annotation_config_collection.clock = lambda: now[0]
+    annotation_config_collection.configure_refresh(60)
+
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+    annotation_config_collection.collection.aggregate.return_value = [{
+        "latest_id": "reimported-annotation-config-id", "updated_at": None, "datasets": 1
+    }]
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    annotation_config_collection.collection.aggregate.assert_called_once()
+    annotation_config_collection.collection.find.assert_called_once()
+
+    now[0] += 60
+    annotation_config_collection.datasets_to_annotate_for_units(genomic_units_for_annotation)
+
+    assert annotation_config_collection.collection.find.call_count == 2
+
+
 @pytest.fixture(name="genomic_units_for_annotation")
 def fixture_genomic_units():
     """Fixture for list of genomic units"""
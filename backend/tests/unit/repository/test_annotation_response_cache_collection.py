@@ -0,0 +1,114 @@
+"""Tests caching annotation source responses across annotation runs"""
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from src.repository.annotation_response_cache_collection import AnnotationResponseCacheCollection
+
+from ...test_utils import mock_mongo_collection
+
+ENSEMBL_GENE_URL = "https://rest.ensembl.org/lookup/symbol/homo_sapiens/VMA21?content-type=application/json"
+
+
+def test_cache_key_is_addressed_by_url_source_and_version():
+    """Verifies a response is addressed by its url, data source, and version"""
+    key = AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Ensembl", 112)
+
+    assert key == AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Ensembl", 112)
+    assert key != AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Ensembl", 113)
+    assert key != AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Alliance Genome", 112)
+
+
+def test_find_response(response_cache):
+    """Verifies a cached response is deserialized when it has not expired"""
+    response_cache.collection.find_one.return_value = {"response": json.dumps({"id": "ENSG00000160131"})}
+
+    actual = response_cache.find_response(ENSEMBL_GENE_URL, "Ensembl", 112)
+
+    assert actual == {"id": "ENSG00000160131"}
+    query = response_cache.collection.find_one.call_args[0][0]
+    assert query['_id'] == AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Ensembl", 112)
+    assert '$gt' in query['expires_at']
+
+
+def test_find_response_not_cached(response_cache):
+    """Verifies None is returned when the response is not cached or has expired"""
+    response_cache.collection.find_one.return_value = None
+
+    assert response_cache.find_response(ENSEMBL_GENE_URL, "Ensembl", 112) is None
+
+
+def test_save_response(response_cache):
+    """Verifies the response is upserted as serialized JSON with its expiration"""
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {"id": "ENSG00000160131"})
+
+    query, update = response_cache.collection.update_one.call_args[0]
+    assert query == {"_id": AnnotationResponseCacheCollection.cache_key(ENSEMBL_GENE_URL, "Ensembl", 112)}
+    assert json.loads(update['$set']['response']) == {"id": "ENSG00000160131"}
+    assert update['$set']['expires_at'] > update['$set']['cached_at']
+    assert response_cache.collection.update_one.call_args[1] == {"upsert": True}
+    response_cache.collection.create_index.assert_called_once_with("expires_at", expireAfterSeconds=0)
+
+
+def test_save_response_evicts_oldest_when_exceeding_maximum(response_cache):
+    """Verifies the oldest responses are evicted when the cache exceeds its maximum number of responses"""
+    response_cache.configure_eviction(60, 100)
+    response_cache.collection.estimated_document_count.return_value = 105
+    response_cache.collection.find.return_value.sort.return_value.limit.return_value = [{"_id": "oldest"}]
+
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {})
+
+    response_cache.collection.find.return_value.sort.return_value.limit.assert_called_once_with(15)
+    response_cache.collection.delete_many.assert_called_once_with({"_id": {"$in": ["oldest"]}})
+
+
+def test_save_response_does_not_evict_within_maximum(response_cache):
+    """Verifies nothing is evicted while the cache is within its maximum number of responses"""
+    response_cache.collection.estimated_document_count.return_value = 10
+
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {})
+
+    response_cache.collection.delete_many.assert_not_called()
+
+
+def test_save_response_counts_cached_responses_once(response_cache):
+    """Verifies the cached responses are counted on the first save rather than on every saved response"""
+    response_cache.collection.estimated_document_count.return_value = 10
+
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {})
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 113, {})
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 114, {})
+
+    response_cache.collection.estimated_document_count.assert_called_once()
+    assert response_cache.approximate_count == 12
+
+
+def test_save_response_evicts_once_new_responses_exceed_maximum(response_cache):
+    """Verifies eviction is checked once the responses newly cached by the process exceed the maximum"""
+    response_cache.configure_eviction(60, 100)
+    response_cache.collection.estimated_document_count.return_value = 100
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {})
+
+    response_cache.collection.update_one.return_value.upserted_id = None
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 112, {})
+    response_cache.collection.delete_many.assert_not_called()
+
+    response_cache.collection.update_one.return_value.upserted_id = "new response"
+    response_cache.collection.estimated_document_count.return_value = 101
+    response_cache.collection.find.return_value.sort.return_value.limit.return_value = [{"_id": "oldest"}]
+    response_cache.collection.delete_many.return_value.deleted_count = 11
+    response_cache.save_response(ENSEMBL_GENE_URL, "Ensembl", 113, {})
+
+    response_cache.collection.find.return_value.sort.return_value.limit.assert_called_once_with(11)
+    assert response_cache.approximate_count == 90
+
+
+@pytest.fixture(name="response_cache")
+def fixture_response_cache():
+    """Returns the annotation response cache with a mocked collection"""
+    mock_collection = mock_mongo_collection()
+    mock_collection.create_index = Mock()
+    mock_collection.estimated_document_count = Mock(return_value=0)
+    mock_collection.delete_many = Mock(return_value=Mock(deleted_count=0))
+    return AnnotationResponseCacheCollection(mock_collection)
@@ -0,0 +1,82 @@
+"""Tests creating the indexes required by the collections and reporting the indexes that are missing"""
+from unittest.mock import Mock
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from src.repository.collection_indexes import REQUIRED_INDEXES, ensure_indexes, find_missing_indexes
+
+
+def test_find_missing_indexes_on_empty_database(indexed_database):
+    """Verifies every required index is missing from a database that only has the '_id' indexes"""
+    missing_indexes = find_missing_indexes(indexed_database({}))
+
+    assert len(missing_indexes) == sum(len(index_models) for index_models in REQUIRED_INDEXES.values())
+
+
+def test_find_missing_indexes_with_existing_index_under_another_name(indexed_database):
+    """Verifies an existing index with the same fields satisfies the required index regardless of its name"""
+    database = indexed_database({
+        "analyses": {
+            "name_1": {"key": [("name", 1)], "unique": True}, "manifest.unit_1": {"key": [("manifest.unit", 1)]}
+        }
+    })
+
+    missing_names = [index_model.document['name'] for _, index_model in find_missing_indexes(database)]
+
+    assert "analysis_name" not in missing_names
+    assert "analysis_manifest_unit" not in missing_names
+    assert "genomic_unit_gene" in missing_names
+
+
+def test_find_missing_unique_index_when_existing_index_is_not_unique(indexed_database):
+    """Verifies a required unique index is missing when the existing index on its fields is not unique"""
+    database = indexed_database({"users": {"username_1": {"key": [("username", 1)]}}})
+
+    missing_names = [index_model.document['name'] for _, index_model in find_missing_indexes(database)]
+
+    assert "user_username" in missing_names
+
+
+def test_ensure_indexes_only_creates_missing_indexes(indexed_database):
+    """Verifies only the missing indexes are created, so ensuring the indexes again creates none"""
+    database = indexed_database({"users": {"username_1": {"key": [("username", 1)], "unique": True}}})
+
+    created_indexes = ensure_indexes(database)
+
+    assert "user_username" not in created_indexes
+    assert "user_client_id" in created_indexes
+    assert not ensure_indexes(database)
+
+
+def test_ensure_indexes_continues_after_failed_index(indexed_database):
+    """Verifies an index that fails to be created, such as with duplicate values, does not stop the others"""
+    database = indexed_database({})
+    database["analyses"].create_indexes.side_effect = OperationFailure("E11000 duplicate key error")
+
+    created_indexes = ensure_indexes(database)
+
+    assert "analysis_name" not in created_indexes
+    assert "genomic_unit_gene" in created_indexes
+
+
+@pytest.fixture(name="indexed_database")
+def fixture_indexed_database():
+    """Returns a factory for a mock database whose collections have the existing indexes provided for each"""
+
+    def _create_database(existing_indexes):
+        collections = {}
+        for collection_name in REQUIRED_INDEXES:
+            collection_indexes = {"_id_": {"key": [("_id", 1)]}, **existing_indexes.get(collection_name, {})}
+            collection = Mock()
+            collection.index_information.side_effect = lambda indexes=collection_indexes: dict(indexes)
+            collection.create_indexes.side_effect = lambda index_models, indexes=collection_indexes: [
+                indexes.setdefault(model.document['name'], dict(model.document)) for model in index_models
+            ]
+            collections[collection_name] = collection
+
+        database = Mock()
+        database.__getitem__ = Mock(side_effect=collections.get)
+        return database
+
+    return _create_database
@@ -0,0 +1,37 @@
+"""Tests reading and writing a genomic unit's annotations in the list and keyed layouts of annotations"""
+import pytest
+
+from src.repository.genomic_unit_annotations import get_dataset_annotations, iterate_datasets, set_dataset_annotations
+
+CADD_ANNOTATIONS = [{'data_source': 'Ensembl', 'version': '112', 'value': 24}]
+SIFT_ANNOTATIONS = [{'data_source': 'Ensembl', 'version': '112', 'value': 0.01}]
+
+
+@pytest.fixture(name="annotations", params=["list", "keyed"])
+def fixture_annotations(request):
+    """Returns the same annotations in each of the layouts of annotations"""
+    if request.param == "list":
+        return [{'CADD': list(CADD_ANNOTATIONS)}, {'SIFT Score': list(SIFT_ANNOTATIONS)}]
+
+    return {'CADD': list(CADD_ANNOTATIONS), 'SIFT Score': list(SIFT_ANNOTATIONS)}
+
+
+def test_get_dataset_annotations(annotations):
+    """Verifies a dataset's annotations are found in either layout"""
+    assert get_dataset_annotations(annotations, 'SIFT Score') == SIFT_ANNOTATIONS
+    assert get_dataset_annotations(annotations, 'Polyphen Score') is None
+
+
+def test_iterate_datasets(annotations):
+    """Verifies every dataset and its annotations are iterated in either layout"""
+    assert list(iterate_datasets(annotations)) == [('CADD', CADD_ANNOTATIONS), ('SIFT Score', SIFT_ANNOTATIONS)]
+
+
+def test_set_dataset_annotations(annotations):
+    """Verifies a dataset that is not annotated is added in the layout of the annotations"""
+    polyphen_annotations = [{'data_source': 'Ensembl', 'version': '112', 'value': 0.9}]
+
+    set_dataset_annotations(annotations, 'Polyphen Score', polyphen_annotations)
+
+    assert get_dataset_annotations(annotations, 'Polyphen Score') == polyphen_annotations
+    assert len(list(iterate_datasets(annotations))) == 3
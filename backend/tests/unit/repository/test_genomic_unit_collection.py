@@ -1,9 +1,9 @@
 """ Manages the genomic unit collection. Including reading, writing, fetching various genomic units. """
-from unittest.mock import Mock
 import copy
 import pytest
 
-from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 
 from src.enums import GenomicUnitType
 
@@ -15,22 +15,44 @@ def test_find_genomic_units(genomic_unit_collection):
 
 
 @pytest.mark.parametrize(
-    "transcript_annotation_unit", [
-        ('Polyphen Prediction', 'Ensembl', '112', '120', (True, 2)),
-        ('transcript_id', 'Ensembl', '', '120', (False, 0)),
-    ],
-    indirect=True,
-    ids=["polyphen_exists_different_version", "no_transcripts_yet"]
+    "transcript_ids,annotated_count,expected", [(["NM_001017980.4", "NM_001363810.1"], 2, True),
+                                                (["NM_001017980.4", "NM_001363810.1"], 1, False), ([], 0, False)],
+    ids=["every_transcript_annotated", "one_transcript_annotated", "no_transcripts_yet"]
 )
-def test_transcripts_annotations_exists(transcript_annotation_unit, genomic_unit_collection):
-    """ Tests if a transcript annotation does not exist """
-    annotation_unit, variant_in_database_json, expected = transcript_annotation_unit
-    expected_value, expected_call_count = expected
-    genomic_unit_collection.collection.find_one.return_value = variant_in_database_json
+def test_transcripts_annotations_exists(
+    transcript_ids, annotated_count, expected, genomic_unit_collection, get_annotation_unit
+):
+    """ Tests if a transcript annotation exists for every one of the HGVS variant's transcripts """
+    annotation_unit = get_annotation_unit('NM_001017980.3:c.164G>T', 'Polyphen Prediction')
+    transcripts_collection = genomic_unit_collection.transcripts.collection
+    transcripts_collection.distinct.return_value = transcript_ids
+    transcripts_collection.count_documents.return_value = annotated_count
+
+    actual = genomic_unit_collection.annotation_exist(annotation_unit)
+
+    assert actual == expected
+    transcripts_collection.distinct.assert_called_once_with(
+        "transcript_id", {"hgvs_variant": 'NM_001017980.3:c.164G>T'}
+    )
+    assert transcripts_collection.count_documents.call_count == (1 if transcript_ids else 0)
+    genomic_unit_collection.collection.count_documents.assert_not_called()
+
+
+@pytest.mark.parametrize("version,expected", [("112", True), ("113", False)])
+def test_embedded_transcripts_annotations_exists(
+    version, expected, genomic_unit_collection, get_annotation_unit, variant_nm001017980_3_c_164g_t_annotations_json
+):
+    """Tests the transcripts embedded within the HGVS variant are read when it has no transcript annotations"""
+    annotation_unit = get_annotation_unit('NM_001017980.3:c.164G>T', 'Polyphen Prediction')
+    annotation_unit.set_latest_version(version)
+    genomic_unit_collection.transcripts.collection.distinct.return_value = []
+    genomic_unit_collection.collection.find.return_value = [variant_nm001017980_3_c_164g_t_annotations_json]
 
     actual = genomic_unit_collection.annotation_exist(annotation_unit)
-    assert actual == expected_value
-    assert genomic_unit_collection.collection.count_documents.call_count == expected_call_count
+
+    assert actual == expected
+    embedded_query = genomic_unit_collection.collection.find.call_args.args[0]
+    assert embedded_query == {"hgvs_variant": {"$in": ['NM_001017980.3:c.164G>T']}, "transcripts": {"$exists": True}}
 
 
 @pytest.mark.parametrize(
@@ -92,13 +114,70 @@ def test_find_genomic_unit_annotation_values(
         f'annotations.{annotation_unit.get_dataset_name()}.version': annotation_unit.version
     }
 
-    expected_find_projection = {f'annotations.{annotation_unit.get_dataset_name()}.$': 1, '_id': 0}
+    expected_find_projection = {f'annotations.{annotation_unit.get_dataset_name()}': 1, '_id': 0}
 
     genomic_unit_collection.collection.find_one.assert_called_with(expected_find_filter, expected_find_projection)
 
     assert actual_value == expected
 
 
+def test_find_genomic_unit_annotation_value_with_keyed_layout(genomic_unit_collection, get_annotation_unit):
+    """Finds the Genomic Unit's Annotation for the data source and version within the keyed layout of annotations"""
+    annotation_unit = get_annotation_unit('VMA21', 'Entrez Gene Id')
+    genomic_unit_collection.collection.find_one.return_value = {
+        'annotations': {
+            'Entrez Gene Id': [{'value': 'outdated', 'data_source': 'Rosalution', 'version': 'outdated-version'}, {
+                'value': '203547', 'data_source': annotation_unit.get_dataset_source(),
+                'version': annotation_unit.version
+            }]
+        }
+    }
+
+    assert genomic_unit_collection.find_genomic_unit_annotation_value(annotation_unit) == '203547'
+
+
+def test_find_annotated_datasets(genomic_unit_collection):
+    """
+    Verifies the annotated datasets of every genomic unit are found with one aggregation, and the annotated datasets
+    of their transcripts with one query
+    """
+    genomic_unit_collection.collection.aggregate.return_value = iter([{"gene": "VMA21", "annotations": [
+    ]}, {"hgvs_variant": "NM_001017980.3:c.164G>T", "annotations": []}])
+    genomic_unit_collection.transcripts.collection.find.return_value = [{
+        "hgvs_variant": "NM_001017980.3:c.164G>T", "transcript_id": "NM_001017980.4", "data_set": "SIFT Score",
+        "annotations": [{"data_source": "Ensembl", "version": "112"}]
+    }]
+    genomic_units = [{'unit': 'VMA21', 'type': GenomicUnitType.GENE},
+                     {'unit': 'NM_001017980.3:c.164G>T', 'type': GenomicUnitType.HGVS_VARIANT}]
+
+    actual = genomic_unit_collection.find_annotated_datasets(genomic_units)
+
+    assert actual == [{"gene": "VMA21", "annotations": []}, {
+        "hgvs_variant": "NM_001017980.3:c.164G>T", "annotations": [], "transcripts": [{
+            "transcript_id": "NM_001017980.4",
+            "annotations": [[{"data_set": "SIFT Score", "annotations": [{"data_source": "Ensembl", "version": "112"}]}]]
+        }]
+    }]
+    pipeline = genomic_unit_collection.collection.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"$or": [{"gene": "VMA21"}, {"hgvs_variant": "NM_001017980.3:c.164G>T"}]}}
+    transcripts_query = genomic_unit_collection.transcripts.collection.find.call_args.args[0]
+    assert transcripts_query == {"hgvs_variant": {"$in": ["NM_001017980.3:c.164G>T"]}}
+
+
+def test_find_transcript_annotations(
+    genomic_unit_collection, variant_nm001017980_3_c_164g_t_transcript_annotations_json
+):
+    """Verifies each transcript's annotations are keyed by dataset from one query of the transcript annotations"""
+    transcripts_collection = genomic_unit_collection.transcripts.collection
+    transcripts_collection.find.return_value = variant_nm001017980_3_c_164g_t_transcript_annotations_json
+
+    actual = genomic_unit_collection.find_transcript_annotations('NM_001017980.3:c.164G>T')
+
+    assert [transcript['transcript_id'] for transcript in actual] == ["NM_001017980.4", "NM_001363810.1"]
+    assert actual[1]['annotations']['SIFT Score'] == [{"data_source": "Ensembl", "version": "112", "value": 0.01}]
+    transcripts_collection.find.assert_called_once_with({"hgvs_variant": 'NM_001017980.3:c.164G>T'}, sort=[("_id", 1)])
+
+
 def test_annotate_transcript_genomic_unit(genomic_unit_collection):
     """ Verifies that a transcript annotates a genomic unit properly """
     genomic_unit = {'unit': 'NM_001017980.3:c.164G>T', 'type': GenomicUnitType.HGVS_VARIANT}
@@ -110,18 +189,66 @@ def test_annotate_transcript_genomic_unit(genomic_unit_collection):
         "transcript_id": "NM_001017980.4",
     }
 
-    genomic_unit_collection.find_genomic_unit_with_transcript_id = Mock(
-        return_value={
-            "_id": ObjectId("62fbfa5f616a9799131174ca"),
-            "hgvs_variant": "NM_001017980.3:c.164G>T",
-            "transcripts": [{'transcript_id': 'NM_001363810.1', 'annotations': []}],
-            "annotations": {},
-        }
-    )
-
     genomic_unit_collection.annotate_genomic_unit(genomic_unit, transcript_annotation_unit)
 
-    assert genomic_unit_collection.collection.update_one.call_count == 3
+    genomic_unit_collection.collection.bulk_write.assert_not_called()
+    genomic_unit_collection.transcripts.collection.bulk_write.assert_called_once()
+    operations = genomic_unit_collection.transcripts.collection.bulk_write.call_args.args[0]
+    assert operations == [
+        UpdateOne({
+            "hgvs_variant": "NM_001017980.3:c.164G>T", "transcript_id": "NM_001017980.4", "data_set": "SIFT Prediction"
+        }, {"$addToSet": {"annotations": {"data_source": "Ensembl", "version": "", "value": "deleterious"}}},
+                  upsert=True)
+    ]
+
+
+def test_bulk_annotate_genomic_unit(genomic_unit_collection):
+    """
+    Verifies annotations are written with one ordered bulk write that provisions each dataset once, and the transcript
+    annotations with one bulk write of the transcript annotations
+    """
+    genomic_unit = {'unit': 'NM_001017980.3:c.164G>T', 'type': GenomicUnitType.HGVS_VARIANT}
+    genomic_annotations = [{"data_set": "CADD", "data_source": "Ensembl", "version": "112", "value": 24}, {
+        "data_set": "SIFT Prediction", "data_source": "Ensembl", "version": "112", "value": "deleterious",
+        "transcript_id": "NM_001017980.4"
+    }, {
+        "data_set": "SIFT Prediction", "data_source": "Ensembl", "version": "112", "value": "tolerated",
+        "transcript_id": "NM_001363810.1"
+    }, {
+        "data_set": "SIFT Score", "data_source": "Ensembl", "version": "112", "value": 0.01,
+        "transcript_id": "NM_001363810.1"
+    }]
+
+    genomic_unit_collection.bulk_annotate_genomic_unit(genomic_unit, genomic_annotations)
+
+    genomic_unit_collection.collection.update_one.assert_not_called()
+    genomic_unit_collection.collection.bulk_write.assert_called_once()
+    operations = genomic_unit_collection.collection.bulk_write.call_args.args[0]
+    assert genomic_unit_collection.collection.bulk_write.call_args.kwargs == {'ordered': True}
+    assert len(operations) == 3
+    transcript_operations = genomic_unit_collection.transcripts.collection.bulk_write.call_args.args[0]
+    assert len(transcript_operations) == 3
+
+
+def test_bulk_annotate_genomic_unit_operations_match_one_layout(genomic_unit_collection):
+    """Verifies each operation only matches a genomic unit with the layout of annotations it writes"""
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+    genomic_annotation = {"data_set": "HGNC_ID", "data_source": "Ensembl", "version": "112", "value": "HGNC:22082"}
+
+    genomic_unit_collection.bulk_annotate_genomic_unit(genomic_unit, [genomic_annotation])
+
+    operations = genomic_unit_collection.collection.bulk_write.call_args.args[0]
+    annotation_entry = {'data_source': 'Ensembl', 'version': '112', 'value': 'HGNC:22082'}
+    list_layout = {'annotations': {'$type': 'array'}}
+    assert operations == [
+        UpdateOne({'gene': 'VMA21', **list_layout, 'annotations.HGNC_ID': {'$exists': False}},
+                  {'$addToSet': {'annotations': {'HGNC_ID': []}}}),
+        UpdateOne({'gene': 'VMA21', **list_layout, 'annotations.HGNC_ID': {'$exists': True}},
+                  {'$addToSet': {'annotations.$[dataset].HGNC_ID': annotation_entry}},
+                  array_filters=[{'dataset.HGNC_ID': {'$exists': True}}]),
+        UpdateOne({'gene': 'VMA21', 'annotations': {'$not': {'$type': 'array'}}},
+                  {'$addToSet': {'annotations.HGNC_ID': annotation_entry}}),
+    ]
 
 
 @pytest.mark.parametrize(
@@ -142,7 +269,8 @@ def test_annotate_genomic_unit(prepare_test_annotate, genomic_unit_collection):
 
     genomic_unit_collection.annotate_genomic_unit(annotation_unit.genomic_unit, genomic_annotation)
 
-    assert genomic_unit_collection.collection.update_one.call_count == 2
+    genomic_unit_collection.collection.bulk_write.assert_called_once()
+    assert len(genomic_unit_collection.collection.bulk_write.call_args.args[0]) == 3
 
 
 def test_annotation_genomic_unit_with_file(genomic_unit_collection, get_annotation_json):
@@ -208,6 +336,9 @@ def test_update_existing_genomic_unit_file_annotation(genomic_unit_collection, g
     genomic_unit_collection.collection.find_one_and_update.assert_called_once()
     actual_updated_genomic_unit = genomic_unit_collection.collection.find_one_and_update.call_args_list[0][0][1]['$set']
     assert actual_updated_genomic_unit == expected_genomic_unit
+    genomic_unit_collection.analysis_views.collection.distinct.assert_called_once_with(
+        "analysis_name", {"unit": 'NM_001017980.3:c.164G>T'}
+    )
 
 
 def test_remove_existing_genomic_unit_file_annotation(genomic_unit_collection, get_annotation_json):
@@ -266,27 +397,166 @@ def prepare_test_annotate_genomic_units(request, get_annotation_unit, get_annota
     return (genomic_unit_json, genomic_annotation, annotation_unit)
 
 
-@pytest.fixture(name="transcript_annotation_unit", scope="function")
-def variant_with_datasets_annotation_unit(request, get_annotation_unit, get_annotation_json):
-    """ Fixture that creates generates the test data for verifying transcript annotation operations"""
-    dataset, data_source, existing_version, calculated_version, expected = request.param
+def test_find_analysis_annotations_from_view(genomic_unit_collection):
+    """Verifies the gene's annotation values matching the analysis' manifest are read from the analysis' view"""
+    views_collection = genomic_unit_collection.analysis_views.collection
+    views_collection.find_one.return_value = {"annotations": {"Entrez Gene Id": 203547}}
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+
+    actual = genomic_unit_collection.find_analysis_annotations(genomic_unit, 'CPAM0002')
+
+    assert actual == {"annotations": {"Entrez Gene Id": 203547}}
+    views_collection.find_one.assert_called_once_with({"analysis_name": "CPAM0002", "unit": "VMA21"},
+                                                      {"_id": 0, "annotations": 1, "transcripts": 1})
+    genomic_unit_collection.collection.aggregate.assert_not_called()
+    genomic_unit_collection.collection.find_one.assert_not_called()
 
-    annotation_unit = get_annotation_unit('NM_001017980.3:c.164G>T', dataset)
-    annotation_unit.version = calculated_version
 
-    variant_in_database_json = get_annotation_json("NM_001017980.3:c.164G>T", GenomicUnitType.HGVS_VARIANT)
+def test_find_analysis_annotations_materializes_missing_view(genomic_unit_collection):
+    """Verifies a missing view is materialized with one aggregation before it is read"""
+    views_collection = genomic_unit_collection.analysis_views.collection
+    views_collection.find_one.side_effect = [None, {"annotations": {"Entrez Gene Id": 203547}}]
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
 
-    if existing_version:
-        for transcript_annotation in variant_in_database_json['transcripts']:
-            if dataset in transcript_annotation:
-                transcript_annotation[dataset].data_source = data_source
-                transcript_annotation[dataset].version = existing_version
-    elif dataset == 'transcript_id':
-        variant_in_database_json['transcripts'] = []
-    else:
-        for transcript in variant_in_database_json['transcripts']:
-            transcript['annotations'] = [
-                annotation for annotation in transcript['annotations'] if dataset not in annotation
-            ]
+    actual = genomic_unit_collection.find_analysis_annotations(genomic_unit, 'CPAM0002')
 
-    return (annotation_unit, variant_in_database_json, expected)
+    assert actual == {"annotations": {"Entrez Gene Id": 203547}}
+    pipeline = genomic_unit_collection.collection.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"gene": "VMA21"}}
+    assert pipeline[-2] == {
+        "$addFields": {
+            "analysis_name": {"$literal": "CPAM0002"}, "unit": {"$literal": "VMA21"}, "revision": {"$literal": 1}
+        }
+    }
+    assert pipeline[-1]["$merge"]["into"] == "analysis_annotation_views"
+    assert pipeline[-1]["$merge"]["on"] == ["analysis_name", "unit"]
+
+
+def test_materialize_ensures_view_index_once(genomic_unit_collection):
+    """Verifies the unique index that '$merge' matches views on is created before the first view is materialized"""
+    views_collection = genomic_unit_collection.analysis_views.collection
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+
+    genomic_unit_collection.refresh_analysis_annotations(genomic_unit, ["CPAM0002", "CPAM0046"])
+
+    views_collection.create_index.assert_called_once_with([("analysis_name", 1), ("unit", 1)],
+                                                          name="analysis_annotation_view",
+                                                          unique=True)
+
+
+def test_find_analysis_annotations_aggregated_when_view_not_materialized(genomic_unit_collection):
+    """Verifies the values are aggregated without the view when the missing view cannot be materialized"""
+    genomic_unit_collection.analysis_views.collection.find_one.return_value = None
+    genomic_unit_collection.collection.aggregate.side_effect = [
+        OperationFailure("Cannot find index to verify 'on' fields are unique"),
+        iter([{"annotations": {"Entrez Gene Id": 203547}}])
+    ]
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+
+    actual = genomic_unit_collection.find_analysis_annotations(genomic_unit, 'CPAM0002')
+
+    assert actual == {"annotations": {"Entrez Gene Id": 203547}}
+    aggregated_pipeline = genomic_unit_collection.collection.aggregate.call_args.args[0]
+    assert all("$merge" not in stage for stage in aggregated_pipeline)
+
+
+def test_find_analysis_annotations_revision_aggregated_when_view_not_materialized(genomic_unit_collection):
+    """Verifies the revision identifies the aggregated values when the missing view cannot be materialized"""
+    genomic_unit_collection.analysis_views.collection.find_one.return_value = None
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+
+    revisions = []
+    for value in [203547, 203547, 1]:
+        genomic_unit_collection.collection.aggregate.side_effect = [
+            OperationFailure("Cannot find index to verify 'on' fields are unique"),
+            iter([{"annotations": {"Entrez Gene Id": value}}])
+        ]
+        revisions.append(genomic_unit_collection.find_analysis_annotations_revision(genomic_unit, 'CPAM0002'))
+
+    assert revisions[0] == revisions[1]
+    assert revisions[0] != revisions[2]
+
+
+def test_refreshed_view_increments_revision(genomic_unit_collection):
+    """Verifies an existing view's values are replaced while keeping its '_id' and incrementing its revision"""
+    genomic_unit_collection.refresh_analysis_annotations({'unit': 'VMA21', 'type': GenomicUnitType.GENE}, ["CPAM0002"])
+
+    merge_stage = genomic_unit_collection.collection.aggregate.call_args.args[0][-1]["$merge"]
+    assert merge_stage["whenMatched"] == [{
+        "$replaceWith": {
+            "$mergeObjects": ["$$new", {"_id": "$_id", "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}]
+        }
+    }]
+    assert merge_stage["whenNotMatched"] == "insert"
+
+
+def test_find_analysis_annotations_genomic_unit_not_found(genomic_unit_collection):
+    """Verifies None is returned when the genomic unit to find the analysis' annotations of does not exist"""
+    genomic_unit_collection.analysis_views.collection.find_one.return_value = None
+    genomic_unit = {'unit': 'NOT-A-GENE', 'type': GenomicUnitType.GENE}
+
+    assert genomic_unit_collection.find_analysis_annotations(genomic_unit, 'CPAM0002') is None
+    genomic_unit_collection.collection.aggregate.assert_called_once()
+
+
+def test_refresh_analysis_annotations(genomic_unit_collection):
+    """Verifies the views are refreshed for the annotated analyses and every other analysis viewing the gene"""
+    views_collection = genomic_unit_collection.analysis_views.collection
+    views_collection.distinct.return_value = ["CPAM0046", "CPAM0002"]
+    genomic_unit = {'unit': 'VMA21', 'type': GenomicUnitType.GENE}
+
+    genomic_unit_collection.refresh_analysis_annotations(genomic_unit, ["CPAM0002"])
+
+    views_collection.distinct.assert_called_once_with("analysis_name", {"unit": "VMA21"})
+    refreshed_analyses = [
+        aggregate_call.args[0][-2]["$addFields"]["analysis_name"]["$literal"]
+        for aggregate_call in genomic_unit_collection.collection.aggregate.call_args_list
+    ]
+    assert refreshed_analyses == ["CPAM0002", "CPAM0046"]
+
+
+def test_create_genomic_unit_upserts(genomic_unit_collection):
+    """Verifies a genomic unit is upserted by its unit so that concurrent creations do not insert it twice"""
+    genomic_unit = {'gene': 'VMA21', 'annotations': []}
+
+    genomic_unit_collection.create_genomic_unit(genomic_unit)
+
+    genomic_unit_collection.collection.update_one.assert_called_once_with({'gene': 'VMA21'},
+                                                                          {"$setOnInsert": genomic_unit},
+                                                                          upsert=True)
+    genomic_unit_collection.collection.insert_one.assert_not_called()
+
+
+def test_find_transcript_annotations_embedded_in_genomic_unit(
+    genomic_unit_collection, variant_nm001017980_3_c_164g_t_annotations_json
+):
+    """Verifies the transcripts embedded within the HGVS variant are read when it has no transcript annotations"""
+    genomic_unit_collection.transcripts.collection.find.return_value = []
+    genomic_unit_collection.collection.find.return_value = [variant_nm001017980_3_c_164g_t_annotations_json]
+
+    actual = genomic_unit_collection.find_transcript_annotations('NM_001017980.3:c.164G>T')
+
+    assert [transcript['transcript_id'] for transcript in actual] == ["NM_001017980.4", "NM_001363810.1"]
+    assert actual[1]['annotations']['Polyphen Prediction'] == [{
+        "data_source": "Ensembl", "version": "112", "value": "probably_damaging"
+    }]
+
+
+def test_find_annotated_datasets_embedded_in_genomic_unit(
+    genomic_unit_collection, variant_nm001017980_3_c_164g_t_annotations_json
+):
+    """Verifies the annotated datasets of the transcripts embedded within an HGVS variant are found without values"""
+    genomic_unit_collection.collection.aggregate.return_value = iter([{
+        "hgvs_variant": "NM_001017980.3:c.164G>T", "annotations": []
+    }])
+    genomic_unit_collection.transcripts.collection.find.return_value = []
+    genomic_unit_collection.collection.find.return_value = [variant_nm001017980_3_c_164g_t_annotations_json]
+
+    actual = genomic_unit_collection.find_annotated_datasets([{
+        'unit': 'NM_001017980.3:c.164G>T', 'type': GenomicUnitType.HGVS_VARIANT
+    }])
+
+    transcripts = actual[0]['transcripts']
+    assert [transcript['transcript_id'] for transcript in transcripts] == ["NM_001017980.4", "NM_001363810.1"]
+    assert {"data_set": "Polyphen Prediction", "annotations": [{"data_source": "Ensembl",
+                                                                "version": "112"}]} in transcripts[0]['annotations'][0]
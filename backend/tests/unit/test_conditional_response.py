@@ -0,0 +1,49 @@
+"""Tests responding to conditional requests with revisions and caching the serialized responses"""
+from unittest.mock import Mock
+
+import pytest
+
+from src.conditional_response import RevisionResponseCache, entity_tag, is_not_modified
+
+
+def test_least_recently_used_response_evicted():
+    """Tests that the least recently used response is evicted beyond the maximum number of responses"""
+    cache = RevisionResponseCache(max_entries=2)
+    cache.set(("summary", "CPAM0002"), '"a"', b"{}")
+    cache.set(("summary", "CPAM0047"), '"b"', b"[]")
+
+    assert cache.get(("summary", "CPAM0002"), '"a"') == b"{}"
+
+    cache.set(("summary", "CPAM0046"), '"c"', b"null")
+
+    assert cache.get(("summary", "CPAM0047"), '"b"') is None
+    assert cache.get(("summary", "CPAM0002"), '"a"') == b"{}"
+    assert cache.get(("summary", "CPAM0046"), '"c"') == b"null"
+
+
+def test_response_for_another_etag_replaced():
+    """Tests that only the response of the key's latest ETag is cached"""
+    cache = RevisionResponseCache()
+    cache.set(("summary", "CPAM0002"), '"a"', b"{}")
+    cache.set(("summary", "CPAM0002"), '"b"', b"[]")
+
+    assert cache.get(("summary", "CPAM0002"), '"a"') is None
+    assert cache.get(("summary", "CPAM0002"), '"b"') == b"[]"
+    assert len(cache.responses) == 1
+
+
+def test_entity_tag_changes_with_revision():
+    """Tests that the ETag is quoted and identifies the revisions it is built from"""
+    assert entity_tag("view-id", 1) == entity_tag("view-id", 1)
+    assert entity_tag("view-id", 1) != entity_tag("view-id", 2)
+    assert entity_tag("view-id", 1).startswith('"')
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected", [(None, False), ('"a"', True), ('"b"', False), ('"b", W/"a"', True), ("*", True)]
+)
+def test_is_not_modified(if_none_match, expected):
+    """Tests matching the request's 'If-None-Match' header to the ETag"""
+    request = Mock(headers={} if if_none_match is None else {"if-none-match": if_none_match})
+
+    assert is_not_modified(request, '"a"') is expected
@@ -80,4 +80,7 @@ then
   docker cp "$annotation_configuration_filepath" "$docker_container_name":"$target_configuration_filepath"
 fi
 
-${docker_exec_prefix} mongoimport --host "$mongo_host" --port "$mongo_port" --db "$database" --collection="annotations_config" --drop --file "$target_configuration_filepath" --jsonArray
\ No newline at end of file
+${docker_exec_prefix} mongoimport --host "$mongo_host" --port "$mongo_port" --db "$database" --collection="annotations_config" --drop --file "$target_configuration_filepath" --jsonArray
+
+# Marks the replaced configuration as updated so that running Rosalution instances load it again
+${docker_exec_prefix} mongosh --host "$mongo_host" --port "$mongo_port" --quiet --eval "db.getSiblingDB('$database').annotations_config.updateMany({}, {'\$currentDate': {'updated_at': true}})"
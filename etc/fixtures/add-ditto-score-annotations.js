@@ -92,3 +92,5 @@ try {
     quit(1);
 }
 
+// The analyses' views of the changed annotations are rebuilt when they are next read
+load(__dirname + '/rebuild-analysis-annotation-views.js');
@@ -84,7 +84,7 @@ try {
       dataset['data_source'] = 'Alliance Genome'
       result = db.annotations_config.updateOne(
         {'_id': dataset._id},
-        {'$set': dataset}
+        {'$set': dataset, '$currentDate': {'updated_at': true}}
       )
     }
     datasetManifest = createAnalysisManifestEntry(dataset)
@@ -147,3 +147,6 @@ try {
   console.log(usage);
   quit(1);
 }
+
+// The analyses' views of the changed annotations are rebuilt when they are next read
+load(__dirname + '/rebuild-analysis-annotation-views.js');
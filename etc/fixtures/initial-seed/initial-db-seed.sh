@@ -48,4 +48,7 @@ mongoimport  --db "$database" --collection users --file "$fixture_filepath/users
 echo "Importing Genomic Units..."
 mongoimport  --db "$database" --collection genomic_units --file "$fixture_filepath/genomic-units.json" --jsonArray
 
+echo "Importing Transcript Annotations..."
+mongoimport  --db "$database" --collection transcript_annotations --file "$fixture_filepath/transcript-annotations.json" --jsonArray
+
 echo "Seeding Rosalution databse...Complete"
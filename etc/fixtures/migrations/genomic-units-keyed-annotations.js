@@ -0,0 +1,105 @@
+const usage = `
+Script usage for 'genomic-units-keyed-annotations.js':
+
+mongosh /tmp/fixtures/migrations/genomic-units-keyed-annotations.js
+    Script Options:
+        help            If true, prints this message.
+        databaseName    Database name to use - default: rosalution_db
+        batchSize       Number of genomic units written in each bulk write - default: 500
+        dryRun          If true, only counts the genomic units to migrate - default: false
+
+    Migrates each genomic unit's annotations, and the annotations of each of its transcripts, from a list of
+    single dataset objects to an object keyed by the dataset's name. The annotations of a dataset that is listed
+    more than once are combined. Genomic units that are already migrated are skipped, so the migration can be
+    run again if it is interrupted. The backend reads and writes annotations in either layout during the rollout,
+    but run the migration while no analyses are being annotated, since an annotation written between a genomic
+    unit being read and migrated would be replaced.
+
+        'annotations': [{'CADD': [...]}, {'SIFT Score': [...]}]
+
+    becomes
+
+        'annotations': {'CADD': [...], 'SIFT Score': [...]}
+
+    For mongosh connection and authentication usage, please run: mongosh help
+
+    Examples:
+        mongosh --host localhost --port 27017 /tmp/fixtures/migrations/genomic-units-keyed-annotations.js
+        mongosh --host localhost --port 27017 --eval "dryRun=true;databaseName='your_db_name'" /tmp/fixtures/migrations/genomic-units-keyed-annotations.js
+`
+
+if(typeof help !== 'undefined' && help == true) {
+    print(usage);
+    quit(1);
+}
+
+if(typeof databaseName == 'undefined')
+    databaseName = 'rosalution_db';
+else if(typeof databaseName !== 'string') {
+    print("databaseName must be a string");
+    quit(1);
+}
+
+if(typeof batchSize == 'undefined')
+    batchSize = 500;
+
+if(typeof dryRun == 'undefined')
+    dryRun = false;
+
+db = db.getSiblingDB(databaseName);
+
+function toKeyedAnnotations(annotations) {
+    if(!Array.isArray(annotations))
+        return annotations || {};
+
+    const keyedAnnotations = {};
+    annotations.forEach(dataset => {
+        for(const [datasetName, datasetAnnotations] of Object.entries(dataset)) {
+            keyedAnnotations[datasetName] = (keyedAnnotations[datasetName] || []).concat(datasetAnnotations);
+        }
+    });
+
+    return keyedAnnotations;
+}
+
+const listLayoutQuery = {'annotations': {'$type': 'array'}};
+
+console.log(`Migrating genomic unit annotations in ${databaseName} to be keyed by dataset...`);
+
+try {
+    const migrationCount = db.genomic_units.countDocuments(listLayoutQuery);
+    console.log(`${migrationCount} genomic units to migrate.`);
+
+    if(dryRun == true)
+        quit(0);
+
+    let operations = [];
+    let migratedCount = 0;
+    db.genomic_units.find(listLayoutQuery, {'annotations': 1, 'transcripts': 1}).forEach(unit => {
+        const update = {'annotations': toKeyedAnnotations(unit.annotations)};
+        if(Array.isArray(unit.transcripts)) {
+            update['transcripts'] = unit.transcripts.map(transcript => ({
+                ...transcript, 'annotations': toKeyedAnnotations(transcript.annotations)
+            }));
+        }
+
+        // Only replaces annotations that are still in the list layout when the write is applied
+        operations.push({'updateOne': {'filter': {'_id': unit._id, ...listLayoutQuery}, 'update': {'$set': update}}});
+
+        if(operations.length >= batchSize) {
+            migratedCount += db.genomic_units.bulkWrite(operations, {'ordered': false}).modifiedCount;
+            operations = [];
+        }
+    });
+
+    if(operations.length > 0)
+        migratedCount += db.genomic_units.bulkWrite(operations, {'ordered': false}).modifiedCount;
+
+    console.log(`${migratedCount} genomic units migrated.`);
+} catch (err) {
+    console.log(err.stack);
+    console.log(usage);
+    quit(1);
+}
+
+console.log(`Genomic unit annotation migration complete.`);
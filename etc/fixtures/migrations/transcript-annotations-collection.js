@@ -0,0 +1,119 @@
+const usage = `
+Script usage for 'transcript-annotations-collection.js':
+
+mongosh /tmp/fixtures/migrations/transcript-annotations-collection.js
+    Script Options:
+        help            If true, prints this message.
+        databaseName    Database name to use - default: rosalution_db
+        batchSize       Number of transcript datasets written in each bulk write - default: 500
+        dryRun          If true, only counts the genomic units to migrate - default: false
+
+    Moves the transcripts embedded within each HGVS variant genomic unit into the 'transcript_annotations'
+    collection, with one document for each of the variant's transcript datasets, and removes the embedded
+    transcripts from the genomic unit. Transcript annotations in either the list or keyed layout are moved.
+
+        {'hgvs_variant': 'NM_001017980.3:c.164G>T', 'transcripts': [{
+            'transcript_id': 'NM_001017980.4', 'annotations': [{'SIFT Score': [...]}]
+        }]}
+
+    becomes
+
+        {'hgvs_variant': 'NM_001017980.3:c.164G>T', 'transcript_id': 'NM_001017980.4', 'data_set': 'SIFT Score',
+         'annotations': [...]}
+
+    Annotations are added to the transcript dataset's existing annotations, so the migration can be run again if
+    it is interrupted. Run the migration while no analyses are being annotated.
+
+    For mongosh connection and authentication usage, please run: mongosh help
+
+    Examples:
+        mongosh --host localhost --port 27017 /tmp/fixtures/migrations/transcript-annotations-collection.js
+        mongosh --host localhost --port 27017 --eval "dryRun=true;databaseName='your_db_name'" /tmp/fixtures/migrations/transcript-annotations-collection.js
+`
+
+if(typeof help !== 'undefined' && help == true) {
+    print(usage);
+    quit(1);
+}
+
+if(typeof databaseName == 'undefined')
+    databaseName = 'rosalution_db';
+else if(typeof databaseName !== 'string') {
+    print("databaseName must be a string");
+    quit(1);
+}
+
+if(typeof batchSize == 'undefined')
+    batchSize = 500;
+
+if(typeof dryRun == 'undefined')
+    dryRun = false;
+
+db = db.getSiblingDB(databaseName);
+
+function datasetEntries(annotations) {
+    if(!Array.isArray(annotations))
+        return Object.entries(annotations || {});
+
+    return annotations.flatMap(dataset => Object.entries(dataset));
+}
+
+const embeddedTranscriptsQuery = {'hgvs_variant': {'$exists': true}, 'transcripts': {'$exists': true}};
+
+console.log(`Moving transcript annotations in ${databaseName} to the 'transcript_annotations' collection...`);
+
+try {
+    const migrationCount = db.genomic_units.countDocuments(embeddedTranscriptsQuery);
+    console.log(`${migrationCount} genomic units to migrate.`);
+
+    if(dryRun == true)
+        quit(0);
+
+    db.transcript_annotations.createIndex(
+        {'hgvs_variant': 1, 'transcript_id': 1, 'data_set': 1}, {'name': 'transcript_annotation_dataset', 'unique': true}
+    );
+
+    let operations = [];
+    let unitIds = [];
+    let datasetCount = 0;
+
+    // The embedded transcripts are only removed once their transcript datasets are written
+    function writeBatch() {
+        if(operations.length > 0)
+            db.transcript_annotations.bulkWrite(operations, {'ordered': true});
+
+        db.genomic_units.updateMany({'_id': {'$in': unitIds}}, {'$unset': {'transcripts': ''}});
+        datasetCount += operations.length;
+        operations = [];
+        unitIds = [];
+    }
+
+    db.genomic_units.find(embeddedTranscriptsQuery, {'hgvs_variant': 1, 'transcripts': 1}).forEach(unit => {
+        (unit.transcripts || []).forEach(transcript => {
+            datasetEntries(transcript.annotations).forEach(([datasetName, datasetAnnotations]) => {
+                operations.push({'updateOne': {
+                    'filter': {
+                        'hgvs_variant': unit.hgvs_variant, 'transcript_id': transcript.transcript_id,
+                        'data_set': datasetName
+                    },
+                    'update': {'$addToSet': {'annotations': {'$each': datasetAnnotations}}},
+                    'upsert': true
+                }});
+            });
+        });
+        unitIds.push(unit._id);
+
+        if(operations.length >= batchSize)
+            writeBatch();
+    });
+
+    writeBatch();
+
+    console.log(`${datasetCount} transcript datasets written.`);
+} catch (err) {
+    console.log(err.stack);
+    console.log(usage);
+    quit(1);
+}
+
+console.log(`Transcript annotation migration complete.`);
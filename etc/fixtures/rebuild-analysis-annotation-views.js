@@ -0,0 +1,59 @@
+const rebuildViewsUsage = `
+Script usage for 'rebuild-analysis-annotation-views.js':
+
+mongosh /tmp/fixtures/rebuild-analysis-annotation-views.js
+    Script Options:
+        help            If true, prints this message.
+        databaseName    Database name to use - default: rosalution_db
+        analysisNames   Names of the analyses to rebuild the views of - default: every analysis
+
+    Removes the materialized views of the analyses' annotation values within the 'analysis_annotation_views'
+    collection, so that each view is rebuilt from the genomic units and the analysis' manifest when it is next read.
+    Run after changing genomic units' annotations or analyses' manifests outside of Rosalution, since the views are
+    only refreshed when Rosalution writes the annotations. The fixture scripts that change annotations or manifests
+    load this script once their changes are written.
+
+    The unique index that views are rebuilt on is created when it is missing.
+
+    For mongosh connection and authentication usage, please run: mongosh help
+
+    Examples:
+        mongosh --host localhost --port 27017 /tmp/fixtures/rebuild-analysis-annotation-views.js
+        mongosh --host localhost --port 27017 --eval "analysisNames=['CPAM0002'];databaseName='your_db_name'" /tmp/fixtures/rebuild-analysis-annotation-views.js
+`
+
+if(typeof help !== 'undefined' && help == true) {
+    print(rebuildViewsUsage);
+    quit(1);
+}
+
+if(typeof databaseName == 'undefined')
+    databaseName = 'rosalution_db';
+else if(typeof databaseName !== 'string') {
+    print("databaseName must be a string");
+    quit(1);
+}
+
+if(typeof analysisNames !== 'undefined' && !Array.isArray(analysisNames)) {
+    print("analysisNames must be an array of analysis names");
+    quit(1);
+}
+
+db = db.getSiblingDB(databaseName);
+
+console.log(`Rebuilding the analysis annotation views in ${databaseName}...`);
+
+try {
+    db.analysis_annotation_views.createIndex(
+        {'analysis_name': 1, 'unit': 1}, {'name': 'analysis_annotation_view', 'unique': true}
+    );
+
+    const viewsQuery = typeof analysisNames == 'undefined' ? {} : {'analysis_name': {'$in': analysisNames}};
+    const removed = db.analysis_annotation_views.deleteMany(viewsQuery);
+
+    console.log(`${removed.deletedCount} views removed, each is rebuilt when it is next read.`);
+} catch (err) {
+    console.log(err.stack);
+    console.log(rebuildViewsUsage);
+    quit(1);
+}
@@ -57,4 +57,7 @@ try {
     quit(1);
 }
 
-console.log(`Annotation removal complete.`);
\ No newline at end of file
+console.log(`Annotation removal complete.`);
+
+// The analyses' views of the changed annotations are rebuilt when they are next read
+load(__dirname + '/rebuild-analysis-annotation-views.js');
@@ -14,7 +14,7 @@ usage() {
     echo " "
     echo " -h Prints usage"
     echo " "
-    echo "Automatically updates the genomic_units.json fixtures for the initial mongo seed"
+    echo "Automatically updates the genomic-units.json and transcript-annotations.json fixtures for the initial mongo seed"
     echo "when deploying a fresh version of Rosalution."
     echo " "
     echo "Please install jq for this script to work. https://stedolan.github.io/jq/"
@@ -39,7 +39,6 @@ PARENT_PATH=$( cd "$(dirname "${BASH_SOURCE[0]}")" || exit; pwd -P)
 
 MONGODB_CONNECTION_STRING="localhost:27017"
 MONGODB_DATABASE_NAME="rosalution_db"
-MONGODB_COLLECTION="genomic_units"
 
 DOCKER_CONTAINER_NAME=""
 DOCKER_EXEC_PREFIX=""
@@ -57,16 +56,25 @@ done
 MONGO_CONNECTION_HOST=$(echo "$MONGODB_CONNECTION_STRING" | cut -d: -f1)
 MONGO_CONNECTION_PORT=$(echo "$MONGODB_CONNECTION_STRING" | cut -d: -f2)
 
-${DOCKER_EXEC_PREFIX} mongoexport --host "$MONGO_CONNECTION_HOST" --port "$MONGO_CONNECTION_PORT" --jsonArray --collection="$MONGODB_COLLECTION" --db="$MONGODB_DATABASE_NAME" --out=/tmp/genomic-units.json --pretty
+# Exports the collection to the initial seed's fixture file without the documents' '_id'
+export_fixture() {
+    local collection=$1
+    local fixture_file=$2
 
-if [ -n "$DOCKER_CONTAINER_NAME" ]
-then
-    docker cp "$DOCKER_CONTAINER_NAME":/tmp/genomic-units.json /tmp/
-    ${DOCKER_EXEC_PREFIX} rm -rf /tmp/genomic-units.json
-fi
+    ${DOCKER_EXEC_PREFIX} mongoexport --host "$MONGO_CONNECTION_HOST" --port "$MONGO_CONNECTION_PORT" --jsonArray --collection="$collection" --db="$MONGODB_DATABASE_NAME" --out="/tmp/$fixture_file" --pretty
+
+    if [ -n "$DOCKER_CONTAINER_NAME" ]
+    then
+        docker cp "$DOCKER_CONTAINER_NAME":"/tmp/$fixture_file" /tmp/
+        ${DOCKER_EXEC_PREFIX} rm -rf "/tmp/$fixture_file"
+    fi
 
-jq 'del(.[]._id)' /tmp/genomic-units.json > /tmp/genomic-units.tmp && mv /tmp/genomic-units.tmp "$PARENT_PATH"/initial-seed/genomic-units.json
+    jq 'del(.[]._id)' "/tmp/$fixture_file" > /tmp/fixture.tmp && mv /tmp/fixture.tmp "$PARENT_PATH/initial-seed/$fixture_file"
+
+    rm "/tmp/$fixture_file"
+}
 
-rm /tmp/genomic-units.json
+export_fixture genomic_units genomic-units.json
+export_fixture transcript_annotations transcript-annotations.json
 
 echo "Done. Exiting."